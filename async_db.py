@@ -0,0 +1,227 @@
+"""
+Async Database Module
+Runs queries on worker threads and delivers results to the Tk main loop
+"""
+
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from query_profiler import find_caller, attributed_to
+
+
+class StatusBar(tk.Frame):
+    """Status line with a loading indicator for a management screen"""
+    
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, bg='#dfe6e9', **kwargs)
+        self.busy_label = tk.Label(self, text="", font=('Arial', 9, 'bold'), bg='#dfe6e9', fg='#d35400', width=12)
+        self.busy_label.pack(side=tk.RIGHT, padx=10)
+        self.message_label = tk.Label(self, text="Ready", font=('Arial', 9), bg='#dfe6e9', anchor='w')
+        self.message_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+    
+    def set_busy(self, busy):
+        """Show or hide the loading indicator"""
+        self.busy_label.config(text="Loading..." if busy else "")
+        self.winfo_toplevel().config(cursor='watch' if busy else '')
+    
+    def set_message(self, text):
+        """Show a message in the status line"""
+        self.message_label.config(text=text)
+
+
+class Debouncer:
+    """Runs func once input has been quiet for `delay` milliseconds
+    
+    Bind trigger() to <KeyRelease>; keys that don't edit text (arrows,
+    Tab, modifiers) are ignored. flush() runs func straight away.
+    """
+    
+    IGNORED_KEYS = {
+        'Tab', 'ISO_Left_Tab', 'Return', 'KP_Enter', 'Escape',
+        'Left', 'Right', 'Up', 'Down', 'Home', 'End', 'Prior', 'Next',
+        'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R', 'Caps_Lock'
+    }
+    
+    def __init__(self, widget, func, delay=300):
+        self.widget = widget
+        self.func = func
+        self.delay = delay
+        self._pending = None
+    
+    def trigger(self, event=None):
+        """Restart the quiet period"""
+        if event is not None and getattr(event, 'keysym', None) in self.IGNORED_KEYS:
+            return
+        self.cancel()
+        self._pending = self.widget.after(self.delay, self._fire)
+    
+    def flush(self, event=None):
+        """Run func now instead of waiting"""
+        self.cancel()
+        self.func()
+    
+    def cancel(self):
+        """Forget a pending run"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+    
+    def _fire(self):
+        """Quiet period over"""
+        self._pending = None
+        if self.widget.winfo_exists():
+            self.func()
+
+
+class AsyncDatabase:
+    """Runs database calls on a worker pool and hands results back via after()
+    
+    Every call belongs to a channel (e.g. 'movies'). Submitting a new call on
+    a channel supersedes the previous one: its result is discarded when it
+    arrives, and streamed queries stop reading further chunks.
+    """
+    
+    def __init__(self, widget, status_bar=None, max_workers=4, poll_interval=20):
+        self.widget = widget
+        self.status_bar = status_bar
+        self.poll_interval = poll_interval
+        
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db-worker')
+        self._results = queue.Queue()
+        self._generations = {}
+        self._pending = 0
+        self._polling = False
+        self.discarded = 0
+        
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+    
+    def submit(self, channel, func, *args, callback=None, error_callback=None, on_progress=None, **kwargs):
+        """Run func(*args, **kwargs) on a worker and pass the result to callback
+        
+        With on_progress, func also gets a progress= argument it may call from
+        the worker; each value is handed to on_progress on the main loop.
+        """
+        token = self._next_token(channel)
+        if on_progress is not None:
+            kwargs['progress'] = lambda value: self._results.put((channel, token, on_progress, value, False, None))
+        self._start(channel, token, lambda: func(*args, **kwargs), callback, error_callback)
+        return token
+    
+    def stream(self, channel, chunks, on_chunk, on_done=None, error_callback=None):
+        """Iterate chunks() on a worker, handing each chunk to on_chunk
+        
+        on_done receives the total number of rows once the stream is finished.
+        """
+        token = self._next_token(channel)
+        
+        def work():
+            total = 0
+            iterator = chunks()
+            try:
+                for chunk in iterator:
+                    if self._generations.get(channel) != token:
+                        break
+                    total += len(chunk)
+                    self._results.put((channel, token, on_chunk, chunk, False, None))
+            finally:
+                close = getattr(iterator, 'close', None)
+                if close is not None:
+                    close()
+            return total
+        
+        self._start(channel, token, work, on_done, error_callback)
+        return token
+    
+    def cancel(self, channel):
+        """Discard any result still to come on a channel"""
+        self._next_token(channel)
+    
+    def is_current(self, channel, token):
+        """True when token belongs to the latest call on the channel"""
+        return self._generations.get(channel) == token
+    
+    def cancel_all(self):
+        """Discard every result still to come"""
+        for channel in list(self._generations):
+            self.cancel(channel)
+    
+    def shutdown(self):
+        """Stop accepting work; running queries finish in the background"""
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
+    
+    def _on_destroy(self, event):
+        """Shut the worker pool down with the screen that owns it"""
+        if event.widget is self.widget:
+            self.shutdown()
+    
+    def _next_token(self, channel):
+        """New generation number for a channel"""
+        token = self._generations.get(channel, 0) + 1
+        self._generations[channel] = token
+        return token
+    
+    def _start(self, channel, token, work, callback, error_callback):
+        """Submit work and arrange for its outcome to be queued"""
+        # Attribute the worker's queries to the screen that asked for them
+        caller = find_caller()
+        
+        def run():
+            with attributed_to(caller):
+                return work()
+        
+        def done(future):
+            error = future.exception()
+            value = None if error else future.result()
+            self._results.put((channel, token, error_callback if error else callback, value, True, error))
+        
+        self._set_pending(self._pending + 1)
+        self.executor.submit(run).add_done_callback(done)
+        if not self._polling:
+            self._polling = True
+            self._schedule()
+    
+    def _schedule(self):
+        """Poll the result queue again from the Tk main loop"""
+        try:
+            self.widget.after(self.poll_interval, self._poll)
+        except tk.TclError:
+            # Screen was destroyed - nothing left to update
+            self._polling = False
+    
+    def _poll(self):
+        """Deliver queued results on the main thread"""
+        while True:
+            try:
+                channel, token, handler, value, final, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if final:
+                self._set_pending(self._pending - 1)
+            if not self.is_current(channel, token):
+                self.discarded += 1
+                continue
+            if handler is None:
+                if error is not None:
+                    print(f"Error in background query: {error}")
+                continue
+            try:
+                handler(error if error is not None else value)
+            except Exception as e:
+                # Keep polling even if one screen's callback fails
+                print(f"Error delivering query result: {e}")
+        
+        if self._pending > 0:
+            self._schedule()
+        else:
+            self._polling = False
+    
+    def _set_pending(self, pending):
+        """Track running calls and toggle the loading indicator"""
+        was_busy = self._pending > 0
+        self._pending = pending
+        if self.status_bar is not None and was_busy != (pending > 0):
+            try:
+                self.status_bar.set_busy(pending > 0)
+            except tk.TclError:
+                pass
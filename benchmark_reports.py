@@ -0,0 +1,167 @@
+"""
+Report Benchmark
+Times the rental report's queries as they were (four scans of issuetran) against
+ReportGenerator.fetch_rental_frames (one read of the open rentals plus the rollup
+tables) on a synthetic rental history in a separate SQLite file
+
+Run directly; the file is filled on the first run and reused afterwards:
+    python benchmark_reports.py [rentals] [path]
+"""
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import fees
+import pricing
+import rollups
+from db_backends import SQLiteBackend
+from db_config import DatabaseConfig
+from migrations import migrate
+from reports import ReportGenerator
+
+DEFAULT_RENTALS = 2000000
+DEFAULT_PATH = 'benchmark.db'
+
+# Share of synthetic rentals still out, and how far back the history goes
+OPEN_SHARE = 0.02
+HISTORY_DAYS = 5 * 365
+
+# The rental report's queries before the single-pass rewrite
+BEFORE_QUERIES = [
+    f"""
+        SELECT
+            i.IssueID,
+            CONCAT(c.FirstName, ' ', c.LastName) as CustomerName,
+            c.Phone,
+            c.CategoryID,
+            m.Title as MovieTitle,
+            m.Genre,
+            i.IssueDate,
+            i.dueDate,
+            DATEDIFF(CURDATE(), i.dueDate) as DaysOverdue,
+            {fees.sql_late_fee()} as LateFee
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE i.ReturnDate IS NULL
+        ORDER BY i.dueDate
+    """,
+    f"""
+        SELECT
+            i.IssueID,
+            CONCAT(c.FirstName, ' ', c.LastName) as CustomerName,
+            c.Phone,
+            c.Email,
+            c.CategoryID,
+            m.Title as MovieTitle,
+            i.IssueDate,
+            i.dueDate,
+            {fees.sql_days_late()} as DaysOverdue,
+            {fees.sql_late_fee()} as LateFee
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE i.ReturnDate IS NULL AND i.dueDate < CURDATE()
+        ORDER BY DaysOverdue DESC
+    """,
+    """
+        SELECT
+            m.Genre,
+            COUNT(i.IssueID) as TotalRentals,
+            SUM(CASE WHEN i.ReturnDate IS NULL THEN 1 ELSE 0 END) as ActiveRentals,
+            SUM(CASE WHEN i.ReturnDate IS NOT NULL THEN 1 ELSE 0 END) as CompletedRentals,
+            AVG(m.RentalPrice) as AvgRentalPrice
+        FROM movies m
+        LEFT JOIN issuetran i ON m.MovieID = i.MovieID
+        GROUP BY m.Genre
+        ORDER BY TotalRentals DESC
+    """,
+    """
+        SELECT
+            p.Name as Producer,
+            COUNT(i.IssueID) as TotalRentals,
+            SUM(m.RentalPrice) as TotalRevenue
+        FROM producers p
+        JOIN movies m ON p.ProducerID = m.ProducerID
+        LEFT JOIN issuetran i ON m.MovieID = i.MovieID
+        GROUP BY p.ProducerID
+        ORDER BY TotalRentals DESC
+        LIMIT 20
+    """
+]
+
+
+def synthetic_rentals(count, customer_ids, movie_ids, seed=2025):
+    """(CustomerID, MovieID, IssueDate, dueDate, ReturnDate) rows spread over HISTORY_DAYS"""
+    rng = random.Random(seed)
+    today = date.today()
+    for _ in range(count):
+        issued = today - timedelta(days=rng.randrange(HISTORY_DAYS))
+        due = issued + timedelta(days=rng.choice((3, 7, 14)))
+        returned = None
+        if rng.random() >= OPEN_SHARE:
+            returned = min(issued + timedelta(days=rng.randint(1, 21)), today)
+        yield rng.choice(customer_ids), rng.choice(movie_ids), issued, due, returned
+
+
+def fill(db, rentals):
+    """Add synthetic rentals until issuetran holds `rentals` rows, then rebuild the rollups"""
+    have = db.fetch_one("SELECT COUNT(*) AS count FROM issuetran")['count']
+    if have >= rentals:
+        return 0
+    customer_ids = [row['CustomerID'] for row in db.fetch_data("SELECT CustomerID FROM customer")]
+    movie_ids = [row['MovieID'] for row in db.fetch_data("SELECT MovieID FROM movies")]
+    db.execute_many(
+        "INSERT INTO issuetran (CustomerID, MovieID, IssueDate, dueDate, ReturnDate) VALUES (%s, %s, %s, %s, %s)",
+        synthetic_rentals(rentals - have, customer_ids, movie_ids),
+        batch_size=10000
+    )
+    rollups.rebuild(db)
+    return rentals - have
+
+
+def before(db):
+    """The rental report's frames the old way: four queries, late fees discounted afterwards"""
+    frames = [ReportGenerator.fetch_frame(db, query) for query in BEFORE_QUERIES]
+    for frame in frames[:2]:
+        if not frame.empty:
+            frame['LateFee'] = pricing.discount_amounts(db, frame['LateFee'], frame['CategoryID'])
+    return frames
+
+
+def after(db):
+    """The rental report's frames as built now"""
+    return list(ReportGenerator.fetch_rental_frames(db))
+
+
+def best_time(func, db, runs=3):
+    """Fastest of `runs` calls of func(db) in seconds, with the last result"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(db)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    rentals = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RENTALS
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH
+    
+    db = DatabaseConfig(backend=SQLiteBackend(path))
+    migrate(db)
+    started = time.perf_counter()
+    added = fill(db, rentals)
+    if added:
+        print(f"Added {added} synthetic rentals in {time.perf_counter() - started:.1f} s")
+    
+    before_time, old = best_time(before, db)
+    after_time, new = best_time(after, db)
+    print(f"Rental report data from {rentals} rentals ({path}):")
+    print(f"  before: {before_time:8.3f} s  ({len(old[0])} open, {len(old[1])} overdue)")
+    print(f"  after:  {after_time:8.3f} s  ({len(new[0])} open, {len(new[1])} overdue)")
+    print(f"  speedup: {before_time / after_time:.1f}x")
+    db.close()
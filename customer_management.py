@@ -6,18 +6,33 @@ Handles all customer-related operations: Add, Update, Delete, Search
 import tkinter as tk
 from tkinter import ttk, messagebox
 from reports import ReportGenerator
+from async_db import AsyncDatabase, StatusBar, Debouncer
+import typeahead
+import pricing
+import rollups
+from pagination import KeysetPager, PagerBar, SortKey, NEXT, PREVIOUS, MORE
+from virtual_tree import VirtualTreeview, PagedList
 
 class CustomerManagement:
     """Customer Management GUI and Logic"""
     
+    # Customers as the list shows them; the list view and single-row refreshes add to the WHERE clause
+    CUSTOMER_QUERY = """
+        SELECT c.CustomerID, c.Title, c.FirstName, c.LastName, c.Phone, c.Email, c.CategoryID
+        FROM customer c
+        WHERE 1=1
+    """
+    
     def __init__(self, parent, db, back_callback=None):
         self.parent = parent
         self.db = db
         self.back_callback = back_callback
         self.selected_customer_id = None
+        self.categories = None
         
         # Setup UI
         self.setup_ui()
+        self.load_categories()
         self.load_customers()
     
     def setup_ui(self):
@@ -49,6 +64,11 @@ class CustomerManagement:
         )
         title_label.pack(side=tk.LEFT, expand=True)
         
+        # Status Bar - queries run on worker threads so the window stays responsive
+        self.status_bar = StatusBar(self.parent)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.async_db = AsyncDatabase(self.parent, self.status_bar)
+        
         # Main Container
         main_container = tk.Frame(self.parent, bg='#ecf0f1')
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -71,7 +91,8 @@ class CustomerManagement:
             ("First Name:", "first_name"),
             ("Last Name:", "last_name"),
             ("Phone:", "phone"),
-            ("Email:", "email")
+            ("Email:", "email"),
+            ("Member Category:", "category")
         ]
         
         self.entries = {}
@@ -95,6 +116,16 @@ class CustomerManagement:
                     state='readonly'
                 )
                 self.entries[field_name].grid(row=row, column=1, pady=8)
+            elif field_name == "category":
+                # Category dropdown, filled once the categories load
+                self.entries[field_name] = ttk.Combobox(
+                    left_panel,
+                    font=('Arial', 11),
+                    width=22,
+                    values=["None"],
+                    state='readonly'
+                )
+                self.entries[field_name].grid(row=row, column=1, pady=8)
             else:
                 self.entries[field_name] = tk.Entry(left_panel, font=('Arial', 11), width=25)
                 self.entries[field_name].grid(row=row, column=1, pady=8)
@@ -184,6 +215,12 @@ class CustomerManagement:
         self.search_id = tk.Entry(search_row, font=('Arial', 10), width=15)
         self.search_id.pack(side=tk.LEFT, padx=5)
         
+        # Search as you type
+        self.search_debouncer = Debouncer(search_frame, self.search_customers)
+        for entry in (self.search_name, self.search_id):
+            entry.bind('<KeyRelease>', self.search_debouncer.trigger)
+            entry.bind('<Return>', self.search_debouncer.flush)
+        
         # Search buttons
         search_btn_frame = tk.Frame(search_frame, bg='white')
         search_btn_frame.pack(pady=10)
@@ -195,7 +232,7 @@ class CustomerManagement:
             bg='#2196F3',
             fg='white',
             width=12,
-            command=self.search_customers,
+            command=self.search_debouncer.flush,
             cursor='hand2'
         ).pack(side=tk.LEFT, padx=5)
         
@@ -232,6 +269,16 @@ class CustomerManagement:
         )
         list_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Paging controls
+        self.pager_bar = PagerBar(
+            list_frame,
+            on_previous=lambda: self.customer_list.page(PREVIOUS),
+            on_next=lambda: self.customer_list.page(NEXT),
+            on_more=lambda: self.customer_list.page(MORE),
+            on_show_all=lambda: self.customer_list.reload()
+        )
+        self.pager_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # Treeview for customers
         tree_scroll_y = tk.Scrollbar(list_frame)
         tree_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
@@ -239,9 +286,9 @@ class CustomerManagement:
         tree_scroll_x = tk.Scrollbar(list_frame, orient=tk.HORIZONTAL)
         tree_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
         
-        self.customers_tree = ttk.Treeview(
+        self.customers_tree = VirtualTreeview(
             list_frame,
-            columns=("ID", "Title", "FirstName", "LastName", "Phone", "Email"),
+            columns=("ID", "Title", "FirstName", "LastName", "Phone", "Email", "Category"),
             show='headings',
             yscrollcommand=tree_scroll_y.set,
             xscrollcommand=tree_scroll_x.set,
@@ -258,6 +305,7 @@ class CustomerManagement:
         self.customers_tree.heading("LastName", text="Last Name")
         self.customers_tree.heading("Phone", text="Phone")
         self.customers_tree.heading("Email", text="Email")
+        self.customers_tree.heading("Category", text="Category")
         
         self.customers_tree.column("ID", width=60, anchor='center')
         self.customers_tree.column("Title", width=60, anchor='center')
@@ -265,35 +313,57 @@ class CustomerManagement:
         self.customers_tree.column("LastName", width=150)
         self.customers_tree.column("Phone", width=120, anchor='center')
         self.customers_tree.column("Email", width=200)
+        self.customers_tree.column("Category", width=80, anchor='center')
         
         self.customers_tree.pack(fill=tk.BOTH, expand=True)
         
         # Bind selection
         self.customers_tree.bind('<<TreeviewSelect>>', self.on_customer_select)
+        
+        # Shares the 'customers' channel so a newer load or search supersedes this one
+        self.customer_list = PagedList(
+            self.customers_tree, self.pager_bar, self.async_db, 'customers', 'customers', 'CustomerID',
+            self.customer_values, self.status_bar
+        )
+    
+    def load_categories(self):
+        """Load member categories (with discounts) into the dropdown"""
+        self.async_db.submit('categories', pricing.discounts, self.db, callback=self.show_categories)
+    
+    def show_categories(self, categories):
+        """Fill the category dropdown and name the categories in the list"""
+        self.categories = categories
+        self.entries['category']['values'] = ["None"] + categories.labels()
+        self.customers_tree.render()
+    
+    def category_entered(self):
+        """CategoryID chosen in the form (None for no category)"""
+        category = self.entries['category'].get()
+        if not category or category == "None":
+            return None
+        return int(category.split(' - ')[0])
     
     def load_customers(self):
-        """Load all customers into treeview"""
-        # Clear existing
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        
-        # Fetch customers
-        query = """
-            SELECT CustomerID, Title, FirstName, LastName, Phone, Email
-            FROM customer
-            ORDER BY CustomerID
-        """
-        customers = self.db.fetch_data(query)
-        
-        for customer in customers:
-            self.customers_tree.insert('', tk.END, values=(
-                customer['CustomerID'],
-                customer['Title'],
-                customer['FirstName'],
-                customer['LastName'],
-                customer['Phone'],
-                customer['Email']
-            ))
+        """Load the first page of customers into treeview"""
+        self.customer_list.show(
+            KeysetPager(self.db, self.CUSTOMER_QUERY, None, [SortKey('c.CustomerID', 'CustomerID', False)])
+        )
+    
+    def fetch_customer(self, customer_id):
+        """One customer as the list shows it, to patch the list after a write"""
+        return self.db.fetch_one(self.CUSTOMER_QUERY + " AND c.CustomerID = %s", (customer_id,))
+    
+    def customer_values(self, customer):
+        """Treeview values for a customer"""
+        return (
+            customer['CustomerID'],
+            customer['Title'],
+            customer['FirstName'],
+            customer['LastName'],
+            customer['Phone'],
+            customer['Email'],
+            self.categories.names.get(customer['CategoryID'], '') if self.categories else ''
+        )
     
     def clear_form(self):
         """Clear all form fields"""
@@ -322,6 +392,15 @@ class CustomerManagement:
             self.entries['phone'].insert(0, values[4])
             self.entries['email'].insert(0, values[5])
             
+            # Category from the row itself; the list only shows its name
+            index = self.customers_tree.selected_index()
+            customer = self.customers_tree.source.row(index) if index is not None else None
+            category_id = customer['CategoryID'] if customer else None
+            if category_id is not None and self.categories and category_id in self.categories.names:
+                self.entries['category'].set(self.categories.label(category_id))
+            else:
+                self.entries['category'].set("None")
+            
             self.selected_customer_id = values[0]
     
     def validate_phone(self, phone):
@@ -357,32 +436,38 @@ class CustomerManagement:
             messagebox.showerror("Error", "Invalid email format")
             return
         
-        # Get next customer ID
-        query = "SELECT COALESCE(MAX(CustomerID), 0) + 1 as NextID FROM customer"
-        result = self.db.fetch_one(query)
-        next_id = result['NextID']
-        
-        # Insert customer
+        # Insert customer; CustomerID is assigned by AUTO_INCREMENT
         query = """
-            INSERT INTO customer (CustomerID, Title, FirstName, LastName, Phone, Email)
+            INSERT INTO customer (Title, FirstName, LastName, Phone, Email, CategoryID)
             VALUES (%s, %s, %s, %s, %s, %s)
         """
         params = (
-            next_id,
             self.entries['title'].get(),
             self.entries['first_name'].get().strip(),
             self.entries['last_name'].get().strip(),
             phone,
-            email
+            email,
+            self.category_entered()
         )
         
-        if self.db.execute_query(query, params):
+        customer_id = self.db.execute_insert(query, params)
+        if customer_id is not None:
+            typeahead.record_write(self.db, 'customer', customer_id, self.index_row(customer_id))
             messagebox.showinfo("Success", "Customer added successfully!")
             self.clear_form()
-            self.load_customers()
+            self.customer_list.upsert(self.fetch_customer(customer_id))
         else:
             messagebox.showerror("Error", "Failed to add customer")
     
+    def index_row(self, customer_id):
+        """Form values in the shape the typeahead index expects"""
+        return {
+            'CustomerID': customer_id,
+            'FirstName': self.entries['first_name'].get().strip(),
+            'LastName': self.entries['last_name'].get().strip(),
+            'Phone': self.entries['phone'].get().strip()
+        }
+    
     def update_customer(self):
         """Update existing customer"""
         if not self.selected_customer_id:
@@ -411,7 +496,7 @@ class CustomerManagement:
         # Update customer
         query = """
             UPDATE customer 
-            SET Title = %s, FirstName = %s, LastName = %s, Phone = %s, Email = %s
+            SET Title = %s, FirstName = %s, LastName = %s, Phone = %s, Email = %s, CategoryID = %s
             WHERE CustomerID = %s
         """
         params = (
@@ -420,13 +505,16 @@ class CustomerManagement:
             self.entries['last_name'].get().strip(),
             phone,
             email,
+            self.category_entered(),
             self.selected_customer_id
         )
         
         if self.db.execute_query(query, params):
+            customer_id = int(self.selected_customer_id)
+            typeahead.record_write(self.db, 'customer', customer_id, self.index_row(customer_id))
             messagebox.showinfo("Success", "Customer updated successfully!")
             self.clear_form()
-            self.load_customers()
+            self.customer_list.upsert(self.fetch_customer(customer_id))
         else:
             messagebox.showerror("Error", "Failed to update customer")
     
@@ -450,60 +538,62 @@ class CustomerManagement:
         # Confirm deletion
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this customer?"):
             query = "DELETE FROM customer WHERE CustomerID = %s"
-            if self.db.execute_query(query, (self.selected_customer_id,)):
+            customer_id = int(self.selected_customer_id)
+            # Its rollup row goes with it
+            with self.db.transaction() as txn:
+                rollups.forget(self.db, 'rollup_customer', (customer_id,))
+                self.db.execute_query(query, (customer_id,))
+            if txn.committed:
+                typeahead.record_write(self.db, 'customer', customer_id)
                 messagebox.showinfo("Success", "Customer deleted successfully!")
                 self.clear_form()
-                self.load_customers()
+                self.customer_list.remove(customer_id)
             else:
                 messagebox.showerror("Error", "Failed to delete customer")
     
     def search_customers(self):
         """Search customers based on filters"""
-        # Clear existing
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
+        try:
+            customer_id = int(self.search_id.get()) if self.search_id.get().strip() else None
+        except ValueError:
+            self.status_bar.set_message("Customer ID must be a number")
+            return
         
         # Build query
         query = """
-            SELECT CustomerID, Title, FirstName, LastName, Phone, Email
-            FROM customer
-            WHERE 1=1
+            SELECT c.CustomerID, c.Title, c.FirstName, c.LastName, c.Phone, c.Email, c.CategoryID
         """
         params = []
-        
-        # Name filter (search in both first and last name)
-        if self.search_name.get().strip():
-            query += " AND (FirstName LIKE %s OR LastName LIKE %s)"
-            search_term = f"%{self.search_name.get().strip()}%"
-            params.extend([search_term, search_term])
+        order = [SortKey('c.CustomerID', 'CustomerID', False)]
+        
+        # Name filter - full-text search over first and last name, best matches first
+        match = self.db.fulltext('customer', 'c', self.search_name.get())
+        if match:
+            query += f", {match.score} AS Relevance"
+            params.extend(match.rank_params)
+            order.insert(0, SortKey(match.score, 'Relevance', match.descending, match.rank_params))
+        query += " FROM customer c"
+        if match:
+            query += f" {match.join} WHERE {match.condition}"
+            params.extend(match.params)
+        else:
+            query += " WHERE 1=1"
         
         # ID filter
-        if self.search_id.get().strip():
-            query += " AND CustomerID = %s"
-            params.append(int(self.search_id.get()))
-        
-        query += " ORDER BY CustomerID"
-        
-        customers = self.db.fetch_data(query, params if params else None)
-        
-        for customer in customers:
-            self.customers_tree.insert('', tk.END, values=(
-                customer['CustomerID'],
-                customer['Title'],
-                customer['FirstName'],
-                customer['LastName'],
-                customer['Phone'],
-                customer['Email']
-            ))
+        if customer_id is not None:
+            query += " AND c.CustomerID = %s"
+            params.append(customer_id)
         
-        messagebox.showinfo("Search", f"Found {len(customers)} customers")
+        # Paging continues within the search results; a newer keystroke supersedes this one
+        self.customer_list.show(KeysetPager(self.db, query, params, order, replica=True, cached=True), filtered=True)
     
     def reset_search(self):
         """Reset search filters and reload all customers"""
+        self.search_debouncer.cancel()
         self.search_name.delete(0, tk.END)
         self.search_id.delete(0, tk.END)
         self.load_customers()
     
     def generate_report(self):
         """Generate customer report"""
-        ReportGenerator.generate_customer_report(self.db)
+        ReportGenerator.generate_customer_report(self.db, self.async_db)
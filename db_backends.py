@@ -0,0 +1,453 @@
+"""
+Database Backends Module
+Storage engines behind DatabaseConfig: MySQL server or an embedded SQLite file
+"""
+
+import os
+import re
+import sqlite3
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+SCHEMA_DUMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MovieRental_MYSQL.sql')
+
+# Full-text indexed tables: key column and indexed text columns (see migration 3)
+FULLTEXT_INDEXES = {
+    'movies': ('MovieID', ('Title',)),
+    'customer': ('CustomerID', ('FirstName', 'LastName'))
+}
+
+# DDL that MySQL commits implicitly, with the information_schema query that
+# finds what the statement creates (see MySQLBackend.schema_change_check)
+MYSQL_DDL_CHECKS = [
+    (re.compile(r"ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)", re.I),
+     "SELECT 1 FROM information_schema.COLUMNS"
+     " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s"),
+    (re.compile(r"ALTER\s+TABLE\s+(\w+)\s+ADD\s+(?:FULLTEXT\s+)?INDEX\s+(\w+)", re.I),
+     "SELECT 1 FROM information_schema.STATISTICS"
+     " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1"),
+    (re.compile(r"ALTER\s+TABLE\s+(\w+)\s+ADD\s+CONSTRAINT\s+(\w+)", re.I),
+     "SELECT 1 FROM information_schema.TABLE_CONSTRAINTS"
+     " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = %s"),
+    (re.compile(r"CREATE\s+INDEX\s+(\w+)\s+ON\s+(\w+)", re.I),
+     "SELECT 1 FROM information_schema.STATISTICS"
+     " WHERE TABLE_SCHEMA = DATABASE() AND INDEX_NAME = %s AND TABLE_NAME = %s LIMIT 1"),
+    (re.compile(r"CREATE\s+TABLE\s+(\w+)", re.I),
+     "SELECT 1 FROM information_schema.TABLES"
+     " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+]
+
+
+# Relevance scores are floats; they are scaled and rounded to integers so the
+# value read back from a page compares exactly when keyset paging seeks past it
+SCORE_SCALE = 1000000
+
+
+class FullTextMatch(namedtuple('FullTextMatch', ['join', 'condition', 'score', 'descending', 'params', 'rank_params'])):
+    """SQL fragments of a full-text search; each uses %s placeholders for its params
+    
+    score (with rank_params) measures relevance as an integer (see
+    SCORE_SCALE), so it can be a keyset paging sort key; descending says
+    whether higher scores are better.
+    """
+    
+    __slots__ = ()
+    
+    @property
+    def rank(self):
+        """ORDER BY fragment putting the best matches first"""
+        return f"{self.score} DESC" if self.descending else self.score
+
+
+class DatabaseBackend:
+    """Common interface for the storage engines used by DatabaseConfig"""
+    
+    name = None
+    Error = Exception
+    
+    def connect(self):
+        """Open a new connection (None on failure)"""
+        raise NotImplementedError
+    
+    def ping(self, connection):
+        """True when the connection is still usable"""
+        raise NotImplementedError
+    
+    def close(self, connection):
+        """Close a connection, ignoring errors from dead sockets"""
+        try:
+            connection.close()
+        except self.Error:
+            pass
+    
+    def cursor(self, connection, dictionary=False):
+        """Open a cursor returning dict rows when dictionary=True"""
+        raise NotImplementedError
+    
+    def begin(self, connection):
+        """Start an explicit transaction on an autocommit connection"""
+        raise NotImplementedError
+    
+    def begin_snapshot(self, connection):
+        """Start a read-only transaction whose reads all see the data as of now"""
+        raise NotImplementedError
+    
+    def stream_cursor(self, connection):
+        """Open a cursor that reads rows from the server as they are fetched"""
+        return connection.cursor()
+    
+    def unread_rows_block(self, connection):
+        """True when abandoning a streaming cursor leaves the connection unusable"""
+        return False
+    
+    def translate(self, query):
+        """Rewrite application SQL (MySQL dialect, %s placeholders) for this engine"""
+        return query
+    
+    def explain(self, query):
+        """Statement returning the execution plan of a query"""
+        return f"EXPLAIN {query}"
+    
+    def plan_problems(self, plan):
+        """Full table scans and sorts without an index in an explain() plan"""
+        return []
+    
+    def fulltext_match(self, table, alias, words):
+        """FullTextMatch for rows of `table` (aliased `alias`) containing all words as prefixes"""
+        raise NotImplementedError
+    
+    def upsert_add(self, table, keys, counters):
+        """INSERT of one row (keys then counters as %s params) that adds the
+        counters to the existing row when the key is already there"""
+        raise NotImplementedError
+    
+    def replication_lag(self, connection):
+        """Seconds a replica is behind its primary, or None when unknown"""
+        return None
+    
+    def schema_change_check(self, statement):
+        """(query, params) returning a row once a DDL statement has taken effect
+        
+        Only needed where DDL commits on its own, so a failed migration can
+        leave part of its statements applied; None runs the statement as usual.
+        """
+        return None
+    
+    def is_disconnect(self, error):
+        """True when an error means the connection itself is unusable"""
+        return False
+
+
+class MySQLBackend(DatabaseBackend):
+    """MySQL server through mysql-connector-python"""
+    
+    name = 'mysql'
+    
+    def __init__(self, host, database, user, password, port=3306, connect_timeout=10):
+        import mysql.connector
+        self.connector = mysql.connector
+        self.Error = mysql.connector.Error
+        
+        self.host = host
+        self.database = database
+        self.user = user
+        self.password = password
+        self.port = port
+        self.connect_timeout = connect_timeout
+    
+    def connect(self):
+        """Create database connection"""
+        try:
+            connection = self.connector.connect(
+                host=self.host,
+                port=self.port,
+                database=self.database,
+                user=self.user,
+                password=self.password,
+                connection_timeout=self.connect_timeout,
+                autocommit=True
+            )
+            if connection.is_connected():
+                return connection
+        except self.Error as e:
+            print(f"Error connecting to MySQL: {e}")
+            return None
+    
+    def ping(self, connection):
+        """Ping the server; False when the connection has gone away"""
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except self.Error:
+            return False
+    
+    def cursor(self, connection, dictionary=False):
+        """Open a cursor returning dict rows when dictionary=True"""
+        return connection.cursor(dictionary=dictionary)
+    
+    def begin(self, connection):
+        """Start an explicit transaction on an autocommit connection"""
+        connection.start_transaction()
+    
+    def begin_snapshot(self, connection):
+        """START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY (InnoDB repeatable read)"""
+        connection.start_transaction(consistent_snapshot=True, isolation_level='REPEATABLE READ', readonly=True)
+    
+    def stream_cursor(self, connection):
+        """Unbuffered cursor: rows stay on the server until fetched"""
+        return connection.cursor(buffered=False)
+    
+    def unread_rows_block(self, connection):
+        """Unread rows of an unbuffered result must be drained before reuse"""
+        return True
+    
+    def plan_problems(self, plan):
+        """Rows of an EXPLAIN with access type ALL or a filesort"""
+        problems = []
+        for row in plan:
+            table = row.get('table')
+            if row.get('type') == 'ALL':
+                problems.append(f"full scan of {table}")
+            if 'Using filesort' in (row.get('Extra') or ''):
+                problems.append(f"filesort on {table}")
+        return problems
+    
+    def fulltext_match(self, table, alias, words):
+        """MATCH ... AGAINST in boolean mode: every word required, prefix matched"""
+        columns = ', '.join(f"{alias}.{column}" for column in FULLTEXT_INDEXES[table][1])
+        match = f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+        score = f"CAST(ROUND({match} * {SCORE_SCALE}) AS SIGNED)"
+        expression = ' '.join(f"+{word}*" for word in words)
+        return FullTextMatch('', match, score, True, [expression], [expression])
+    
+    def upsert_add(self, table, keys, counters):
+        """INSERT ... ON DUPLICATE KEY UPDATE adding the new values"""
+        columns = keys + counters
+        placeholders = ', '.join(['%s'] * len(columns))
+        updates = ', '.join(f"{column} = {column} + VALUES({column})" for column in counters)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}"
+    
+    def replication_lag(self, connection):
+        """Seconds_Behind_Source of a replica
+        
+        None when the server is not a replica; infinite when replication
+        is configured but stopped.
+        """
+        cursor = connection.cursor(dictionary=True)
+        try:
+            for statement, column in (("SHOW REPLICA STATUS", 'Seconds_Behind_Source'),
+                                      ("SHOW SLAVE STATUS", 'Seconds_Behind_Master')):
+                try:
+                    cursor.execute(statement)
+                except self.Error:
+                    # Servers before 8.0.22 only know SHOW SLAVE STATUS
+                    continue
+                status = cursor.fetchone()
+                cursor.fetchall()
+                if not status:
+                    return None
+                lag = status.get(column)
+                return float('inf') if lag is None else lag
+            return None
+        finally:
+            cursor.close()
+    
+    def schema_change_check(self, statement):
+        """information_schema lookup of the column, index, constraint or table
+        a DDL statement creates (ALTER/CREATE commit implicitly on MySQL)"""
+        for pattern, query in MYSQL_DDL_CHECKS:
+            match = pattern.match(statement.strip())
+            if match:
+                return query, match.groups()
+        return None
+    
+    def is_disconnect(self, error):
+        """True when an error means the connection itself is unusable"""
+        errors = self.connector.errors
+        return isinstance(error, (errors.OperationalError, errors.InterfaceError))
+
+
+class SQLiteBackend(DatabaseBackend):
+    """Embedded SQLite file emulating the MySQL functions the app relies on"""
+    
+    name = 'sqlite'
+    Error = sqlite3.Error
+    
+    def __init__(self, path='movierental.db', schema_dump=SCHEMA_DUMP):
+        self.path = path
+        self.schema_dump = schema_dump
+        
+        sqlite3.register_adapter(date, date.isoformat)
+        sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+        sqlite3.register_adapter(Decimal, str)
+        sqlite3.register_converter('date', lambda value: date.fromisoformat(value.decode()[:10]))
+        sqlite3.register_converter('decimal', lambda value: Decimal(value.decode()))
+        
+        # A fresh file is populated from the MySQL dump on first use
+        if not os.path.exists(self.path):
+            connection = self.connect()
+            if connection is not None:
+                self.load_mysql_dump(connection, self.schema_dump)
+                connection.close()
+    
+    def connect(self):
+        """Open the database file with MySQL compatible functions registered"""
+        try:
+            connection = sqlite3.connect(
+                self.path,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            connection.create_function('CURDATE', 0, lambda: date.today().isoformat())
+            connection.create_function('DATEDIFF', 2, _datediff, deterministic=True)
+            connection.create_function('CONCAT', -1, _concat, deterministic=True)
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute("PRAGMA journal_mode = WAL")
+            return connection
+        except sqlite3.Error as e:
+            print(f"Error opening SQLite database: {e}")
+            return None
+    
+    def ping(self, connection):
+        """True when the connection is still usable"""
+        try:
+            connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def cursor(self, connection, dictionary=False):
+        """Open a cursor returning dict rows when dictionary=True"""
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return cursor
+    
+    def begin(self, connection):
+        """Start a write transaction (takes the write lock up front)"""
+        connection.execute("BEGIN IMMEDIATE")
+    
+    def begin_snapshot(self, connection):
+        """Deferred transaction pinned to the current WAL snapshot by a first read"""
+        connection.execute("BEGIN DEFERRED")
+        connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    
+    def translate(self, query):
+        """Swap MySQL %s placeholders for SQLite ? placeholders"""
+        return query.replace('%s', '?')
+    
+    def explain(self, query):
+        """Statement returning the execution plan of a query"""
+        return f"EXPLAIN QUERY PLAN {query}"
+    
+    def fulltext_match(self, table, alias, words):
+        """Join against the table's FTS5 index; every word required, prefix matched"""
+        key = FULLTEXT_INDEXES[table][0]
+        fts = f"{table}_fts"
+        expression = ' '.join(f'"{word}"*' for word in words)
+        return FullTextMatch(
+            f"JOIN {fts} ON {fts}.rowid = {alias}.{key}",
+            f"{fts} MATCH %s",
+            f"CAST(ROUND({fts}.rank * {SCORE_SCALE}) AS INTEGER)",
+            False,
+            [expression],
+            []
+        )
+    
+    def upsert_add(self, table, keys, counters):
+        """INSERT ... ON CONFLICT DO UPDATE adding the new values"""
+        columns = keys + counters
+        placeholders = ', '.join(['%s'] * len(columns))
+        updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in counters)
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+        )
+    
+    def plan_problems(self, plan):
+        """SCAN steps without an index and temporary sort b-trees"""
+        problems = []
+        for row in plan:
+            detail = row.get('detail') or ''
+            if detail.startswith('SCAN ') and ' USING ' not in detail:
+                problems.append(f"full scan of {detail[5:]}")
+            elif 'USE TEMP B-TREE' in detail:
+                problems.append(detail.lower())
+        return problems
+    
+    @staticmethod
+    def load_mysql_dump(connection, path):
+        """Create the schema and rows of a mysqldump file in SQLite"""
+        with open(path, encoding='utf-8') as f:
+            script = mysql_dump_to_sqlite(f.read())
+        connection.execute("PRAGMA foreign_keys = OFF")
+        connection.executescript(script)
+        connection.execute("PRAGMA foreign_keys = ON")
+
+
+def _datediff(first, second):
+    """MySQL DATEDIFF(): whole days from second to first"""
+    if first is None or second is None:
+        return None
+    return (_as_date(first) - _as_date(second)).days
+
+
+def _concat(*values):
+    """MySQL CONCAT(): NULL if any argument is NULL"""
+    if any(value is None for value in values):
+        return None
+    return ''.join(str(value) for value in values)
+
+
+def _as_date(value):
+    """Coerce an ISO string or date into a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _dict_row(cursor, row):
+    """Row factory matching mysql-connector dictionary cursors"""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def mysql_dump_to_sqlite(script):
+    """Translate the mysqldump schema file into SQLite statements"""
+    output = []
+    indexes = []
+    table = None
+    columns = []
+    
+    for line in script.splitlines():
+        stripped = line.strip()
+        if table is None:
+            if stripped.startswith(('CREATE DATABASE', 'USE ', 'LOCK TABLES', 'UNLOCK TABLES', '/*!', '--')):
+                continue
+            match = re.match(r'CREATE TABLE `(\w+)` \($', stripped)
+            if match:
+                table = match.group(1)
+                columns = []
+                continue
+            if stripped:
+                output.append(line)
+        elif stripped.startswith(')'):
+            # End of CREATE TABLE - drop the MySQL table options
+            output.append(f"CREATE TABLE `{table}` (\n  " + ",\n  ".join(columns) + "\n);")
+            table = None
+        else:
+            definition = stripped.rstrip(',')
+            match = re.match(r'(?:UNIQUE )?KEY `(\w+)` \((.+)\)$', definition)
+            if match:
+                unique = 'UNIQUE ' if definition.startswith('UNIQUE') else ''
+                indexes.append(f"CREATE {unique}INDEX IF NOT EXISTS `{table}_{match.group(1)}` "
+                               f"ON `{table}` ({match.group(2)});")
+                continue
+            definition = re.sub(r'\bint\(\d+\)', 'INTEGER', definition)
+            definition = definition.replace(' AUTO_INCREMENT', '')
+            columns.append(definition)
+    
+    return "\n".join(output + indexes) + "\n"
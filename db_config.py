@@ -2,96 +2,696 @@
 Database Configuration Module
 """
 
-import mysql.connector
-from mysql.connector import Error
+import functools
+import os
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
 import hashlib
+from db_backends import MySQLBackend, SQLiteBackend
+from query_cache import QueryCache, tables_written
+from query_profiler import QueryProfiler, find_caller
+
+
+def _instrumented(method):
+    """Time a DatabaseConfig call and report it to the query profiler"""
+    @functools.wraps(method)
+    def wrapper(self, query, params=None, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, query, params, *args, **kwargs)
+        self._local.rowcount = 0
+        started = time.perf_counter()
+        result = method(self, query, params, *args, **kwargs)
+        elapsed = time.perf_counter() - started
+        if isinstance(result, list):
+            rows = len(result)
+        elif isinstance(result, dict):
+            rows = 1
+        else:
+            rows = self._local.rowcount
+        # execute_many's parameter rows are far too large to keep as a sample
+        sample = None if method.__name__ == 'execute_many' else params
+        self.profiler.record(method.__name__, query, sample, elapsed, rows, find_caller())
+        return result
+    return wrapper
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable database connections"""
+    
+    def __init__(self, backend, pool_size=5, timeout=10):
+        self.backend = backend
+        self.pool_size = pool_size
+        self.timeout = timeout
+        
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._in_use = 0
+        self._stats = {'checkouts': 0, 'waits': 0, 'created': 0, 'reconnects': 0, 'discarded': 0}
+    
+    def acquire(self):
+        """Check out a healthy connection, opening or waiting for one if needed"""
+        connection = None
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._size < self.pool_size
+                if can_open:
+                    self._size += 1
+            if can_open:
+                connection = self._open()
+                if connection is None:
+                    return None
+            else:
+                # Pool exhausted - wait for another caller to release
+                with self._lock:
+                    self._stats['waits'] += 1
+                try:
+                    connection = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    print("Error: timed out waiting for a database connection")
+                    return None
+        
+        # Health check on every checkout: a server restart or wait_timeout kills
+        # connections however recently they were used
+        if not self.backend.ping(connection):
+            self.backend.close(connection)
+            connection = self._open()
+            if connection is None:
+                return None
+            with self._lock:
+                self._stats['reconnects'] += 1
+        
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._in_use += 1
+        return connection
+    
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or drop it if it is broken"""
+        with self._lock:
+            self._in_use -= 1
+        if discard:
+            self.backend.close(connection)
+            with self._lock:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            return
+        self._idle.put(connection)
+    
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.backend.close(connection)
+            with self._lock:
+                self._size -= 1
+    
+    def stats(self):
+        """Snapshot of pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['in_use'] = self._in_use
+        stats['idle'] = self._idle.qsize()
+        stats['max_size'] = self.pool_size
+        return stats
+    
+    def _open(self):
+        """Open a new connection, releasing the slot on failure"""
+        connection = self.backend.connect()
+        if connection is None:
+            with self._lock:
+                self._size -= 1
+            return None
+        with self._lock:
+            self._stats['created'] += 1
+        return connection
+
+
+class Transaction:
+    """Unit of work sharing one connection and a single commit"""
+    
+    def __init__(self, connection, state):
+        self.connection = connection
+        self.state = state
+        self.failed = connection is None
+        self.committed = False
+        self.written_tables = set()
+
 
 class DatabaseConfig:
     
-    def __init__(self):
+    def __init__(self, pool_size=5, pool_timeout=10, backend=None, cache_size=256, cache_ttl=60,
+                 slow_query_threshold=0.5, replica=None, replica_staleness=5, replica_max_lag=10,
+                 replica_retry=30):
         self.host = 'localhost'
         self.user = 'root'
         self.password = 'Sri@@jan1-1'
         self.database = 'movierental'
         
+        # Storage engine: 'mysql' (server) or 'sqlite' (local file)
+        self.engine = os.environ.get('MOVIERENTAL_BACKEND', 'mysql')
+        self.sqlite_path = os.environ.get('MOVIERENTAL_SQLITE_PATH', 'movierental.db')
+        self.backend = backend or self.create_backend()
+        
+        # Connections are reused across queries instead of connect-per-query
+        self.pool = ConnectionPool(self.backend, pool_size=pool_size, timeout=pool_timeout)
+        
+        # Optional read replica for report and search reads (connection(replica=True))
+        self.replica = replica or self.create_replica_backend()
+        self.replica_pool = None
+        if self.replica is not None:
+            self.replica_pool = ConnectionPool(self.replica, pool_size=pool_size, timeout=pool_timeout)
+        self.replica_staleness = replica_staleness
+        self.replica_max_lag = replica_max_lag
+        self.replica_retry = replica_retry
+        self.replica_lag_interval = 5
+        self._last_write = None
+        self._replica_down_until = 0.0
+        self._replica_lag_checked = 0.0
+        self.routing = {'replica_reads': 0, 'primary_fallbacks': 0, 'read_your_writes': 0}
+        
+        # Open transaction (if any) of each thread
+        self._local = threading.local()
+        
+        # Opt-in result cache for reference reads (fetch_data(..., cached=True))
+        self.cache = QueryCache(max_entries=cache_size, ttl=cache_ttl)
+        
+        # Timing of every call; slow SELECTs are logged with their EXPLAIN plan
+        self.profiler = QueryProfiler(slow_threshold=slow_query_threshold, explain=self.explain)
+    
+    def create_backend(self):
+        """Create the storage backend selected by self.engine"""
+        if self.engine == 'sqlite':
+            return SQLiteBackend(self.sqlite_path)
+        return MySQLBackend(self.host, self.database, self.user, self.password)
+    
+    def create_replica_backend(self):
+        """Replica named by MOVIERENTAL_REPLICA, or None
+        
+        The value is host[:port] of a MySQL replica, or the path of a second
+        SQLite file when the SQLite backend is selected.
+        """
+        location = os.environ.get('MOVIERENTAL_REPLICA')
+        if not location:
+            return None
+        if self.engine == 'sqlite':
+            return SQLiteBackend(location)
+        host, _, port = location.partition(':')
+        # Short connect timeout so a dead replica falls back to the primary quickly
+        return MySQLBackend(host, self.database, self.user, self.password, port=int(port or 3306),
+                            connect_timeout=3)
+    
     def get_connection(self):
         """Create database connection"""
+        return self.backend.connect()
+    
+    @contextmanager
+    def connection(self, replica=False):
+        """Borrow a pooled connection for the duration of a with-block
+        
+        With replica=True the read may be served by the read replica; the
+        primary is used instead inside a transaction, shortly after a write
+        (read-your-writes), or while the replica is down or lagging.
+        """
+        transaction = self.current_transaction()
+        if transaction is not None:
+            # Statements inside a transaction share its connection
+            yield transaction.connection, transaction.state
+            return
+        
+        pool = self.pool
+        connection = None
+        if replica and self.use_replica():
+            connection = self.acquire_replica()
+            if connection is not None:
+                pool = self.replica_pool
+            else:
+                self.routing['primary_fallbacks'] += 1
+        if connection is None:
+            connection = self.pool.acquire()
+        
+        state = {'discard': False}
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
-            if connection.is_connected():
-                return connection
-        except Error as e:
-            print(f"Error connecting to MySQL: {e}")
+            yield connection, state
+        finally:
+            if connection is not None:
+                pool.release(connection, discard=state['discard'])
+                if pool is self.replica_pool and state['discard']:
+                    self.mark_replica_down()
+    
+    def use_replica(self):
+        """True when a replica-eligible read may go to the replica now"""
+        if self.replica_pool is None:
+            return False
+        now = time.monotonic()
+        if now < self._replica_down_until:
+            self.routing['primary_fallbacks'] += 1
+            return False
+        if self._last_write is not None and now - self._last_write < self.replica_staleness:
+            # Our own recent writes may not have reached the replica yet
+            self.routing['read_your_writes'] += 1
+            return False
+        return True
+    
+    def acquire_replica(self):
+        """Replica connection that is fresh enough, or None to use the primary"""
+        connection = self.replica_pool.acquire()
+        if connection is None:
+            self.mark_replica_down()
             return None
+        
+        now = time.monotonic()
+        if now - self._replica_lag_checked >= self.replica_lag_interval:
+            self._replica_lag_checked = now
+            try:
+                lag = self.replica.replication_lag(connection)
+            except self.replica.Error as e:
+                print(f"Error checking replica lag: {e}")
+                self.replica_pool.release(connection, discard=True)
+                self.mark_replica_down()
+                return None
+            if lag is not None and lag > self.replica_max_lag:
+                print(f"Replica is {lag} seconds behind; reading from the primary")
+                self.replica_pool.release(connection)
+                self.mark_replica_down()
+                return None
+        
+        self.routing['replica_reads'] += 1
+        return connection
     
-    def execute_query(self, query, params=None):
-        """Execute INSERT, UPDATE, DELETE queries"""
-        connection = self.get_connection()
-        if connection:
+    def mark_replica_down(self):
+        """Send replica reads to the primary for the next replica_retry seconds"""
+        self._replica_down_until = time.monotonic() + self.replica_retry
+    
+    def _note_write(self, tables):
+        """Record a committed write: drop cached reads and pin reads to the primary"""
+        self._last_write = time.monotonic()
+        self.cache.invalidate(tables)
+    
+    def current_transaction(self):
+        """Transaction open on the calling thread, or None"""
+        return getattr(self._local, 'transaction', None)
+    
+    @contextmanager
+    def transaction(self):
+        """Run several statements on one connection with a single commit
+        
+        Usage:
+            with db.transaction() as txn:
+                db.execute_query(...)
+                db.execute_query(...)
+            if txn.committed: ...
+        
+        A failed statement marks the transaction failed and everything is
+        rolled back on exit. An exception raised in the block rolls back and
+        propagates. Nested calls join the outer transaction.
+        """
+        outer = self.current_transaction()
+        if outer is not None:
+            yield outer
+            return
+        
+        with self.connection() as (connection, state):
+            transaction = Transaction(connection, state)
             try:
-                cursor = connection.cursor()
+                if connection is not None:
+                    self.backend.begin(connection)
+            except self.backend.Error as e:
+                print(f"Error starting transaction: {e}")
+                transaction.failed = True
+                state['discard'] = self.backend.is_disconnect(e)
+            
+            self._local.transaction = transaction
+            try:
+                try:
+                    yield transaction
+                except BaseException as e:
+                    transaction.failed = True
+                    if isinstance(e, self.backend.Error) and self.backend.is_disconnect(e):
+                        state['discard'] = True
+                    self._rollback(connection, state)
+                    raise
+                
+                if transaction.failed:
+                    self._rollback(connection, state)
+                    return
+                try:
+                    connection.commit()
+                except self.backend.Error as e:
+                    print(f"Error committing transaction: {e}")
+                    transaction.failed = True
+                    state['discard'] = self.backend.is_disconnect(e)
+                    self._rollback(connection, state)
+                    return
+                transaction.committed = True
+                self._note_write(transaction.written_tables)
+            finally:
+                self._local.transaction = None
+    
+    def _rollback(self, connection, state):
+        """Roll back a transaction's connection; one that can't be rolled back is discarded"""
+        if connection is None or state['discard']:
+            return
+        try:
+            connection.rollback()
+        except self.backend.Error as e:
+            print(f"Error rolling back transaction: {e}")
+            state['discard'] = True
+    
+    @contextmanager
+    def snapshot(self, replica=False):
+        """Read-only transaction on one consistent snapshot of the database
+        
+        Usage:
+            with db.snapshot(replica=True):
+                movies = db.fetch_data(...)
+                rentals = db.fetch_data(...)
+        
+        Every read on the calling thread inside the block sees the data as it
+        was when the block started, whatever other connections commit
+        meanwhile. Nothing is committed; the transaction is rolled back on
+        exit. Inside an open transaction the reads join it.
+        """
+        outer = self.current_transaction()
+        if outer is not None:
+            yield outer
+            return
+        
+        with self.connection(replica) as (connection, state):
+            transaction = Transaction(connection, state)
+            try:
+                if connection is not None:
+                    self.backend.begin_snapshot(connection)
+            except self.backend.Error as e:
+                print(f"Error starting snapshot: {e}")
+                transaction.failed = True
+                state['discard'] = self.backend.is_disconnect(e)
+            
+            self._local.transaction = transaction
+            try:
+                yield transaction
+            finally:
+                self._local.transaction = None
+                if connection is not None and not state['discard']:
+                    try:
+                        connection.rollback()
+                    except self.backend.Error:
+                        state['discard'] = True
+    
+    def fulltext(self, table, alias, term):
+        """Full-text search fragments for `term` on movies or customer (None if no words)
+        
+        Usage:
+            match = db.fulltext('movies', 'm', 'star wa')
+            query = f"SELECT ... FROM movies m {match.join} WHERE {match.condition} ORDER BY {match.rank}"
+            params = match.params + match.rank_params
+        """
+        words = re.findall(r'\w+', term)
+        if not words:
+            return None
+        return self.backend.fulltext_match(table, alias, words)
+    
+    def explain(self, query, params=None):
+        """Execution plan of a SELECT as a list of dict rows"""
+        with self.connection() as (connection, state):
+            if not connection:
+                return []
+            cursor = None
+            try:
+                cursor = self.backend.cursor(connection, dictionary=True)
+                statement = self.backend.translate(self.backend.explain(query))
                 if params:
-                    cursor.execute(query, params)
+                    cursor.execute(statement, params)
                 else:
-                    cursor.execute(query)
-                connection.commit()
-                return True
-            except Error as e:
-                print(f"Error executing query: {e}")
-                connection.rollback()
-                return False
+                    cursor.execute(statement)
+                return cursor.fetchall()
+            except self.backend.Error as e:
+                print(f"Error explaining query: {e}")
+                state['discard'] = self.backend.is_disconnect(e)
+                return []
             finally:
-                if connection.is_connected():
+                if cursor is not None and not state['discard']:
                     cursor.close()
-                    connection.close()
+    
+    def dump_query_profile(self, path=None):
+        """Write this session's query timings to a JSON file and return its name
+        
+        The EXPLAIN plans queued for slow SELECTs are read first, on a pooled
+        connection of their own (skipped inside a transaction).
+        """
+        if self.profiler is None:
+            return None
+        if self.current_transaction() is None:
+            self.profiler.explain_pending()
+        return self.profiler.dump(path, extra={
+            'engine': self.backend.name,
+            'pool': self.pool_stats(),
+            'replica': self.replica_stats(),
+            'cache': self.cache_stats()
+        })
+    
+    def cache_stats(self):
+        """Query cache statistics (hits, misses, entries, ...)"""
+        return self.cache.stats()
+    
+    def pool_stats(self):
+        """Connection pool statistics (checkouts, waits, size, ...)"""
+        return self.pool.stats()
+    
+    def replica_stats(self):
+        """Read routing counters and replica pool statistics (None without a replica)"""
+        if self.replica_pool is None:
+            return None
+        stats = dict(self.routing)
+        stats['pool'] = self.replica_pool.stats()
+        return stats
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close_all()
+        if self.replica_pool is not None:
+            self.replica_pool.close_all()
+    
+    @_instrumented
+    def execute_query(self, query, params=None):
+        """Execute INSERT, UPDATE, DELETE queries"""
+        transaction = self.current_transaction()
+        if transaction is not None and transaction.failed:
+            return False
+        
+        with self.connection() as (connection, state):
+            if connection:
+                cursor = None
+                try:
+                    cursor = self.backend.cursor(connection)
+                    if params:
+                        cursor.execute(self.backend.translate(query), params)
+                    else:
+                        cursor.execute(self.backend.translate(query))
+                    self._local.rowcount = cursor.rowcount
+                    self._local.lastrowid = cursor.lastrowid
+                    if transaction is None:
+                        connection.commit()
+                        self._note_write(tables_written(query))
+                    else:
+                        transaction.written_tables |= tables_written(query)
+                    return True
+                except self.backend.Error as e:
+                    print(f"Error executing query: {e}")
+                    state['discard'] = self.backend.is_disconnect(e)
+                    if transaction is not None:
+                        transaction.failed = True
+                    elif not state['discard']:
+                        connection.rollback()
+                    return False
+                finally:
+                    if cursor is not None and not state['discard']:
+                        cursor.close()
         return False
     
-    def fetch_data(self, query, params=None):
-        """Execute SELECT query"""
-        connection = self.get_connection()
-        if connection:
+    def execute_insert(self, query, params=None):
+        """Execute an INSERT and return the AUTO_INCREMENT id it generated
+        
+        The id comes back with the statement itself, so there is no
+        separate MAX()+1 lookup to race against. Returns None on failure.
+        """
+        self._local.lastrowid = None
+        if self.execute_query(query, params):
+            return self._local.lastrowid
+        return None
+    
+    def execute_update(self, query, params=None):
+        """Execute an UPDATE/DELETE and return the number of rows it changed
+        
+        Lets a conditional UPDATE act as a check-and-set, e.g. claiming a
+        copy only while one is in stock. Returns None on failure.
+        """
+        self._local.rowcount = 0
+        if self.execute_query(query, params):
+            return self._local.rowcount
+        return None
+    
+    @_instrumented
+    def execute_many(self, query, rows, batch_size=1000):
+        """Execute one INSERT/UPDATE for many parameter rows in batches
+        
+        All batches share one connection and one commit (or join the
+        caller's transaction).
+        """
+        rows = list(rows)
+        if not rows:
+            return True
+        
+        outer = self.current_transaction()
+        with self.transaction() as transaction:
+            if transaction.failed:
+                return False
+            connection = transaction.connection
+            cursor = None
             try:
-                cursor = connection.cursor(dictionary=True)
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                result = cursor.fetchall()
-                return result
-            except Error as e:
-                print(f"Error fetching data: {e}")
-                return []
+                cursor = self.backend.cursor(connection)
+                statement = self.backend.translate(query)
+                self._local.rowcount = 0
+                for start in range(0, len(rows), batch_size):
+                    cursor.executemany(statement, rows[start:start + batch_size])
+                    self._local.rowcount += max(cursor.rowcount, 0)
+                transaction.written_tables |= tables_written(query)
+            except self.backend.Error as e:
+                print(f"Error executing batch: {e}")
+                transaction.state['discard'] = self.backend.is_disconnect(e)
+                transaction.failed = True
             finally:
-                if connection.is_connected():
+                if cursor is not None and not transaction.state['discard']:
                     cursor.close()
-                    connection.close()
+        if outer is not None:
+            return not transaction.failed
+        return transaction.committed
+    
+    @_instrumented
+    def fetch_data(self, query, params=None, cached=False, replica=False):
+        """Execute SELECT query
+        
+        With cached=True the rows may be served from the query cache; they
+        are dropped automatically when a write touches a table the query reads.
+        replica=True lets the read go to the read replica (see connection()).
+        """
+        use_cache = cached and self.current_transaction() is None
+        if use_cache:
+            rows = self.cache.get(query, params)
+            if rows is not None:
+                return rows
+            generation = self.cache.generation
+        
+        with self.connection(replica) as (connection, state):
+            if connection:
+                cursor = None
+                try:
+                    cursor = self.backend.cursor(connection, dictionary=True)
+                    if params:
+                        cursor.execute(self.backend.translate(query), params)
+                    else:
+                        cursor.execute(self.backend.translate(query))
+                    result = cursor.fetchall()
+                    if use_cache:
+                        self.cache.put(query, params, result, generation)
+                    return result
+                except self.backend.Error as e:
+                    print(f"Error fetching data: {e}")
+                    state['discard'] = self.backend.is_disconnect(e)
+                    return []
+                finally:
+                    if cursor is not None and not state['discard']:
+                        cursor.close()
         return []
     
+    @_instrumented
     def fetch_one(self, query, params=None):
         """Fetch single row"""
-        connection = self.get_connection()
-        if connection:
+        with self.connection() as (connection, state):
+            if connection:
+                cursor = None
+                try:
+                    cursor = self.backend.cursor(connection, dictionary=True)
+                    if params:
+                        cursor.execute(self.backend.translate(query), params)
+                    else:
+                        cursor.execute(self.backend.translate(query))
+                    result = cursor.fetchone()
+                    # Drain any remaining rows so the connection can be reused
+                    cursor.fetchall()
+                    return result
+                except self.backend.Error as e:
+                    print(f"Error fetching data: {e}")
+                    state['discard'] = self.backend.is_disconnect(e)
+                    return None
+                finally:
+                    if cursor is not None and not state['discard']:
+                        cursor.close()
+        return None
+    
+    def fetch_chunks(self, query, params=None, size=1000, row_format='dict', replica=False):
+        """Yield lists of up to `size` rows from a streaming (unbuffered) cursor
+        
+        row_format is 'dict', 'tuple' or 'namedtuple'. Only one chunk is held
+        in memory at a time, so large result sets run in bounded memory.
+        replica=True lets the read go to the read replica (see connection()).
+        """
+        transaction = self.current_transaction()
+        caller = find_caller() if self.profiler is not None else None
+        elapsed = 0.0
+        row_count = 0
+        with self.connection(replica) as (connection, state):
+            if not connection:
+                return
+            cursor = None
+            exhausted = False
             try:
-                cursor = connection.cursor(dictionary=True)
+                # Only time spent in the database is counted, not the consumer's
+                started = time.perf_counter()
+                cursor = self.backend.stream_cursor(connection)
                 if params:
-                    cursor.execute(query, params)
+                    cursor.execute(self.backend.translate(query), params)
                 else:
-                    cursor.execute(query)
-                result = cursor.fetchone()
-                return result
-            except Error as e:
+                    cursor.execute(self.backend.translate(query))
+                make_row = _row_maker([column[0] for column in cursor.description], row_format)
+                while True:
+                    rows = cursor.fetchmany(size)
+                    elapsed += time.perf_counter() - started
+                    if not rows:
+                        exhausted = True
+                        break
+                    row_count += len(rows)
+                    yield [make_row(row) for row in rows]
+                    started = time.perf_counter()
+            except self.backend.Error as e:
                 print(f"Error fetching data: {e}")
-                return None
+                state['discard'] = self.backend.is_disconnect(e)
             finally:
-                if connection.is_connected():
+                if cursor is not None and not exhausted and not state['discard']:
+                    # Abandoned mid-stream: unread rows would block the connection
+                    if transaction is not None:
+                        cursor.fetchall()
+                    else:
+                        state['discard'] = self.backend.unread_rows_block(connection)
+                if cursor is not None and not state['discard']:
                     cursor.close()
-                    connection.close()
-        return None
+                if caller is not None:
+                    self.profiler.record('fetch_chunks', query, params, elapsed, row_count, caller)
+    
+    def fetch_iter(self, query, params=None, row_format='dict', chunk_size=1000, replica=False):
+        """Iterate over a SELECT one row at a time (see fetch_chunks)"""
+        for chunk in self.fetch_chunks(query, params, size=chunk_size, row_format=row_format, replica=replica):
+            yield from chunk
     
     @staticmethod
     def hash_password(password):
@@ -111,3 +711,15 @@ class DatabaseConfig:
             result = self.fetch_one(query, (employee_id, password))
         
         return result is not None, result
+
+
+def _row_maker(columns, row_format):
+    """Build a function converting raw cursor tuples into the requested row type"""
+    if row_format == 'tuple':
+        return tuple
+    if row_format == 'namedtuple':
+        row_type = namedtuple('Row', columns, rename=True)
+        return lambda row: row_type(*row)
+    if row_format == 'dict':
+        return lambda row: dict(zip(columns, row))
+    raise ValueError(f"Unknown row format: {row_format}")
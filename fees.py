@@ -0,0 +1,119 @@
+"""
+Fees Module
+Late fee and rental status rules, applied to whole batches of rentals with
+NumPy date arithmetic and available as SQL fragments for report queries
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+
+LATE_FEE_PER_DAY = 2.0
+
+ACTIVE, OVERDUE, RETURNED = "Active", "Overdue", "Returned"
+STATUSES = np.array([ACTIVE, OVERDUE, RETURNED])
+
+
+# Day numbers of datetime64[D]: days since 1970-01-01, with NaT as the smallest int64
+_EPOCH = date(1970, 1, 1).toordinal()
+_NAT = np.iinfo(np.int64).min
+
+
+def as_days(values):
+    """datetime64[D] array from dates, ISO strings or None (NaT)
+    
+    Dates go through their ordinals, which is many times faster than
+    letting NumPy convert date objects one by one.
+    """
+    if getattr(values, 'dtype', None) is not None and values.dtype.kind == 'M':
+        return np.asarray(values).astype('datetime64[D]')
+    values = list(values)
+    try:
+        ordinals = np.fromiter(
+            (_NAT if value is None else value.toordinal() - _EPOCH for value in values),
+            np.int64,
+            len(values)
+        )
+    except (AttributeError, ValueError):
+        # ISO strings, pandas NaT/NaN - the slow path
+        ordinals = np.fromiter((_day_number(value) for value in values), np.int64, len(values))
+    return ordinals.view('datetime64[D]')
+
+
+def _day_number(value):
+    """Day number of one date-like value (_NAT when missing)"""
+    if value is None or value != value:
+        return _NAT
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return value.toordinal() - _EPOCH
+
+
+def assess(due_dates, return_dates, today=None):
+    """Status, days late and late fee for a batch of rentals
+    
+    An open rental is late by the days since it was due (today); a returned
+    one by the days between due and return dates. Returns three arrays:
+    status names, days late and fees.
+    """
+    due = as_days(due_dates)
+    returned_on = as_days(return_dates)
+    today = np.datetime64(today or date.today(), 'D')
+    
+    returned = ~np.isnat(returned_on)
+    end = np.where(returned, returned_on, today)
+    late_days = np.maximum((end - due).astype(np.int64), 0)
+    codes = np.where(returned, 2, np.where(late_days > 0, 1, 0))
+    return STATUSES[codes], late_days, late_days * LATE_FEE_PER_DAY
+
+
+def assess_one(due_date, return_date=None, today=None):
+    """(status, days late, late fee) of a single rental"""
+    statuses, late_days, late_fees = assess([due_date], [return_date], today)
+    return str(statuses[0]), int(late_days[0]), float(late_fees[0])
+
+
+def annotate(rows, today=None):
+    """Add Status, DaysLate and LateFee to rental rows (with dueDate and ReturnDate); returns rows"""
+    if not rows:
+        return rows
+    statuses, late_days, late_fees = assess(
+        [row['dueDate'] for row in rows],
+        [row['ReturnDate'] for row in rows],
+        today
+    )
+    for row, status, days, fee in zip(rows, statuses.tolist(), late_days.tolist(), late_fees.tolist()):
+        row['Status'] = status
+        row['DaysLate'] = days
+        row['LateFee'] = fee
+    return rows
+
+
+def sql_status_condition(status, due='i.dueDate', returned='i.ReturnDate'):
+    """SQL condition selecting rentals in a status, written so indexes on the date columns apply"""
+    if status == RETURNED:
+        return f"{returned} IS NOT NULL"
+    if status == OVERDUE:
+        return f"{returned} IS NULL AND {due} < CURDATE()"
+    return f"{returned} IS NULL AND {due} >= CURDATE()"
+
+
+def sql_days_late(due='i.dueDate', returned='i.ReturnDate'):
+    """SQL expression for days late, by the same rule as assess()"""
+    days = f"DATEDIFF(COALESCE({returned}, CURDATE()), {due})"
+    return f"(CASE WHEN {days} > 0 THEN {days} ELSE 0 END)"
+
+
+def sql_late_fee(due='i.dueDate', returned='i.ReturnDate'):
+    """SQL expression for the late fee, by the same rule as assess()"""
+    return f"({sql_days_late(due, returned)} * {LATE_FEE_PER_DAY})"
+
+
+def sql_status(due='i.dueDate', returned='i.ReturnDate'):
+    """SQL expression for the rental status name, by the same rule as assess()"""
+    return (
+        f"(CASE WHEN {returned} IS NOT NULL THEN '{RETURNED}' "
+        f"WHEN {due} < CURDATE() THEN '{OVERDUE}' ELSE '{ACTIVE}' END)"
+    )
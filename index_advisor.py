@@ -0,0 +1,149 @@
+"""
+Index Advisor Module
+Replays the application's query shapes under EXPLAIN and reports full scans
+
+Usage:
+    python index_advisor.py                                  # built-in query catalog
+    python index_advisor.py logs/Query_Profile_<ts>.json     # queries captured by the profiler
+"""
+
+import json
+import sys
+
+# Hot query shapes of the screens and reports, with representative parameters
+QUERY_CATALOG = [
+    ("MovieManagement.load_movies", """
+        SELECT m.MovieID, m.Title, m.ReleaseYear, m.Genre, m.RentalPrice, p.Name as ProducerName
+        FROM movies m
+        LEFT JOIN producers p ON m.ProducerID = p.ProducerID
+        WHERE 1=1
+        ORDER BY m.MovieID ASC LIMIT 101
+    """, None),
+    ("MovieManagement.search_movies (genre)", """
+        SELECT m.MovieID, m.Title, m.ReleaseYear, m.Genre, m.RentalPrice, p.Name as ProducerName
+        FROM movies m
+        LEFT JOIN producers p ON m.ProducerID = p.ProducerID
+        WHERE 1=1 AND m.Genre = %s
+        ORDER BY m.MovieID ASC LIMIT 101
+    """, ("Action",)),
+    ("MovieManagement.delete_movie", """
+        SELECT OpenRentals FROM movies WHERE MovieID = %s
+    """, (1,)),
+    ("CustomerManagement.delete_customer", """
+        SELECT COUNT(*) as count FROM issuetran WHERE CustomerID = %s AND ReturnDate IS NULL
+    """, (1,)),
+    ("RentalManagement.load_customers_for_rental", """
+        SELECT CustomerID, FirstName, LastName FROM customer ORDER BY FirstName
+    """, None),
+    ("RentalManagement.load_movies_for_rental", """
+        SELECT MovieID, Copies, OpenRentals FROM movies
+    """, None),
+    ("RentalManagement.load_active_rentals", """
+        SELECT i.IssueID, c.FirstName, c.LastName, m.Title, i.IssueDate, i.dueDate
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE i.ReturnDate IS NULL
+        ORDER BY i.IssueDate
+    """, None),
+    ("RentalManagement.load_rentals (next page)", """
+        SELECT i.IssueID, CONCAT(c.FirstName, ' ', c.LastName) as Customer, m.Title as Movie,
+               i.IssueDate, i.dueDate, i.ReturnDate
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE 1=1 AND i.IssueDate <= %s AND (i.IssueDate < %s OR (i.IssueDate = %s AND i.IssueID < %s))
+        ORDER BY i.IssueDate DESC, i.IssueID DESC LIMIT 101
+    """, ("2024-01-15", "2024-01-15", "2024-01-15", 500)),
+    ("RentalManagement.search_rentals (issue date)", """
+        SELECT i.IssueID, CONCAT(c.FirstName, ' ', c.LastName) as Customer, m.Title as Movie,
+               i.IssueDate, i.dueDate, i.ReturnDate
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE 1=1 AND i.IssueDate = %s
+        ORDER BY i.IssueDate DESC, i.IssueID DESC LIMIT 101
+    """, ("2024-01-15",)),
+    ("RentalManagement.search_rentals (overdue)", """
+        SELECT i.IssueID, CONCAT(c.FirstName, ' ', c.LastName) as Customer, m.Title as Movie,
+               i.IssueDate, i.dueDate, i.ReturnDate
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE 1=1 AND i.ReturnDate IS NULL AND i.dueDate < CURDATE()
+        ORDER BY i.IssueDate DESC, i.IssueID DESC LIMIT 101
+    """, None),
+    ("ReportGenerator.generate_rental_report (currently rented)", """
+        SELECT i.IssueID, CONCAT(c.FirstName, ' ', c.LastName) as CustomerName, c.Phone,
+               m.Title as MovieTitle, m.Genre, i.IssueDate, i.dueDate
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE i.ReturnDate IS NULL
+        ORDER BY i.dueDate
+    """, None),
+    ("ReportGenerator.generate_rental_report (overdue)", """
+        SELECT i.IssueID, CONCAT(c.FirstName, ' ', c.LastName) as CustomerName, c.Phone, c.Email,
+               m.Title as MovieTitle, i.IssueDate, i.dueDate
+        FROM issuetran i
+        JOIN customer c ON i.CustomerID = c.CustomerID
+        JOIN movies m ON i.MovieID = m.MovieID
+        WHERE i.ReturnDate IS NULL AND i.dueDate < CURDATE()
+        ORDER BY i.dueDate
+    """, None),
+    ("ReportGenerator.generate_customer_report (pending late fees)", """
+        SELECT i.CustomerID, COUNT(*) as OpenRentals
+        FROM issuetran i
+        WHERE i.ReturnDate IS NULL
+        GROUP BY i.CustomerID
+    """, None),
+]
+
+
+def load_profile_queries(path):
+    """(caller, sql, params) of the SELECTs recorded in a query profile dump"""
+    with open(path, encoding='utf-8') as f:
+        profile = json.load(f)
+    queries = []
+    for stats in profile.get('queries', []):
+        if stats['sql'].upper().startswith('SELECT'):
+            queries.append((stats['caller'], stats['sql'], stats.get('sample_params')))
+    return queries
+
+
+def analyze(db, queries=QUERY_CATALOG):
+    """EXPLAIN each query and list the full scans and unindexed sorts it still does"""
+    results = []
+    for name, query, params in queries:
+        plan = db.explain(query, params)
+        results.append({
+            'query': name,
+            'sql': ' '.join(query.split()),
+            'problems': db.backend.plan_problems(plan),
+            'plan': plan
+        })
+    return results
+
+
+def print_report(results):
+    """Print one line per query, flagging those that still scan"""
+    flagged = 0
+    for result in results:
+        if result['problems']:
+            flagged += 1
+            print(f"[SCAN] {result['query']}")
+            for problem in result['problems']:
+                print(f"         - {problem}")
+        else:
+            print(f"[ OK ] {result['query']}")
+    print(f"\n{flagged} of {len(results)} queries still do full scans or unindexed sorts")
+    return flagged
+
+
+if __name__ == "__main__":
+    from db_config import DatabaseConfig
+    
+    db = DatabaseConfig()
+    catalog = load_profile_queries(sys.argv[1]) if len(sys.argv) > 1 else QUERY_CATALOG
+    print_report(analyze(db, catalog))
+    db.close()
@@ -0,0 +1,114 @@
+"""
+Inventory Module
+Copies in stock kept as maintained state: the movies.Copies (migration 5) and
+movies.OpenRentals (migration 4) counters in the database and an in-memory
+copy of them for the rental screens
+"""
+
+import threading
+import weakref
+from datetime import datetime
+
+STOCK_QUERY = "SELECT MovieID, Copies, OpenRentals FROM movies"
+
+# [copies, open rentals] per movie per DatabaseConfig, shared by every screen using that connection
+_stock = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def load_stock(db):
+    """Re-read the copy counters of every movie (call from a worker thread)"""
+    counts = {row['MovieID']: [row['Copies'], row['OpenRentals']] for row in db.fetch_data(STOCK_QUERY)}
+    with _lock:
+        _stock[db] = counts
+    return counts
+
+
+def stock(db):
+    """[copies, open rentals] per movie, as last loaded or recorded"""
+    with _lock:
+        return _stock.setdefault(db, {})
+
+
+def in_stock(db, movie_id):
+    """(copies in stock, copies) for a movie, or None if it isn't loaded yet"""
+    counts = stock(db).get(movie_id)
+    if counts is None:
+        return None
+    copies, rented = counts
+    return max(copies - rented, 0), copies
+
+
+def is_available(db, movie_id):
+    """True when a copy can be rented (a dict lookup, no query)
+    
+    Movies added since the counters were loaded count as available;
+    claim_copy has the final word.
+    """
+    counts = in_stock(db, movie_id)
+    return counts is None or counts[0] > 0
+
+
+def claim_copy(db, movie_id):
+    """Take one copy of a movie out of stock inside the caller's transaction
+    
+    The UPDATE only matches while a copy is in stock, so counters renting
+    the last copy at the same time can't both succeed. Returns 1 when
+    claimed, 0 when every copy is rented out and None when the update failed.
+    """
+    return db.execute_update(
+        "UPDATE movies SET OpenRentals = OpenRentals + 1 WHERE MovieID = %s AND OpenRentals < Copies",
+        (movie_id,)
+    )
+
+
+def release_copy(db, movie_id):
+    """Put a returned copy back in stock inside the caller's transaction"""
+    return db.execute_update(
+        "UPDATE movies SET OpenRentals = OpenRentals - 1 WHERE MovieID = %s AND OpenRentals > 0",
+        (movie_id,)
+    )
+
+
+def adjust_copies(db, movie_id, quantity):
+    """Record a stock adjustment and apply it to the Copies counter inside the caller's transaction
+    
+    A negative quantity writes copies off; it is refused (returns 0) when it
+    would leave fewer copies than are rented out. Returns None on failure.
+    """
+    changed = db.execute_update(
+        "UPDATE movies SET Copies = Copies + %s WHERE MovieID = %s AND Copies + %s >= OpenRentals",
+        (quantity, movie_id, quantity)
+    )
+    if changed:
+        db.execute_query(
+            "INSERT INTO stockadjustment (MovieID, Quantity, AdjustmentDate) VALUES (%s, %s, %s)",
+            (movie_id, quantity, datetime.now().date())
+        )
+    return changed
+
+
+def mark_rented(db, movie_id):
+    """Record in memory that a copy went out (after the transaction committed)"""
+    counts = stock(db).get(movie_id)
+    if counts is not None:
+        counts[1] += 1
+
+
+def mark_sold_out(db, movie_id):
+    """Record in memory that claim_copy found no copy in stock"""
+    counts = stock(db).get(movie_id)
+    if counts is not None:
+        counts[1] = max(counts[1], counts[0])
+
+
+def mark_returned(db, movie_id):
+    """Record in memory that a copy came back (after the transaction committed)"""
+    counts = stock(db).get(movie_id)
+    if counts is not None:
+        counts[1] = max(counts[1] - 1, 0)
+
+
+def record_copies(db, movie_id, copies, rented=0):
+    """Record in memory a movie's copy counters after adding or adjusting it"""
+    stock(db)[movie_id] = [copies, rented]
@@ -6,6 +6,7 @@ Victorian Institute of Technology
 import tkinter as tk
 from tkinter import ttk, messagebox
 from db_config import DatabaseConfig
+import migrations
 from movie_management import MovieManagement
 from customer_management import CustomerManagement
 from rental_management import RentalManagement
@@ -22,8 +23,23 @@ class LoginWindow:
         self.center_window()
         
         self.db = DatabaseConfig()
-        
-        self.setup_ui()
+        self.schema_ok = self.check_schema()
+        if self.schema_ok:
+            self.setup_ui()
+    
+    def check_schema(self):
+        """False (after telling the user) when the database lacks migrations this version needs"""
+        version = migrations.schema_version(self.db)
+        if version is not None and version >= migrations.LATEST_VERSION:
+            return True
+        found = "could not be read" if version is None else f"is at version {version}"
+        messagebox.showerror(
+            "Database Upgrade Required",
+            f"The database schema {found}, but this version of the application "
+            f"needs version {migrations.LATEST_VERSION}.\n\n"
+            "Ask an administrator to run:\n    python migrations.py"
+        )
+        return False
         
     def center_window(self):
         """Center the window on screen"""
@@ -93,20 +109,23 @@ class LoginWindow:
         if is_authenticated:
             self.root.destroy()
             # Open management options window
-            ManagementOptions(user_data)
+            ManagementOptions(user_data, self.db)
         else:
             messagebox.showerror("Error", "Invalid Employee ID or Password")
             self.password_entry.delete(0, tk.END)
     
     def run(self):
         """Start the login window"""
+        if not self.schema_ok:
+            self.root.destroy()
+            return
         self.root.mainloop()
 
 
 class ManagementOptions:
     """Management options selection window"""
     
-    def __init__(self, user_data):
+    def __init__(self, user_data, db=None):
         self.user_data = user_data
         self.root = tk.Tk()
         self.root.title("Management Options")
@@ -116,8 +135,8 @@ class ManagementOptions:
         # Center window
         self.center_window()
         
-        # Database connection
-        self.db = DatabaseConfig()
+        # Database connection (shared so the connection pool is reused)
+        self.db = db or DatabaseConfig()
         
         # Setup UI
         self.setup_ui()
@@ -225,28 +244,30 @@ class ManagementOptions:
         """Logout and return to login screen"""
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
             self.root.destroy()
+            self.db.dump_query_profile()
+            self.db.close()
             LoginWindow().run()
     
     def open_movie_management(self):
         """Open Movie Management window"""
         self.root.destroy()
-        MainApplication(self.user_data, "movie")
+        MainApplication(self.user_data, "movie", self.db)
     
     def open_customer_management(self):
         """Open Customer Management window"""
         self.root.destroy()
-        MainApplication(self.user_data, "customer")
+        MainApplication(self.user_data, "customer", self.db)
     
     def open_rental_management(self):
         """Open Rental Management window"""
         self.root.destroy()
-        MainApplication(self.user_data, "rental")
+        MainApplication(self.user_data, "rental", self.db)
 
 
 class MainApplication:
     """Main application window with navigation"""
     
-    def __init__(self, user_data, module="movie"):
+    def __init__(self, user_data, module="movie", db=None):
         self.user_data = user_data
         self.current_module = module
         self.root = tk.Tk()
@@ -261,8 +282,8 @@ class MainApplication:
         self.root.geometry("1200x700")
         self.root.state('zoomed')  # Maximize window
         
-        # Database connection
-        self.db = DatabaseConfig()
+        # Database connection (shared so the connection pool is reused)
+        self.db = db or DatabaseConfig()
         
         # Setup UI
         self.setup_ui()
@@ -286,7 +307,7 @@ class MainApplication:
     def back_to_menu(self):
         """Go back to management options menu"""
         self.root.destroy()
-        ManagementOptions(self.user_data)
+        ManagementOptions(self.user_data, self.db)
         
     def show_movie_management(self):
         """Show Movie Management interface"""
@@ -303,7 +324,7 @@ class MainApplication:
     def switch_module(self, module):
         """Switch to different management module"""
         self.root.destroy()
-        MainApplication(self.user_data, module)
+        MainApplication(self.user_data, module, self.db)
 
 
 if __name__ == "__main__":
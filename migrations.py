@@ -0,0 +1,249 @@
+"""
+Schema Migrations Module
+Versioned schema changes applied on top of MovieRental_MYSQL.sql
+
+Migrations are an operator step, run once per database before starting
+upgraded clients (the application only checks the version):
+    python migrations.py
+"""
+
+from datetime import datetime
+
+import rollups
+
+# Indexes for the predicates and orderings the screens and reports use
+# (CREATE INDEX has the same syntax on MySQL and SQLite)
+RENTAL_INDEXES = [
+    # Active/overdue rentals: ReturnDate IS NULL [AND dueDate < CURDATE()] ORDER BY dueDate
+    "CREATE INDEX idx_issuetran_return_due ON issuetran (ReturnDate, dueDate)",
+    # Rentals list ordered by IssueDate DESC and the issue date search
+    "CREATE INDEX idx_issuetran_issuedate ON issuetran (IssueDate)",
+    # Availability (MovieID NOT IN ... ReturnDate IS NULL) and delete checks, covered by the index
+    "CREATE INDEX idx_issuetran_movie_return ON issuetran (MovieID, ReturnDate)",
+    "CREATE INDEX idx_issuetran_customer_return ON issuetran (CustomerID, ReturnDate)",
+    # Dropdowns ordered by title / first name; prefix LIKE searches
+    "CREATE INDEX idx_movies_title ON movies (Title, RentalPrice)",
+    "CREATE INDEX idx_movies_genre ON movies (Genre, RentalPrice)",
+    "CREATE INDEX idx_customer_firstname ON customer (FirstName, LastName)",
+    "CREATE INDEX idx_customer_lastname ON customer (LastName, FirstName)"
+]
+
+
+# Open rentals per movie, kept by the rental screen so availability is a column lookup
+OPEN_RENTALS_COUNTER = [
+    "ALTER TABLE movies ADD COLUMN OpenRentals INTEGER NOT NULL DEFAULT 0",
+    """UPDATE movies SET OpenRentals = (
+        SELECT COUNT(*) FROM issuetran
+        WHERE issuetran.MovieID = movies.MovieID AND issuetran.ReturnDate IS NULL
+    )""",
+    "CREATE INDEX idx_movies_openrentals ON movies (OpenRentals)"
+]
+
+# Copies per movie: the sum of its stock adjustments, kept on movies next to OpenRentals.
+# Movies without adjustments were treated as a single copy, so they get an opening
+# adjustment of one copy (or as many as are rented out right now).
+STOCK_COUNTER = [
+    """INSERT INTO stockadjustment (MovieID, Quantity, AdjustmentDate)
+    SELECT m.MovieID,
+        CASE WHEN m.OpenRentals > 1 THEN m.OpenRentals ELSE 1 END - COALESCE(s.Quantity, 0),
+        CURDATE()
+    FROM movies m
+    LEFT JOIN (
+        SELECT MovieID, SUM(Quantity) AS Quantity FROM stockadjustment GROUP BY MovieID
+    ) s ON s.MovieID = m.MovieID
+    WHERE COALESCE(s.Quantity, 0) < CASE WHEN m.OpenRentals > 1 THEN m.OpenRentals ELSE 1 END""",
+    "ALTER TABLE movies ADD COLUMN Copies INTEGER NOT NULL DEFAULT 0",
+    """UPDATE movies SET Copies = COALESCE((
+        SELECT SUM(Quantity) FROM stockadjustment WHERE stockadjustment.MovieID = movies.MovieID
+    ), 0)"""
+]
+
+# Rental counts per movie, customer, genre, producer and day, kept up to date by
+# the rental screen (see rollups.py) and filled here from the rental history
+ROLLUP_TABLES = [
+    """CREATE TABLE rollup_movie (
+        MovieID int(11) NOT NULL PRIMARY KEY,
+        TotalRentals int(11) NOT NULL DEFAULT 0,
+        ActiveRentals int(11) NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE rollup_customer (
+        CustomerID int(11) NOT NULL PRIMARY KEY,
+        TotalRentals int(11) NOT NULL DEFAULT 0,
+        ActiveRentals int(11) NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE rollup_genre (
+        Genre varchar(20) NOT NULL PRIMARY KEY,
+        TotalRentals int(11) NOT NULL DEFAULT 0,
+        ActiveRentals int(11) NOT NULL DEFAULT 0,
+        RentalValue decimal(12,2) NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE rollup_producer (
+        ProducerID int(11) NOT NULL PRIMARY KEY,
+        TotalRentals int(11) NOT NULL DEFAULT 0,
+        ActiveRentals int(11) NOT NULL DEFAULT 0,
+        RentalValue decimal(12,2) NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE rollup_day (
+        RentalDay date NOT NULL PRIMARY KEY,
+        Issued int(11) NOT NULL DEFAULT 0,
+        Returned int(11) NOT NULL DEFAULT 0
+    )"""
+]
+
+
+def sqlite_fulltext(table, key, columns):
+    """FTS5 index kept in sync with `table` by triggers, filled from existing rows"""
+    fts = f"{table}_fts"
+    names = ', '.join(columns)
+    new_values = ', '.join(f"new.{column}" for column in columns)
+    old_values = ', '.join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='{key}', prefix='2 3')",
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+        f"""CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.{key}, {new_values});
+        END""",
+        f"""CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.{key}, {old_values});
+        END""",
+        f"""CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.{key}, {old_values});
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.{key}, {new_values});
+        END"""
+    ]
+
+
+# (version, description, statements per backend); append new migrations, never edit applied ones.
+# Statements must be safe to run again on MySQL, where a failed migration can
+# be left partly applied: DDL is skipped once it has taken effect (see
+# DatabaseBackend.schema_change_check) and data changes must be repeatable.
+MIGRATIONS = [
+    (1, "AUTO_INCREMENT ids for customer, movies and issuetran", {
+        'mysql': [
+            # The id columns are referenced by foreign keys in issuetran
+            "SET FOREIGN_KEY_CHECKS = 0",
+            "ALTER TABLE customer MODIFY CustomerID int(11) NOT NULL AUTO_INCREMENT",
+            "ALTER TABLE movies MODIFY MovieID int(11) NOT NULL AUTO_INCREMENT",
+            "ALTER TABLE issuetran MODIFY IssueID int(11) NOT NULL AUTO_INCREMENT",
+            "SET FOREIGN_KEY_CHECKS = 1"
+        ],
+        # INTEGER PRIMARY KEY columns are rowid aliases and already auto-assign
+        'sqlite': []
+    }),
+    (2, "Indexes for rental status, dates, titles and customer names", {
+        'mysql': RENTAL_INDEXES,
+        'sqlite': RENTAL_INDEXES
+    }),
+    (3, "Full-text indexes on movie titles and customer names", {
+        'mysql': [
+            "ALTER TABLE movies ADD FULLTEXT INDEX ft_movies_title (Title)",
+            "ALTER TABLE customer ADD FULLTEXT INDEX ft_customer_name (FirstName, LastName)"
+        ],
+        'sqlite': (
+            sqlite_fulltext('movies', 'MovieID', ['Title'])
+            + sqlite_fulltext('customer', 'CustomerID', ['FirstName', 'LastName'])
+        )
+    }),
+    (4, "Open rentals counter on movies", {
+        'mysql': OPEN_RENTALS_COUNTER,
+        'sqlite': OPEN_RENTALS_COUNTER
+    }),
+    (5, "Copies per movie from stock adjustments", {
+        # New adjustments get their id from the database, like migration 1
+        'mysql': ["ALTER TABLE stockadjustment MODIFY AdjustmentID int(11) NOT NULL AUTO_INCREMENT"] + STOCK_COUNTER,
+        'sqlite': STOCK_COUNTER
+    }),
+    (6, "Member category of each customer", {
+        'mysql': [
+            "ALTER TABLE customer ADD COLUMN CategoryID int(11) DEFAULT NULL",
+            "ALTER TABLE customer ADD CONSTRAINT customer_category_fk "
+            "FOREIGN KEY (CategoryID) REFERENCES membercategories (CategoryID)"
+        ],
+        'sqlite': [
+            "ALTER TABLE customer ADD COLUMN CategoryID INTEGER DEFAULT NULL REFERENCES membercategories (CategoryID)",
+            "CREATE INDEX idx_customer_category ON customer (CategoryID)"
+        ]
+    }),
+    (7, "Rollup tables of rental counts for the reports", {
+        'mysql': ROLLUP_TABLES + rollups.rebuild_statements(),
+        'sqlite': ROLLUP_TABLES + rollups.rebuild_statements()
+    }),
+]
+
+# Schema version this code needs; the application refuses to start on an older one
+LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        Version INTEGER NOT NULL PRIMARY KEY,
+        Description VARCHAR(200) NOT NULL,
+        AppliedAt VARCHAR(19) NOT NULL
+    )
+"""
+
+
+def applied_versions(db):
+    """Versions already recorded in schema_migrations"""
+    db.execute_query(CREATE_MIGRATIONS_TABLE)
+    rows = db.fetch_data("SELECT Version FROM schema_migrations ORDER BY Version")
+    return {row['Version'] for row in rows}
+
+
+def schema_version(db):
+    """Highest applied migration version (0 before the first), or None when
+    schema_migrations can't be read; runs no DDL, unlike applied_versions()"""
+    row = db.fetch_one("SELECT MAX(Version) AS Version FROM schema_migrations")
+    if row is None:
+        return None
+    return row['Version'] or 0
+
+
+def pending_migrations(db):
+    """Migrations not yet applied, in version order"""
+    applied = applied_versions(db)
+    return [migration for migration in sorted(MIGRATIONS) if migration[0] not in applied]
+
+
+def migrate(db):
+    """Apply pending migrations in order and return the versions applied
+    
+    Each migration runs in one transaction with its schema_migrations row.
+    That makes it atomic on SQLite only: MySQL commits every ALTER TABLE,
+    CREATE INDEX and CREATE TABLE implicitly, so there a failure can leave
+    part of a migration applied without its row. The next run repeats the
+    migration, skipping DDL that has already taken effect. The run stops at
+    the first migration that fails.
+    """
+    applied = []
+    for version, description, statements in pending_migrations(db):
+        with db.transaction() as txn:
+            for statement in statements.get(db.backend.name, []):
+                check = db.backend.schema_change_check(statement)
+                if check is not None and db.fetch_one(*check):
+                    continue
+                db.execute_query(statement)
+            db.execute_query(
+                "INSERT INTO schema_migrations (Version, Description, AppliedAt) VALUES (%s, %s, %s)",
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            if txn.failed:
+                # Don't return a connection with altered session settings to the pool
+                txn.state['discard'] = True
+        
+        if not txn.committed:
+            print(f"Migration {version} failed: {description}")
+            break
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from db_config import DatabaseConfig
+    
+    db = DatabaseConfig()
+    versions = migrate(db)
+    if versions:
+        print(f"Applied migrations: {', '.join(str(v) for v in versions)}")
+    else:
+        print("Schema is up to date")
+    db.close()
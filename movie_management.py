@@ -6,10 +6,25 @@ Handles all movie-related operations: Add, Update, Delete, Search
 import tkinter as tk
 from tkinter import ttk, messagebox
 from reports import ReportGenerator
+from async_db import AsyncDatabase, StatusBar, Debouncer
+import typeahead
+import inventory
+import rollups
+from pagination import KeysetPager, PagerBar, SortKey, NEXT, PREVIOUS, MORE
+from virtual_tree import VirtualTreeview, PagedList
 
 class MovieManagement:
     """Movie Management GUI and Logic"""
     
+    # Movies with producer names; the list view and single-row refreshes add to the WHERE clause
+    MOVIE_QUERY = """
+        SELECT m.MovieID, m.Title, m.ReleaseYear, m.Genre, m.RentalPrice, p.Name as ProducerName,
+            m.Copies, m.OpenRentals
+        FROM movies m
+        LEFT JOIN producers p ON m.ProducerID = p.ProducerID
+        WHERE 1=1
+    """
+    
     def __init__(self, parent, db, back_callback=None):
         self.parent = parent
         self.db = db
@@ -50,6 +65,11 @@ class MovieManagement:
         )
         title_label.pack(side=tk.LEFT, expand=True)
         
+        # Status Bar - queries run on worker threads so the window stays responsive
+        self.status_bar = StatusBar(self.parent)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.async_db = AsyncDatabase(self.parent, self.status_bar)
+        
         # Main Container
         main_container = tk.Frame(self.parent, bg='#ecf0f1')
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -72,7 +92,8 @@ class MovieManagement:
             ("Release Year:", "year"),
             ("Genre:", "genre"),
             ("Rental Price ($):", "price"),
-            ("Producer:", "producer")
+            ("Producer:", "producer"),
+            ("Copies:", "copies")
         ]
         
         self.entries = {}
@@ -216,6 +237,13 @@ class MovieManagement:
         self.search_price_max = tk.Entry(search_row2, font=('Arial', 10), width=10)
         self.search_price_max.pack(side=tk.LEFT, padx=5)
         
+        # Search as you type
+        self.search_debouncer = Debouncer(search_frame, self.search_movies)
+        for entry in (self.search_title, self.search_year, self.search_price_min, self.search_price_max):
+            entry.bind('<KeyRelease>', self.search_debouncer.trigger)
+            entry.bind('<Return>', self.search_debouncer.flush)
+        self.search_genre.bind('<<ComboboxSelected>>', self.search_debouncer.flush)
+        
         # Search buttons
         search_btn_frame = tk.Frame(search_frame, bg='white')
         search_btn_frame.pack(pady=10)
@@ -227,7 +255,7 @@ class MovieManagement:
             bg='#2196F3',
             fg='white',
             width=12,
-            command=self.search_movies,
+            command=self.search_debouncer.flush,
             cursor='hand2'
         ).pack(side=tk.LEFT, padx=5)
         
@@ -264,6 +292,16 @@ class MovieManagement:
         )
         list_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Paging controls
+        self.pager_bar = PagerBar(
+            list_frame,
+            on_previous=lambda: self.movie_list.page(PREVIOUS),
+            on_next=lambda: self.movie_list.page(NEXT),
+            on_more=lambda: self.movie_list.page(MORE),
+            on_show_all=lambda: self.movie_list.reload()
+        )
+        self.pager_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # Treeview for movies
         tree_scroll_y = tk.Scrollbar(list_frame)
         tree_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
@@ -271,9 +309,9 @@ class MovieManagement:
         tree_scroll_x = tk.Scrollbar(list_frame, orient=tk.HORIZONTAL)
         tree_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
         
-        self.movies_tree = ttk.Treeview(
+        self.movies_tree = VirtualTreeview(
             list_frame,
-            columns=("ID", "Title", "Year", "Genre", "Price", "Producer"),
+            columns=("ID", "Title", "Year", "Genre", "Price", "Producer", "Copies", "InStock"),
             show='headings',
             yscrollcommand=tree_scroll_y.set,
             xscrollcommand=tree_scroll_x.set,
@@ -290,6 +328,8 @@ class MovieManagement:
         self.movies_tree.heading("Genre", text="Genre")
         self.movies_tree.heading("Price", text="Price ($)")
         self.movies_tree.heading("Producer", text="Producer")
+        self.movies_tree.heading("Copies", text="Copies")
+        self.movies_tree.heading("InStock", text="In Stock")
         
         self.movies_tree.column("ID", width=50, anchor='center')
         self.movies_tree.column("Title", width=200)
@@ -297,44 +337,50 @@ class MovieManagement:
         self.movies_tree.column("Genre", width=100, anchor='center')
         self.movies_tree.column("Price", width=80, anchor='center')
         self.movies_tree.column("Producer", width=200)
+        self.movies_tree.column("Copies", width=60, anchor='center')
+        self.movies_tree.column("InStock", width=70, anchor='center')
         
         self.movies_tree.pack(fill=tk.BOTH, expand=True)
         
         # Bind selection
         self.movies_tree.bind('<<TreeviewSelect>>', self.on_movie_select)
+        
+        # Shares the 'movies' channel so a newer load or search supersedes this one
+        self.movie_list = PagedList(
+            self.movies_tree, self.pager_bar, self.async_db, 'movies', 'movies', 'MovieID',
+            self.movie_values, self.status_bar
+        )
     
     def load_producers(self):
         """Load producers into dropdown"""
         query = "SELECT ProducerID, Name FROM producers ORDER BY Name"
-        producers = self.db.fetch_data(query)
-        
+        self.async_db.submit('producers', self.db.fetch_data, query, cached=True, callback=self.show_producers)
+    
+    def show_producers(self, producers):
+        """Fill the producer dropdown once the query returns"""
         producer_list = [f"{p['ProducerID']} - {p['Name']}" for p in producers]
         self.entries['producer']['values'] = producer_list
     
     def load_movies(self):
-        """Load all movies into treeview"""
-        # Clear existing
-        for item in self.movies_tree.get_children():
-            self.movies_tree.delete(item)
-        
-        # Fetch movies with producer names
-        query = """
-            SELECT m.MovieID, m.Title, m.ReleaseYear, m.Genre, m.RentalPrice, p.Name as ProducerName
-            FROM movies m
-            LEFT JOIN producers p ON m.ProducerID = p.ProducerID
-            ORDER BY m.MovieID
-        """
-        movies = self.db.fetch_data(query)
-        
-        for movie in movies:
-            self.movies_tree.insert('', tk.END, values=(
-                movie['MovieID'],
-                movie['Title'],
-                movie['ReleaseYear'],
-                movie['Genre'],
-                f"${movie['RentalPrice']:.2f}",
-                movie['ProducerName']
-            ))
+        """Load the first page of movies into treeview"""
+        self.movie_list.show(KeysetPager(self.db, self.MOVIE_QUERY, None, [SortKey('m.MovieID', 'MovieID', False)]))
+    
+    def fetch_movie(self, movie_id):
+        """One movie as the list shows it, to patch the list after a write"""
+        return self.db.fetch_one(self.MOVIE_QUERY + " AND m.MovieID = %s", (movie_id,))
+    
+    def movie_values(self, movie):
+        """Treeview values for a movie"""
+        return (
+            movie['MovieID'],
+            movie['Title'],
+            movie['ReleaseYear'],
+            movie['Genre'],
+            f"${movie['RentalPrice']:.2f}",
+            movie['ProducerName'],
+            movie['Copies'],
+            max(movie['Copies'] - movie['OpenRentals'], 0)
+        )
     
     def clear_form(self):
         """Clear all form fields"""
@@ -371,6 +417,7 @@ class MovieManagement:
                     self.entries['producer'].set(val)
                     break
             
+            self.entries['copies'].insert(0, values[6])
             self.selected_movie_id = values[0]
     
     def add_movie(self):
@@ -387,6 +434,10 @@ class MovieManagement:
             messagebox.showerror("Error", "Invalid year or price format")
             return
         
+        copies = self.copies_entered(default=1)
+        if copies is None:
+            return
+        
         if not self.entries['genre'].get():
             messagebox.showerror("Error", "Please select a genre")
             return
@@ -399,18 +450,12 @@ class MovieManagement:
         producer_str = self.entries['producer'].get()
         producer_id = int(producer_str.split(' - ')[0])
         
-        # Get next movie ID
-        query = "SELECT COALESCE(MAX(MovieID), 0) + 1 as NextID FROM movies"
-        result = self.db.fetch_one(query)
-        next_id = result['NextID']
-        
-        # Insert movie
+        # Insert movie; MovieID is assigned by AUTO_INCREMENT
         query = """
-            INSERT INTO movies (MovieID, Title, ReleaseYear, Genre, RentalPrice, ProducerID)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO movies (Title, ReleaseYear, Genre, RentalPrice, ProducerID)
+            VALUES (%s, %s, %s, %s, %s)
         """
         params = (
-            next_id,
             self.entries['title'].get().strip(),
             year,
             self.entries['genre'].get(),
@@ -418,13 +463,39 @@ class MovieManagement:
             producer_id
         )
         
-        if self.db.execute_query(query, params):
+        # The movie and its opening stock adjustment go in together
+        with self.db.transaction() as txn:
+            movie_id = self.db.execute_insert(query, params)
+            if movie_id is not None and copies:
+                inventory.adjust_copies(self.db, movie_id, copies)
+        
+        if txn.committed and movie_id is not None:
+            typeahead.record_write(self.db, 'movies', movie_id, self.index_row(movie_id, price))
+            inventory.record_copies(self.db, movie_id, copies)
             messagebox.showinfo("Success", "Movie added successfully!")
             self.clear_form()
-            self.load_movies()
+            self.movie_list.upsert(self.fetch_movie(movie_id))
         else:
             messagebox.showerror("Error", "Failed to add movie")
     
+    def copies_entered(self, default=None):
+        """Number in the Copies field (default when blank), or None after showing an error"""
+        text = self.entries['copies'].get().strip()
+        if not text and default is not None:
+            return default
+        try:
+            copies = int(text)
+            if copies < 0:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror("Error", "Copies must be a whole number of 0 or more")
+            return None
+        return copies
+    
+    def index_row(self, movie_id, price):
+        """Form values in the shape the typeahead index expects"""
+        return {'MovieID': movie_id, 'Title': self.entries['title'].get().strip(), 'RentalPrice': price}
+    
     def update_movie(self):
         """Update existing movie"""
         if not self.selected_movie_id:
@@ -443,6 +514,10 @@ class MovieManagement:
             messagebox.showerror("Error", "Invalid year or price format")
             return
         
+        copies = self.copies_entered()
+        if copies is None:
+            return
+        
         # Extract producer ID
         producer_str = self.entries['producer'].get()
         producer_id = int(producer_str.split(' - ')[0])
@@ -462,10 +537,31 @@ class MovieManagement:
             self.selected_movie_id
         )
         
-        if self.db.execute_query(query, params):
+        movie_id = int(self.selected_movie_id)
+        adjusted = None
+        with self.db.transaction() as txn:
+            # Rental counts follow the movie to its new genre, producer or price
+            rollups.retag_movie(self.db, movie_id, self.entries['genre'].get(), producer_id, price)
+            self.db.execute_query(query, params)
+            # A changed copy count is recorded as a stock adjustment of the difference
+            current = self.db.fetch_one("SELECT Copies, OpenRentals FROM movies WHERE MovieID = %s", (movie_id,))
+            if current and copies != current['Copies']:
+                adjusted = inventory.adjust_copies(self.db, movie_id, copies - current['Copies'])
+                if adjusted == 0:
+                    txn.failed = True
+        
+        if adjusted == 0:
+            messagebox.showerror(
+                "Error",
+                f"Cannot reduce copies below the {current['OpenRentals']} currently rented out."
+            )
+        elif txn.committed:
+            typeahead.record_write(self.db, 'movies', movie_id, self.index_row(movie_id, price))
+            if current:
+                inventory.record_copies(self.db, movie_id, copies, current['OpenRentals'])
             messagebox.showinfo("Success", "Movie updated successfully!")
             self.clear_form()
-            self.load_movies()
+            self.movie_list.upsert(self.fetch_movie(movie_id))
         else:
             messagebox.showerror("Error", "Failed to update movie")
     
@@ -475,11 +571,11 @@ class MovieManagement:
             messagebox.showerror("Error", "Please select a movie to delete")
             return
         
-        # Check for existing rentals
-        query = "SELECT COUNT(*) as count FROM issuetran WHERE MovieID = %s AND ReturnDate IS NULL"
+        # Check for existing rentals (maintained counter, see migration 4)
+        query = "SELECT OpenRentals FROM movies WHERE MovieID = %s"
         result = self.db.fetch_one(query, (self.selected_movie_id,))
         
-        if result['count'] > 0:
+        if result and result['OpenRentals'] > 0:
             messagebox.showerror(
                 "Error",
                 "Cannot delete movie. It has active rentals."
@@ -488,33 +584,54 @@ class MovieManagement:
         
         # Confirm deletion
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this movie?"):
-            query = "DELETE FROM movies WHERE MovieID = %s"
-            if self.db.execute_query(query, (self.selected_movie_id,)):
+            movie_id = int(self.selected_movie_id)
+            # Its stock adjustments and rollup counts go with it
+            with self.db.transaction() as txn:
+                self.db.execute_query("DELETE FROM stockadjustment WHERE MovieID = %s", (movie_id,))
+                rollups.forget_movie(self.db, movie_id)
+                self.db.execute_query("DELETE FROM movies WHERE MovieID = %s", (movie_id,))
+            if txn.committed:
+                typeahead.record_write(self.db, 'movies', movie_id)
                 messagebox.showinfo("Success", "Movie deleted successfully!")
                 self.clear_form()
-                self.load_movies()
+                self.movie_list.remove(movie_id)
             else:
                 messagebox.showerror("Error", "Failed to delete movie")
     
     def search_movies(self):
         """Search movies based on filters"""
-        # Clear existing
-        for item in self.movies_tree.get_children():
-            self.movies_tree.delete(item)
+        # Half-typed numbers wait for the next keystroke
+        try:
+            year = int(self.search_year.get()) if self.search_year.get().strip() else None
+            price_min = float(self.search_price_min.get()) if self.search_price_min.get().strip() else None
+            price_max = float(self.search_price_max.get()) if self.search_price_max.get().strip() else None
+        except ValueError:
+            self.status_bar.set_message("Year and prices must be numbers")
+            return
         
         # Build query
         query = """
-            SELECT m.MovieID, m.Title, m.ReleaseYear, m.Genre, m.RentalPrice, p.Name as ProducerName
+            SELECT m.MovieID, m.Title, m.ReleaseYear, m.Genre, m.RentalPrice, p.Name as ProducerName,
+                m.Copies, m.OpenRentals
+        """
+        params = []
+        order = [SortKey('m.MovieID', 'MovieID', False)]
+        
+        # Title filter - full-text search, best matches first
+        match = self.db.fulltext('movies', 'm', self.search_title.get())
+        if match:
+            query += f", {match.score} AS Relevance"
+            params.extend(match.rank_params)
+            order.insert(0, SortKey(match.score, 'Relevance', match.descending, match.rank_params))
+        query += """
             FROM movies m
             LEFT JOIN producers p ON m.ProducerID = p.ProducerID
-            WHERE 1=1
         """
-        params = []
-        
-        # Title filter
-        if self.search_title.get().strip():
-            query += " AND m.Title LIKE %s"
-            params.append(f"%{self.search_title.get().strip()}%")
+        if match:
+            query += f" {match.join} WHERE {match.condition}"
+            params.extend(match.params)
+        else:
+            query += " WHERE 1=1"
         
         # Genre filter
         if self.search_genre.get() and self.search_genre.get() != "All":
@@ -522,37 +639,25 @@ class MovieManagement:
             params.append(self.search_genre.get())
         
         # Year filter
-        if self.search_year.get().strip():
+        if year is not None:
             query += " AND m.ReleaseYear = %s"
-            params.append(int(self.search_year.get()))
+            params.append(year)
         
         # Price range
-        if self.search_price_min.get().strip():
+        if price_min is not None:
             query += " AND m.RentalPrice >= %s"
-            params.append(float(self.search_price_min.get()))
+            params.append(price_min)
         
-        if self.search_price_max.get().strip():
+        if price_max is not None:
             query += " AND m.RentalPrice <= %s"
-            params.append(float(self.search_price_max.get()))
-        
-        query += " ORDER BY m.MovieID"
-        
-        movies = self.db.fetch_data(query, params if params else None)
-        
-        for movie in movies:
-            self.movies_tree.insert('', tk.END, values=(
-                movie['MovieID'],
-                movie['Title'],
-                movie['ReleaseYear'],
-                movie['Genre'],
-                f"${movie['RentalPrice']:.2f}",
-                movie['ProducerName']
-            ))
+            params.append(price_max)
         
-        messagebox.showinfo("Search", f"Found {len(movies)} movies")
+        # Paging continues within the search results; a newer keystroke supersedes this one
+        self.movie_list.show(KeysetPager(self.db, query, params, order, replica=True, cached=True), filtered=True)
     
     def reset_search(self):
         """Reset search filters and reload all movies"""
+        self.search_debouncer.cancel()
         self.search_title.delete(0, tk.END)
         self.search_genre.set("All")
         self.search_year.delete(0, tk.END)
@@ -562,4 +667,4 @@ class MovieManagement:
     
     def generate_report(self):
         """Generate movie report"""
-        ReportGenerator.generate_movie_report(self.db)
+        ReportGenerator.generate_movie_report(self.db, self.async_db)
@@ -0,0 +1,300 @@
+"""
+Pagination Module
+Keyset (seek) paging for the movie, customer and rental lists
+"""
+
+import tkinter as tk
+from collections import namedtuple
+
+PAGE_SIZE = 100
+
+# One ORDER BY term: SQL expression, result column holding its value, direction, params of the expression
+SortKey = namedtuple('SortKey', ['expression', 'column', 'descending', 'params'], defaults=((),))
+
+# Page requests understood by KeysetPager.load
+FIRST, NEXT, PREVIOUS, MORE = 'first', 'next', 'previous', 'more'
+
+
+class KeysetPager:
+    """Pages through a SELECT by seeking past the last row shown
+    
+    query is a SELECT ending in its WHERE clause (use WHERE 1=1 when there
+    is no filter) and params are its parameters in order. Instead of
+    OFFSET, each page continues after the sort key values of the previous
+    page's last row, so a page costs the same however deep the user goes.
+    The last sort key must be unique (e.g. the primary key). transform,
+    if given, is applied to every fetched batch of rows on the worker
+    thread (e.g. fees.annotate).
+    """
+    
+    def __init__(self, db, query, params, order, page_size=PAGE_SIZE, replica=False, cached=False,
+                 transform=None):
+        self.db = db
+        self.query = query
+        self.params = list(params or [])
+        self.order = order
+        self.page_size = page_size
+        self.replica = replica
+        # Serve repeated fetches (e.g. live search going back to an earlier prefix) from the query cache
+        self.cached = cached
+        self.transform = transform
+        
+        # Seek position of every page up to the current one (None = first page)
+        self.starts = []
+        self.last_key = None
+        self.has_next = False
+        self.rows_shown = 0
+    
+    @property
+    def page_number(self):
+        """1-based number of the current page"""
+        return len(self.starts)
+    
+    @property
+    def has_previous(self):
+        """True when there is a page before the current one"""
+        return len(self.starts) > 1
+    
+    def key_of(self, row):
+        """Sort key values of a row"""
+        return tuple(row[key.column] for key in self.order)
+    
+    def precedes(self, a, b):
+        """True when sort key values a come before b in the list order
+        
+        NULL (None) sorts below every value, as on MySQL and SQLite.
+        """
+        for key, x, y in zip(self.order, a, b):
+            if x != y:
+                if x is None or y is None:
+                    return (y is None) if key.descending else (x is None)
+                return x > y if key.descending else x < y
+        return False
+    
+    @staticmethod
+    def beyond(key, value):
+        """WHERE fragment and params for `key` strictly past `value` (NULL sorts lowest)"""
+        expression, params = key.expression, list(key.params)
+        if key.descending:
+            if value is None:
+                # NULLs come last in a descending list
+                return "1=0", []
+            return f"({expression} < %s OR {expression} IS NULL)", [*params, value, *params]
+        if value is None:
+            return f"{expression} IS NOT NULL", params
+        return f"{expression} > %s", [*params, value]
+    
+    @staticmethod
+    def equal(key, value):
+        """WHERE fragment and params for `key` equal to `value` (NULL included)"""
+        if value is None:
+            return f"{key.expression} IS NULL", list(key.params)
+        return f"{key.expression} = %s", [*key.params, value]
+    
+    def seek_condition(self, after):
+        """WHERE fragment and params for rows that sort after the key values `after`
+        
+        Sort keys may be NULL (e.g. a rental without an IssueDate); comparisons
+        use IS [NOT] NULL there, since = and < are never true against NULL.
+        """
+        condition, params = None, []
+        for key, value in reversed(list(zip(self.order, after))):
+            beyond, beyond_params = self.beyond(key, value)
+            if condition is None:
+                condition, params = beyond, beyond_params
+            else:
+                equal, equal_params = self.equal(key, value)
+                condition = f"({beyond} OR ({equal} AND {condition}))"
+                params = [*beyond_params, *equal_params, *params]
+        
+        if len(self.order) > 1:
+            # Plain bound on the first key lets the database range-scan its index
+            first, value = self.order[0], after[0]
+            if first.descending:
+                bound, bound_params = self.equal(first, None)
+                if value is not None:
+                    bound = f"({first.expression} <= %s OR {bound})"
+                    bound_params = [*first.params, value, *bound_params]
+            elif value is not None:
+                bound, bound_params = f"{first.expression} >= %s", [*first.params, value]
+            else:
+                # Everything sorts at or after NULL
+                bound, bound_params = None, []
+            if bound is not None:
+                condition = f"{bound} AND {condition}"
+                params = [*bound_params, *params]
+        return condition, params
+    
+    def ordered_query(self, after=None):
+        """The query seeking past `after`, with its ORDER BY, and its params"""
+        query = self.query
+        params = list(self.params)
+        if after is not None:
+            condition, condition_params = self.seek_condition(after)
+            query += f" AND {condition}"
+            params.extend(condition_params)
+        
+        query += " ORDER BY " + ', '.join(
+            f"{key.expression} {'DESC' if key.descending else 'ASC'}" for key in self.order
+        )
+        for key in self.order:
+            params.extend(key.params)
+        return query, params
+    
+    def fetch(self, after=None, limit=None, cached=None):
+        """Up to `limit` (default page_size + 1) rows after the key values `after`
+        
+        The extra row is only there to tell whether another page follows.
+        cached=False reads past the query cache (e.g. to refresh the list).
+        Safe to call from a worker thread; it does not change the pager.
+        """
+        cached = self.cached if cached is None else cached
+        query, params = self.ordered_query(after)
+        query += f" LIMIT {limit or self.page_size + 1}"
+        rows = self.db.fetch_data(query, params if params else None, cached=cached, replica=self.replica)
+        if self.transform is not None:
+            # Cached results are shared, so transform copies of the rows
+            rows = self.transform([dict(row) for row in rows] if cached else rows)
+        return rows
+    
+    def key_at(self, after, offset):
+        """Sort key values of the row `offset` rows past `after` (None past the end)
+        
+        Used to jump into the middle of a long list; this is the one place
+        OFFSET is used, and only for the distance of the jump.
+        """
+        query, params = self.ordered_query(after)
+        query += f" LIMIT 1 OFFSET {int(offset)}"
+        rows = self.db.fetch_data(query, params if params else None, replica=self.replica)
+        return self.key_of(rows[0]) if rows else None
+    
+    def count(self, cached=None):
+        """Number of rows the query returns (cached=False reads past the query cache)"""
+        rows = self.db.fetch_data(
+            f"SELECT COUNT(*) AS count FROM ({self.query}) counted",
+            self.params if self.params else None,
+            cached=self.cached if cached is None else cached,
+            replica=self.replica
+        )
+        return rows[0]['count'] if rows else 0
+    
+    def load(self, runner, channel, direction, on_page):
+        """Fetch the FIRST, NEXT, PREVIOUS or MORE page on an AsyncDatabase
+        
+        on_page(rows, append) runs on the main thread; append is True for
+        MORE, whose rows go below the ones already shown. Returns None when
+        there is no such page.
+        """
+        if direction == FIRST:
+            start = None
+        elif direction in (NEXT, MORE):
+            if not self.has_next:
+                return None
+            start = self.last_key
+        elif direction == PREVIOUS:
+            if not self.has_previous:
+                return None
+            start = self.starts[-2]
+        else:
+            raise ValueError(f"Unknown page direction: {direction}")
+        
+        def deliver(rows):
+            page = self.advance(direction, start, rows)
+            on_page(page, direction == MORE)
+        
+        return runner.submit(channel, self.fetch, start, callback=deliver)
+    
+    def advance(self, direction, start, rows):
+        """Record that the page fetched from `start` is now shown; returns its rows"""
+        page = rows[:self.page_size]
+        if direction == FIRST:
+            self.starts = [start]
+        elif direction == PREVIOUS:
+            self.starts.pop()
+        else:
+            self.starts.append(start)
+        
+        self.has_next = len(rows) > self.page_size
+        if page:
+            self.last_key = self.key_of(page[-1])
+        self.rows_shown = self.rows_shown + len(page) if direction == MORE else len(page)
+        return page
+    
+    def summary(self, noun):
+        """Status line text, e.g. 'Page 2: 100 movies (more available)'"""
+        text = f"Page {self.page_number}: {self.rows_shown} {noun}"
+        if self.has_next:
+            text += " (more available)"
+        return text
+    
+    def found(self, noun):
+        """Search result message for the first page"""
+        if self.has_next:
+            return f"Showing the first {self.rows_shown} matching {noun}"
+        return f"Found {self.rows_shown} {noun}"
+
+
+class PagerBar(tk.Frame):
+    """Previous / Next / Load More buttons under a list"""
+    
+    def __init__(self, parent, on_previous, on_next, on_more, on_show_all=None, **kwargs):
+        super().__init__(parent, bg='white', **kwargs)
+        self.prev_btn = tk.Button(
+            self,
+            text="◀ Previous",
+            font=('Arial', 9),
+            width=10,
+            command=on_previous,
+            cursor='hand2',
+            state='disabled'
+        )
+        self.prev_btn.pack(side=tk.LEFT, padx=5, pady=(5, 0))
+        
+        self.next_btn = tk.Button(
+            self,
+            text="Next ▶",
+            font=('Arial', 9),
+            width=10,
+            command=on_next,
+            cursor='hand2',
+            state='disabled'
+        )
+        self.next_btn.pack(side=tk.LEFT, padx=5, pady=(5, 0))
+        
+        self.more_btn = tk.Button(
+            self,
+            text="Load More",
+            font=('Arial', 9),
+            width=10,
+            command=on_more,
+            cursor='hand2',
+            state='disabled'
+        )
+        self.more_btn.pack(side=tk.LEFT, padx=5, pady=(5, 0))
+        
+        self.page_label = tk.Label(self, text="", font=('Arial', 9), bg='white')
+        self.page_label.pack(side=tk.RIGHT, padx=5, pady=(5, 0))
+        
+        # Paging off: the whole result scrolls in one virtual list
+        self.show_all = tk.BooleanVar(value=False)
+        if on_show_all:
+            tk.Checkbutton(
+                self,
+                text="Show all",
+                font=('Arial', 9),
+                bg='white',
+                variable=self.show_all,
+                command=on_show_all
+            ).pack(side=tk.RIGHT, padx=5, pady=(5, 0))
+    
+    def paging_off(self):
+        """True when the list shows every row instead of pages"""
+        return self.show_all.get()
+    
+    def update_state(self, pager):
+        """Enable the buttons that lead somewhere and show the page number"""
+        paging = not self.paging_off()
+        self.prev_btn.config(state='normal' if paging and pager.has_previous else 'disabled')
+        self.next_btn.config(state='normal' if paging and pager.has_next else 'disabled')
+        self.more_btn.config(state='normal' if paging and pager.has_next else 'disabled')
+        self.page_label.config(text=f"Page {pager.page_number}" if paging else "")
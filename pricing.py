@@ -0,0 +1,91 @@
+"""
+Pricing Module
+Member-category discounts on rental prices and late fees, per rental and in
+bulk, from an in-memory copy of the membercategories table
+"""
+
+import threading
+import time
+import weakref
+
+import numpy as np
+
+CATEGORY_QUERY = "SELECT CategoryID, CategoryName, Discount FROM membercategories ORDER BY CategoryID"
+
+# Seconds before the copy is re-read anyway, for changes made from other machines
+MAX_AGE = 300
+
+# Loaded discount tables per DatabaseConfig, shared by every screen using that connection
+_tables = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+class DiscountTable:
+    """Discount rate of every member category, with a lookup array for bulk pricing"""
+    
+    def __init__(self, rows, version):
+        self.names = {row['CategoryID']: row['CategoryName'] for row in rows}
+        self.discounts = {row['CategoryID']: row['Discount'] or 0 for row in rows}
+        self.version = version
+        self.loaded_at = time.monotonic()
+        
+        # rate_array[CategoryID] is the fraction taken off; other ids get no discount
+        self.rate_array = np.zeros(max(self.discounts, default=-1) + 1)
+        for category_id, discount in self.discounts.items():
+            self.rate_array[category_id] = discount / 100.0
+    
+    def rate(self, category_id):
+        """Fraction taken off for a category (0 for none or unknown)"""
+        return self.discounts.get(category_id, 0) / 100.0
+    
+    def rates(self, category_ids):
+        """Array of rates for many category ids (None/NaN for no category)"""
+        ids = np.asarray(category_ids, dtype=float)
+        known = ~np.isnan(ids) & (ids >= 0) & (ids < len(self.rate_array))
+        positions = np.where(known, ids, 0).astype(np.int64)
+        return np.where(known, self.rate_array[positions] if len(self.rate_array) else 0.0, 0.0)
+    
+    def label(self, category_id):
+        """Dropdown text, e.g. '4 - Gold (5% off)'"""
+        return f"{category_id} - {self.names[category_id]} ({self.discounts[category_id]}% off)"
+    
+    def labels(self):
+        """Dropdown texts of every category"""
+        return [self.label(category_id) for category_id in self.names]
+
+
+def discounts(db):
+    """DiscountTable for db, re-read after a write to membercategories or after MAX_AGE
+    
+    Only the first call (and the first after a change) runs a query.
+    """
+    version = db.cache.table_version('membercategories')
+    with _lock:
+        table = _tables.get(db)
+    if table is None or table.version != version or time.monotonic() - table.loaded_at > MAX_AGE:
+        table = DiscountTable(db.fetch_data(CATEGORY_QUERY), version)
+        with _lock:
+            _tables[db] = table
+    return table
+
+
+def invalidate(db):
+    """Forget the loaded discounts so the next call re-reads them"""
+    with _lock:
+        _tables.pop(db, None)
+
+
+def price_rental(db, rental_price, category_id, late_fee=0.0):
+    """(rental charge, late fee due) of one rental after the customer's category discount
+    
+    A movie without a rental price (RentalPrice is nullable) is charged
+    nothing, as a customer without a category gets no discount.
+    """
+    rate = discounts(db).rate(category_id)
+    return round(float(rental_price or 0) * (1 - rate), 2), round(float(late_fee or 0) * (1 - rate), 2)
+
+
+def discount_amounts(db, amounts, category_ids):
+    """Many amounts after each one's category discount, rounded to cents (NumPy array)"""
+    rates = discounts(db).rates(category_ids)
+    return np.round(np.asarray(amounts, dtype=float) * (1 - rates), 2)
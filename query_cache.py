@@ -0,0 +1,119 @@
+"""
+Query Cache Module
+Opt-in result cache for repeated SELECTs, invalidated by writes to the tables they read
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)`?', re.IGNORECASE)
+WRITE_TABLES = re.compile(
+    r'\b(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|ALTER\s+TABLE|TRUNCATE(?:\s+TABLE)?|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+`?(\w+)`?',
+    re.IGNORECASE
+)
+
+
+def tables_read(query):
+    """Names of the tables a SELECT reads from"""
+    return {name.lower() for name in READ_TABLES.findall(query)}
+
+
+def tables_written(query):
+    """Names of the tables a write statement modifies"""
+    return {name.lower() for name in WRITE_TABLES.findall(query)}
+
+
+class QueryCache:
+    """LRU cache with TTL expiry keyed by SQL text and parameters"""
+    
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        
+        # Bumped on every invalidation so in-flight reads can't cache stale rows
+        self.generation = 0
+        
+        # Writes seen per table, for in-memory copies kept outside the cache (see table_version)
+        self._table_writes = {}
+        self._clears = 0
+    
+    @staticmethod
+    def make_key(query, params=None):
+        """Cache key: whitespace-normalised SQL plus parameter values"""
+        return ' '.join(query.split()), tuple(params) if params else ()
+    
+    def get(self, query, params=None):
+        """Cached rows for a query, or None on a miss"""
+        key = self.make_key(query, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[2])
+    
+    def put(self, query, params, rows, generation=None):
+        """Store the rows of a query, evicting the least recently used entry
+        
+        Pass the generation read before running the query; the rows are
+        not cached if a write invalidated the cache in the meantime.
+        """
+        key = self.make_key(query, params)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, tables_read(query), list(rows))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, tables):
+        """Drop every cached query that reads one of the given tables"""
+        tables = {table.lower() for table in tables}
+        if not tables:
+            return
+        with self._lock:
+            self.generation += 1
+            for table in tables:
+                self._table_writes[table] = self._table_writes.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+    
+    def clear(self):
+        """Empty the cache"""
+        with self._lock:
+            self.generation += 1
+            self._clears += 1
+            self._entries.clear()
+    
+    def table_version(self, table):
+        """Token that changes whenever a write to `table` goes through this cache's DatabaseConfig"""
+        with self._lock:
+            return self._clears, self._table_writes.get(table.lower(), 0)
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
@@ -0,0 +1,196 @@
+"""
+Query Profiler Module
+Times every DatabaseConfig call, logs slow queries with their EXPLAIN plan
+and keeps a per-session summary grouped by calling screen
+"""
+
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Frames from these modules are skipped when looking for the calling screen
+_DB_LAYER_MODULES = {'db_config', 'db_backends', 'query_cache', 'query_profiler', 'async_db', 'contextlib'}
+
+# Caller recorded for queries run on a worker thread on behalf of a screen
+_attribution = threading.local()
+
+
+def find_caller():
+    """'module.Class.method' of the first frame outside the database layer"""
+    caller = getattr(_attribution, 'caller', None)
+    if caller is not None:
+        return caller
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.split('.')[-1] not in _DB_LAYER_MODULES:
+            name = frame.f_code.co_name
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                name = f"{type(owner).__name__}.{name}"
+            return f"{module}.{name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+@contextmanager
+def attributed_to(caller):
+    """Record queries made by this thread inside the block as coming from caller"""
+    previous = getattr(_attribution, 'caller', None)
+    _attribution.caller = caller
+    try:
+        yield
+    finally:
+        _attribution.caller = previous
+
+
+class QueryProfiler:
+    """Collects wall time and row counts of database calls
+    
+    Slow queries are logged straight away; the EXPLAIN plans of slow
+    SELECTs are queued and only run by explain_pending() (e.g. when the
+    profile is dumped), so the caller's query and any transaction it is in
+    are not held up by an extra statement.
+    """
+    
+    def __init__(self, slow_threshold=0.5, slow_log_path=os.path.join('logs', 'slow_queries.log'),
+                 explain=None, max_slow_entries=200):
+        self.slow_threshold = slow_threshold
+        self.slow_log_path = slow_log_path
+        self.explain = explain
+        self.max_slow_entries = max_slow_entries
+        
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.slow_queries = []
+        # Slow SELECT entries whose plan has not been read yet
+        self._unexplained = []
+    
+    def record(self, method, query, params, elapsed, rows, caller):
+        """Add one call to the session statistics"""
+        sql = ' '.join(query.split())
+        key = (caller, method, sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    'caller': caller,
+                    'method': method,
+                    'sql': sql,
+                    'calls': 0,
+                    'total_time': 0.0,
+                    'max_time': 0.0,
+                    'rows': 0
+                }
+            stats['calls'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            stats['rows'] += rows or 0
+            stats['sample_params'] = list(params) if params else None
+        
+        if elapsed >= self.slow_threshold:
+            self._log_slow_query(method, sql, params, elapsed, rows, caller)
+    
+    def _log_slow_query(self, method, sql, params, elapsed, rows, caller):
+        """Write a slow query to the slow-query log and queue its EXPLAIN"""
+        entry = {
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'caller': caller,
+            'method': method,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'rows': rows,
+            'sql': sql,
+            'params': list(params) if params else None,
+            'explain': None
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+            del self.slow_queries[:-self.max_slow_entries]
+            if self.explain is not None and sql.upper().startswith('SELECT'):
+                self._unexplained.append(entry)
+                del self._unexplained[:-self.max_slow_entries]
+        
+        lines = [f"# {entry['time']}  {entry['elapsed_ms']} ms  rows={rows}  {caller} ({method})", f"{sql};"]
+        if params:
+            lines.append(f"-- params: {list(params)}")
+        self._write_log(lines)
+    
+    def explain_pending(self):
+        """Read the plans of the queued slow SELECTs and add them to the log
+        
+        Run it outside any transaction (dump_query_profile does), so the
+        EXPLAINs go to a pooled connection of their own. Each distinct
+        statement is explained once. Returns the number of plans read.
+        """
+        with self._lock:
+            pending, self._unexplained = self._unexplained, []
+        
+        plans = {}
+        for entry in pending:
+            key = (entry['sql'], repr(entry['params']))
+            if key not in plans:
+                plans[key] = self.explain(entry['sql'], entry['params'])
+                lines = [f"# EXPLAIN of slow query from {entry['time']}  {entry['caller']}", f"{entry['sql']};"]
+                lines.extend(f"-- explain: {row}" for row in plans[key])
+                self._write_log(lines)
+            entry['explain'] = plans[key]
+        return len(plans)
+    
+    def _write_log(self, lines):
+        """Append a block of lines to the slow-query log"""
+        if not self.slow_log_path:
+            return
+        try:
+            directory = os.path.dirname(self.slow_log_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with self._lock, open(self.slow_log_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n\n')
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+    
+    def summary(self):
+        """Per caller/query statistics, most expensive first"""
+        with self._lock:
+            rows = [dict(stats) for stats in self._stats.values()]
+        for stats in rows:
+            stats['total_ms'] = round(stats.pop('total_time') * 1000, 2)
+            stats['max_ms'] = round(stats.pop('max_time') * 1000, 2)
+            stats['avg_ms'] = round(stats['total_ms'] / stats['calls'], 2)
+        rows.sort(key=lambda stats: stats['total_ms'], reverse=True)
+        return rows
+    
+    def by_caller(self):
+        """Total time per calling screen/method, most expensive first"""
+        totals = {}
+        for stats in self.summary():
+            caller = totals.setdefault(stats['caller'], {'caller': stats['caller'], 'calls': 0, 'total_ms': 0.0})
+            caller['calls'] += stats['calls']
+            caller['total_ms'] = round(caller['total_ms'] + stats['total_ms'], 2)
+        return sorted(totals.values(), key=lambda caller: caller['total_ms'], reverse=True)
+    
+    def dump(self, path=None, extra=None):
+        """Write the session summary as JSON and return the file name"""
+        if path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join('logs', f"Query_Profile_{timestamp}.json")
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        profile = {
+            'session_started': self.started.strftime("%Y-%m-%d %H:%M:%S"),
+            'session_ended': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'slow_threshold_ms': self.slow_threshold * 1000,
+            'by_caller': self.by_caller(),
+            'queries': self.summary(),
+            'slow_queries': list(self.slow_queries)
+        }
+        profile.update(extra or {})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2, default=str)
+        return path
@@ -7,10 +7,24 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 from reports import ReportGenerator
+from async_db import AsyncDatabase, StatusBar, Debouncer
+import typeahead
+import inventory
+import fees
+import pricing
+import rollups
+from pagination import KeysetPager, PagerBar, SortKey, NEXT, PREVIOUS, MORE
+from virtual_tree import VirtualTreeview, PagedList
 
 class RentalManagement:
     """Rental Management GUI and Logic"""
     
+    # Background queries that belong to one view; dropped when switching views
+    VIEW_CHANNELS = ('rentals', 'rent_customers', 'rent_movies', 'active_rentals', 'rental_detail')
+    
+    # Newest rentals first; IssueID breaks ties within a day
+    RENTAL_ORDER = [SortKey('i.IssueDate', 'IssueDate', True), SortKey('i.IssueID', 'IssueID', True)]
+    
     def __init__(self, parent, db, back_callback=None):
         self.parent = parent
         self.db = db
@@ -49,6 +63,11 @@ class RentalManagement:
         )
         title_label.pack(side=tk.LEFT, expand=True)
         
+        # Status Bar - queries run on worker threads so the window stays responsive
+        self.status_bar = StatusBar(self.parent)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.async_db = AsyncDatabase(self.parent, self.status_bar)
+        
         # Toggle Buttons Frame
         toggle_frame = tk.Frame(self.parent, bg='#ecf0f1')
         toggle_frame.pack(pady=10)
@@ -104,6 +123,8 @@ class RentalManagement:
     
     def clear_content(self):
         """Clear content frame"""
+        for channel in self.VIEW_CHANNELS:
+            self.async_db.cancel(channel)
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
@@ -161,6 +182,13 @@ class RentalManagement:
         self.search_status.set("All")
         self.search_status.pack(side=tk.LEFT, padx=5)
         
+        # Search as you type
+        self.search_debouncer = Debouncer(search_frame, self.search_rentals)
+        for entry in (self.search_customer, self.search_movie, self.search_issue_date):
+            entry.bind('<KeyRelease>', self.search_debouncer.trigger)
+            entry.bind('<Return>', self.search_debouncer.flush)
+        self.search_status.bind('<<ComboboxSelected>>', self.search_debouncer.flush)
+        
         # Search buttons
         search_btn_frame = tk.Frame(search_frame, bg='white')
         search_btn_frame.pack(pady=10)
@@ -172,7 +200,7 @@ class RentalManagement:
             bg='#2196F3',
             fg='white',
             width=12,
-            command=self.search_rentals,
+            command=self.search_debouncer.flush,
             cursor='hand2'
         ).pack(side=tk.LEFT, padx=5)
         
@@ -209,6 +237,16 @@ class RentalManagement:
         )
         list_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Paging controls
+        self.pager_bar = PagerBar(
+            list_frame,
+            on_previous=lambda: self.rental_list.page(PREVIOUS),
+            on_next=lambda: self.rental_list.page(NEXT),
+            on_more=lambda: self.rental_list.page(MORE),
+            on_show_all=lambda: self.rental_list.reload()
+        )
+        self.pager_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # Treeview
         tree_scroll_y = tk.Scrollbar(list_frame)
         tree_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
@@ -216,7 +254,7 @@ class RentalManagement:
         tree_scroll_x = tk.Scrollbar(list_frame, orient=tk.HORIZONTAL)
         tree_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
         
-        self.rentals_tree = ttk.Treeview(
+        self.rentals_tree = VirtualTreeview(
             list_frame,
             columns=("IssueID", "Customer", "Movie", "IssueDate", "DueDate", "ReturnDate", "Status", "LateFee"),
             show='headings',
@@ -249,6 +287,12 @@ class RentalManagement:
         
         self.rentals_tree.pack(fill=tk.BOTH, expand=True)
         
+        # Shares the 'rentals' channel so a newer load or search supersedes this one
+        self.rental_list = PagedList(
+            self.rentals_tree, self.pager_bar, self.async_db, 'rentals', 'rentals', 'IssueID',
+            self.rental_row, self.status_bar
+        )
+        
         # Load rentals
         self.load_rentals()
     
@@ -277,13 +321,12 @@ class RentalManagement:
             bg='white'
         ).grid(row=0, column=0, sticky='w', pady=15, padx=10)
         
-        self.rent_customer = ttk.Combobox(
+        self.rent_customer = typeahead.AutocompletePicker(
             form_frame,
             font=('Arial', 11),
-            width=40,
-            state='readonly'
+            width=40
         )
-        self.rent_customer.grid(row=0, column=1, pady=15, padx=10)
+        self.rent_customer.grid(row=0, column=1, pady=15, padx=10, sticky='n')
         
         # Movie Selection
         tk.Label(
@@ -293,13 +336,17 @@ class RentalManagement:
             bg='white'
         ).grid(row=1, column=0, sticky='w', pady=15, padx=10)
         
-        self.rent_movie = ttk.Combobox(
+        self.rent_movie = typeahead.AutocompletePicker(
             form_frame,
             font=('Arial', 11),
             width=40,
-            state='readonly'
+            command=self.show_movie_stock
         )
-        self.rent_movie.grid(row=1, column=1, pady=15, padx=10)
+        self.rent_movie.grid(row=1, column=1, pady=15, padx=10, sticky='n')
+        
+        # Copies of the picked movie left in stock
+        self.rent_stock = tk.Label(form_frame, text="", font=('Arial', 10), bg='white', fg='gray')
+        self.rent_stock.grid(row=1, column=2, pady=15, sticky='nw')
         
         # Rental Period
         tk.Label(
@@ -392,28 +439,38 @@ class RentalManagement:
         self.return_rental.bind('<<ComboboxSelected>>', self.on_rental_select)
     
     def load_customers_for_rental(self):
-        """Load customers into dropdown"""
-        query = "SELECT CustomerID, FirstName, LastName FROM customer ORDER BY FirstName"
-        customers = self.db.fetch_data(query)
-        
-        customer_list = [f"{c['CustomerID']} - {c['FirstName']} {c['LastName']}" for c in customers]
-        self.rent_customer['values'] = customer_list
+        """Attach the customer typeahead index to the picker"""
+        def load():
+            index = typeahead.get_index(self.db, 'customer')
+            # Customers added at other counters since the index was built
+            return index, typeahead.fetch_new_rows(self.db, 'customer')
+        
+        def show(result):
+            index, new_rows = result
+            typeahead.apply_rows(self.db, 'customer', new_rows)
+            self.rent_customer.set_index(index)
+        
+        self.async_db.submit('rent_customers', load, callback=show)
     
     def load_movies_for_rental(self):
-        """Load available movies into dropdown"""
-        # Movies not currently rented out
-        query = """
-            SELECT m.MovieID, m.Title, m.RentalPrice
-            FROM movies m
-            WHERE m.MovieID NOT IN (
-                SELECT MovieID FROM issuetran WHERE ReturnDate IS NULL
-            )
-            ORDER BY m.Title
-        """
-        movies = self.db.fetch_data(query)
-        
-        movie_list = [f"{m['MovieID']} - {m['Title']} (${m['RentalPrice']:.2f})" for m in movies]
-        self.rent_movie['values'] = movie_list
+        """Attach the movie typeahead index to the picker, offering only available movies"""
+        def load():
+            index = typeahead.get_index(self.db, 'movies')
+            # Copies in stock at every counter, from the Copies/OpenRentals counters
+            inventory.load_stock(self.db)
+            return index, typeahead.fetch_new_rows(self.db, 'movies')
+        
+        def show(result):
+            index, new_rows = result
+            typeahead.apply_rows(self.db, 'movies', new_rows)
+            self.rent_movie.set_index(index, accept=lambda movie_id: inventory.is_available(self.db, movie_id))
+        
+        self.async_db.submit('rent_movies', load, callback=show)
+    
+    def show_movie_stock(self, movie_id):
+        """Show how many copies of the picked movie are in stock"""
+        counts = inventory.in_stock(self.db, movie_id)
+        self.rent_stock.config(text=f"{counts[0]} of {counts[1]} copies in stock" if counts else "")
     
     def load_active_rentals(self):
         """Load active rentals for return"""
@@ -425,13 +482,15 @@ class RentalManagement:
             WHERE i.ReturnDate IS NULL
             ORDER BY i.IssueDate
         """
-        rentals = self.db.fetch_data(query)
         
-        rental_list = [
-            f"{r['IssueID']} - {r['FirstName']} {r['LastName']} - {r['Title']} (Due: {r['dueDate']})"
-            for r in rentals
-        ]
-        self.return_rental['values'] = rental_list
+        def show(rentals):
+            rental_list = [
+                f"{r['IssueID']} - {r['FirstName']} {r['LastName']} - {r['Title']} (Due: {r['dueDate']})"
+                for r in rentals
+            ]
+            self.return_rental['values'] = rental_list
+        
+        self.async_db.submit('active_rentals', self.db.fetch_data, query, callback=show)
     
     def on_rental_select(self, event):
         """Show rental details when selected"""
@@ -445,53 +504,65 @@ class RentalManagement:
             
             # Get rental details
             query = """
-                SELECT i.*, c.FirstName, c.LastName, m.Title, m.RentalPrice
+                SELECT i.*, c.FirstName, c.LastName, c.CategoryID, m.Title, m.RentalPrice
                 FROM issuetran i
                 JOIN customer c ON i.CustomerID = c.CustomerID
                 JOIN movies m ON i.MovieID = m.MovieID
                 WHERE i.IssueID = %s
             """
-            rental = self.db.fetch_one(query, (rental_id,))
             
-            if rental:
-                # Calculate late fee
-                due_date = rental['dueDate']
-                today = datetime.now().date()
-                late_days = max(0, (today - due_date).days)
-                late_fee = late_days * 2.0  # $2 per day late
-                
-                # Display info
-                info_text = tk.Label(
+            def load():
+                rental = self.db.fetch_one(query, (rental_id,))
+                if rental:
+                    # Late fee after the customer's member discount
+                    _, rental['DaysLate'], late_fee = fees.assess_one(rental['dueDate'])
+                    _, rental['LateFee'] = pricing.price_rental(
+                        self.db, rental['RentalPrice'], rental['CategoryID'], late_fee
+                    )
+                return rental
+            
+            self.async_db.submit('rental_detail', load, callback=self.show_rental_details)
+        else:
+            self.async_db.cancel('rental_detail')
+    
+    def show_rental_details(self, rental):
+        """Display the selected rental with its late fee"""
+        if rental:
+            late_days = rental['DaysLate']
+            late_fee = rental['LateFee']
+            
+            # Display info
+            info_text = tk.Label(
+                self.return_info_frame,
+                text=f"Customer: {rental['FirstName']} {rental['LastName']}\n"
+                     f"Movie: {rental['Title']}\n"
+                     f"Issue Date: {rental['IssueDate']}\n"
+                     f"Due Date: {rental['dueDate']}\n"
+                     f"Days Late: {late_days}\n"
+                     f"Late Fee: ${late_fee:.2f}",
+                font=('Arial', 11),
+                bg='white',
+                justify=tk.LEFT
+            )
+            info_text.pack(pady=10)
+            
+            if late_days > 0:
+                warning = tk.Label(
                     self.return_info_frame,
-                    text=f"Customer: {rental['FirstName']} {rental['LastName']}\n"
-                         f"Movie: {rental['Title']}\n"
-                         f"Issue Date: {rental['IssueDate']}\n"
-                         f"Due Date: {rental['dueDate']}\n"
-                         f"Days Late: {late_days}\n"
-                         f"Late Fee: ${late_fee:.2f}",
-                    font=('Arial', 11),
+                    text=f"⚠️ OVERDUE by {late_days} days!",
+                    font=('Arial', 11, 'bold'),
                     bg='white',
-                    justify=tk.LEFT
+                    fg='red'
                 )
-                info_text.pack(pady=10)
-                
-                if late_days > 0:
-                    warning = tk.Label(
-                        self.return_info_frame,
-                        text=f"⚠️ OVERDUE by {late_days} days!",
-                        font=('Arial', 11, 'bold'),
-                        bg='white',
-                        fg='red'
-                    )
-                    warning.pack(pady=5)
+                warning.pack(pady=5)
     
     def issue_movie(self):
         """Issue a movie to customer"""
-        if not self.rent_customer.get():
+        if self.rent_customer.selected_id is None:
             messagebox.showerror("Error", "Please select a customer")
             return
         
-        if not self.rent_movie.get():
+        if self.rent_movie.selected_id is None:
             messagebox.showerror("Error", "Please select a movie")
             return
         
@@ -504,34 +575,48 @@ class RentalManagement:
             return
         
         # Extract IDs
-        customer_id = int(self.rent_customer.get().split(' - ')[0])
-        movie_id = int(self.rent_movie.get().split(' - ')[0])
-        
-        # Get next issue ID
-        query = "SELECT COALESCE(MAX(IssueID), 0) + 1 as NextID FROM issuetran"
-        result = self.db.fetch_one(query)
-        next_id = result['NextID']
+        customer_id = self.rent_customer.selected_id
+        movie_id = self.rent_movie.selected_id
         
         # Calculate dates
         issue_date = datetime.now().date()
         due_date = issue_date + timedelta(days=rental_days)
         
-        # Insert rental
+        # Insert rental; IssueID is assigned by AUTO_INCREMENT
         query = """
-            INSERT INTO issuetran (IssueID, CustomerID, MovieID, IssueDate, dueDate, ReturnDate)
-            VALUES (%s, %s, %s, %s, %s, NULL)
+            INSERT INTO issuetran (CustomerID, MovieID, IssueDate, dueDate, ReturnDate)
+            VALUES (%s, %s, %s, %s, NULL)
         """
-        params = (next_id, customer_id, movie_id, issue_date, due_date)
-        
-        if self.db.execute_query(query, params):
+        params = (customer_id, movie_id, issue_date, due_date)
+        
+        # Take a copy out of stock and record the rental in one transaction
+        issue_id = None
+        with self.db.transaction() as txn:
+            claimed = inventory.claim_copy(self.db, movie_id)
+            if claimed:
+                issue_id = self.db.execute_insert(query, params)
+                rollups.record_issue(self.db, customer_id, movie_id, issue_date)
+                # Price to charge, after the customer's member discount
+                price = self.db.fetch_one("SELECT RentalPrice FROM movies WHERE MovieID = %s", (movie_id,))
+                customer = self.db.fetch_one("SELECT CategoryID FROM customer WHERE CustomerID = %s", (customer_id,))
+        
+        if claimed == 0:
+            # Last copy rented at another counter since the picker was loaded
+            inventory.mark_sold_out(self.db, movie_id)
+            self.rent_movie.set('')
+            self.rent_stock.config(text="")
+            messagebox.showerror("Error", "No copies of this movie are in stock")
+        elif txn.committed and issue_id is not None:
+            charge, _ = pricing.price_rental(self.db, price['RentalPrice'], customer['CategoryID'])
             messagebox.showinfo(
                 "Success",
-                f"Movie rented successfully!\nDue Date: {due_date}"
+                f"Movie rented successfully!\nDue Date: {due_date}\nCharge: ${charge:.2f}"
             )
             # Reset form
             self.rent_customer.set('')
             self.rent_movie.set('')
-            self.load_movies_for_rental()  # Refresh available movies
+            self.rent_stock.config(text="")
+            inventory.mark_rented(self.db, movie_id)  # One copy fewer in stock
         else:
             messagebox.showerror("Error", "Failed to issue movie")
     
@@ -544,25 +629,37 @@ class RentalManagement:
         rental_str = self.return_rental.get()
         rental_id = int(rental_str.split(' - ')[0])
         
-        # Get rental details
-        query = """
-            SELECT i.*, m.Title, m.RentalPrice
-            FROM issuetran i
-            JOIN movies m ON i.MovieID = m.MovieID
-            WHERE i.IssueID = %s
-        """
-        rental = self.db.fetch_one(query, (rental_id,))
+        # Read and close the rental in one transaction
+        returned = 0
+        with self.db.transaction() as txn:
+            query = """
+                SELECT i.*, m.Title, m.RentalPrice, c.CategoryID
+                FROM issuetran i
+                JOIN movies m ON i.MovieID = m.MovieID
+                JOIN customer c ON i.CustomerID = c.CustomerID
+                WHERE i.IssueID = %s
+            """
+            rental = self.db.fetch_one(query, (rental_id,))
+            
+            if rental:
+                return_date = datetime.now().date()
+                query = "UPDATE issuetran SET ReturnDate = %s WHERE IssueID = %s AND ReturnDate IS NULL"
+                # Only a rental that was still open puts its movie back in stock and counts as returned
+                returned = self.db.execute_update(query, (return_date, rental_id))
+                if returned:
+                    inventory.release_copy(self.db, rental['MovieID'])
+                    rollups.record_return(self.db, rental['CustomerID'], rental['MovieID'], return_date)
         
         if rental:
-            # Calculate late fee
-            due_date = rental['dueDate']
-            return_date = datetime.now().date()
-            late_days = max(0, (return_date - due_date).days)
-            late_fee = late_days * 2.0
-            
-            # Update rental
-            query = "UPDATE issuetran SET ReturnDate = %s WHERE IssueID = %s"
-            if self.db.execute_query(query, (return_date, rental_id)):
+            if txn.committed and not returned:
+                # Closed at another counter since the list was loaded
+                messagebox.showwarning("Already Returned", "Rental was already returned")
+                self.drop_return_option(rental_str)
+            elif txn.committed:
+                # Calculate late fee, after the customer's member discount
+                _, late_days, late_fee = fees.assess_one(rental['dueDate'], return_date)
+                _, late_fee = pricing.price_rental(self.db, rental['RentalPrice'], rental['CategoryID'], late_fee)
+                
                 message = f"Movie returned successfully!\n\n"
                 message += f"Return Date: {return_date}\n"
                 if late_days > 0:
@@ -574,20 +671,23 @@ class RentalManagement:
                 
                 messagebox.showinfo("Return Processed", message)
                 
-                # Reset and reload
-                self.return_rental.set('')
-                for widget in self.return_info_frame.winfo_children():
-                    widget.destroy()
-                self.load_active_rentals()
+                # Reset and drop the returned rental from the list
+                self.drop_return_option(rental_str)
+                inventory.mark_returned(self.db, rental['MovieID'])
             else:
                 messagebox.showerror("Error", "Failed to process return")
     
+    def drop_return_option(self, rental_str):
+        """Remove a closed rental from the return dropdown and clear its details"""
+        self.return_rental['values'] = [
+            value for value in self.return_rental['values'] if value != rental_str
+        ]
+        self.return_rental.set('')
+        for widget in self.return_info_frame.winfo_children():
+            widget.destroy()
+    
     def load_rentals(self):
-        """Load all rentals into treeview"""
-        # Clear existing
-        for item in self.rentals_tree.get_children():
-            self.rentals_tree.delete(item)
-        
+        """Load the first page of rentals into treeview"""
         # Fetch rentals
         query = """
             SELECT 
@@ -600,48 +700,39 @@ class RentalManagement:
             FROM issuetran i
             JOIN customer c ON i.CustomerID = c.CustomerID
             JOIN movies m ON i.MovieID = m.MovieID
-            ORDER BY i.IssueDate DESC
+            WHERE 1=1
         """
-        rentals = self.db.fetch_data(query)
-        
-        today = datetime.now().date()
+        self.rental_list.show(KeysetPager(self.db, query, None, self.RENTAL_ORDER, transform=fees.annotate))
+    
+    def rental_row(self, rental):
+        """Treeview values for a rental
         
-        for rental in rentals:
-            due_date = rental['dueDate']
-            return_date = rental['ReturnDate']
-            
-            # Determine status and late fee
-            if return_date:
-                status = "Returned"
-                late_days = max(0, (return_date - due_date).days)
-                late_fee = f"${late_days * 2.0:.2f}" if late_days > 0 else "$0.00"
-            else:
-                late_days = max(0, (today - due_date).days)
-                if late_days > 0:
-                    status = "Overdue"
-                    late_fee = f"${late_days * 2.0:.2f}"
-                else:
-                    status = "Active"
-                    late_fee = "$0.00"
-            
-            return_date_str = str(return_date) if return_date else "Not Returned"
-            
-            self.rentals_tree.insert('', tk.END, values=(
-                rental['IssueID'],
-                rental['Customer'],
-                rental['Movie'],
-                rental['IssueDate'],
-                rental['dueDate'],
-                return_date_str,
-                status,
-                late_fee
-            ))
+        Status and late fee were added to each fetched batch by fees.annotate.
+        """
+        return_date = rental['ReturnDate']
+        return_date_str = str(return_date) if return_date else "Not Returned"
+        
+        return (
+            rental['IssueID'],
+            rental['Customer'],
+            rental['Movie'],
+            rental['IssueDate'],
+            rental['dueDate'],
+            return_date_str,
+            rental['Status'],
+            f"${rental['LateFee']:.2f}"
+        )
     
     def search_rentals(self):
         """Search rentals based on filters"""
-        # Clear existing
-        for item in self.rentals_tree.get_children():
-            self.rentals_tree.delete(item)
+        # A half-typed date waits for the next keystroke
+        issue_date = self.search_issue_date.get().strip()
+        if issue_date:
+            try:
+                datetime.strptime(issue_date, '%Y-%m-%d')
+            except ValueError:
+                self.status_bar.set_message("Issue date must be YYYY-MM-DD")
+                return
         
         # Build query
         query = """
@@ -655,75 +746,41 @@ class RentalManagement:
             FROM issuetran i
             JOIN customer c ON i.CustomerID = c.CustomerID
             JOIN movies m ON i.MovieID = m.MovieID
-            WHERE 1=1
         """
         params = []
         
-        # Customer name filter
-        if self.search_customer.get().strip():
-            query += " AND (c.FirstName LIKE %s OR c.LastName LIKE %s)"
-            search_term = f"%{self.search_customer.get().strip()}%"
-            params.extend([search_term, search_term])
-        
-        # Movie title filter
-        if self.search_movie.get().strip():
-            query += " AND m.Title LIKE %s"
-            params.append(f"%{self.search_movie.get().strip()}%")
+        # Customer name and movie title filters - full-text search
+        matches = [
+            self.db.fulltext('customer', 'c', self.search_customer.get()),
+            self.db.fulltext('movies', 'm', self.search_movie.get())
+        ]
+        matches = [match for match in matches if match]
+        for match in matches:
+            query += f" {match.join}"
+        query += " WHERE 1=1"
+        for match in matches:
+            query += f" AND {match.condition}"
+            params.extend(match.params)
         
         # Issue date filter
-        if self.search_issue_date.get().strip():
+        if issue_date:
             query += " AND i.IssueDate = %s"
-            params.append(self.search_issue_date.get().strip())
+            params.append(issue_date)
         
         # Status filter
         status = self.search_status.get()
-        if status == "Active":
-            query += " AND i.ReturnDate IS NULL AND i.dueDate >= CURDATE()"
-        elif status == "Returned":
-            query += " AND i.ReturnDate IS NOT NULL"
-        elif status == "Overdue":
-            query += " AND i.ReturnDate IS NULL AND i.dueDate < CURDATE()"
+        if status in (fees.ACTIVE, fees.OVERDUE, fees.RETURNED):
+            query += f" AND {fees.sql_status_condition(status)}"
         
-        query += " ORDER BY i.IssueDate DESC"
-        
-        rentals = self.db.fetch_data(query, params if params else None)
-        
-        today = datetime.now().date()
-        
-        for rental in rentals:
-            due_date = rental['dueDate']
-            return_date = rental['ReturnDate']
-            
-            if return_date:
-                status = "Returned"
-                late_days = max(0, (return_date - due_date).days)
-                late_fee = f"${late_days * 2.0:.2f}" if late_days > 0 else "$0.00"
-            else:
-                late_days = max(0, (today - due_date).days)
-                if late_days > 0:
-                    status = "Overdue"
-                    late_fee = f"${late_days * 2.0:.2f}"
-                else:
-                    status = "Active"
-                    late_fee = "$0.00"
-            
-            return_date_str = str(return_date) if return_date else "Not Returned"
-            
-            self.rentals_tree.insert('', tk.END, values=(
-                rental['IssueID'],
-                rental['Customer'],
-                rental['Movie'],
-                rental['IssueDate'],
-                rental['dueDate'],
-                return_date_str,
-                status,
-                late_fee
-            ))
-        
-        messagebox.showinfo("Search", f"Found {len(rentals)} rentals")
+        # Paging continues within the search results; a newer keystroke supersedes this one
+        self.rental_list.show(
+            KeysetPager(self.db, query, params, self.RENTAL_ORDER, replica=True, cached=True, transform=fees.annotate),
+            filtered=True
+        )
     
     def reset_rental_search(self):
         """Reset search and reload all rentals"""
+        self.search_debouncer.cancel()
         self.search_customer.delete(0, tk.END)
         self.search_movie.delete(0, tk.END)
         self.search_issue_date.delete(0, tk.END)
@@ -732,4 +789,4 @@ class RentalManagement:
     
     def generate_rental_report(self):
         """Generate rental reports"""
-        ReportGenerator.generate_rental_report(self.db)
+        ReportGenerator.generate_rental_report(self.db, self.async_db)
@@ -0,0 +1,380 @@
+"""
+Report Export Module
+Write query results and report sheets as Excel, CSV, Parquet or Feather,
+chunk by chunk from a streaming cursor, for BI tools and analysts
+
+Excel workbooks are written in openpyxl's write-only mode, so memory stays
+flat however many rows a sheet has. Parquet and Feather need pyarrow
+(pip install pyarrow). Run directly to dump the full rental history:
+    python report_export.py [xlsx|csv|parquet|feather] [compression]
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+CHUNK_SIZE = 50000
+
+# Compressions each format accepts; the first is the default. Feather is left
+# uncompressed by default so the file can be memory-mapped.
+COMPRESSIONS = {
+    'csv': (None, 'gzip', 'bz2', 'xz'),
+    'parquet': ('snappy', 'zstd', 'gzip', 'brotli', None),
+    'feather': (None, 'lz4', 'zstd')
+}
+FORMATS = tuple(COMPRESSIONS)
+
+CSV_OPENERS = {None: open, 'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+CSV_SUFFIXES = {None: '', 'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+
+# Rows an Excel worksheet holds, header included; longer sheets continue on
+# 'Name (2)', 'Name (3)', ...
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_TITLE = 31
+
+# Every rental with its customer and movie, oldest first
+HISTORY_QUERY = """
+    SELECT
+        i.IssueID,
+        i.CustomerID,
+        CONCAT(c.FirstName, ' ', c.LastName) as CustomerName,
+        c.CategoryID,
+        i.MovieID,
+        m.Title as MovieTitle,
+        m.Genre,
+        m.RentalPrice,
+        i.IssueDate,
+        i.dueDate,
+        i.ReturnDate
+    FROM issuetran i
+    JOIN customer c ON i.CustomerID = c.CustomerID
+    JOIN movies m ON i.MovieID = m.MovieID
+    ORDER BY i.IssueID
+"""
+
+
+def check_format(fmt, compression=None):
+    """Raise ValueError for an unknown format or a compression it doesn't support"""
+    if fmt == 'xlsx':
+        if compression is not None:
+            raise ValueError("xlsx files are zip archives already and take no compression")
+        return
+    if fmt not in COMPRESSIONS:
+        raise ValueError(f"Unknown export format: {fmt} (choose from {', '.join(FORMATS)})")
+    if compression not in COMPRESSIONS[fmt]:
+        choices = ', '.join(str(choice) for choice in COMPRESSIONS[fmt])
+        raise ValueError(f"{fmt} files can't use {compression} compression (choose from {choices})")
+
+
+def default_compression(fmt):
+    """Compression used when none is asked for (Excel takes none)"""
+    return COMPRESSIONS[fmt][0] if fmt in COMPRESSIONS else None
+
+
+def parse_compression(fmt, value):
+    """Compression named by a setting: empty for the format's default, 'none' for none"""
+    if not value:
+        return default_compression(fmt)
+    return None if value == 'none' else value
+
+
+def file_name(base, fmt, compression=None):
+    """base plus the extension of the format (e.g. '.csv.gz', '.parquet')"""
+    if fmt == 'csv':
+        return f"{base}.csv{CSV_SUFFIXES[compression]}"
+    return f"{base}.{fmt}"
+
+
+def excel_rows(frame):
+    """Rows of a DataFrame as tuples openpyxl can write (missing values left blank)"""
+    values = frame.astype(object).where(frame.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def _arrow():
+    """pyarrow, imported on first use so CSV export works without it"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet and Feather export need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+class ChunkWriter:
+    """Appends DataFrame chunks to one CSV, Parquet or Feather file
+    
+    The column types of a Parquet or Feather file are taken from the first
+    chunk; a column with no values there is written as text.
+    """
+    
+    def __init__(self, path, fmt, compression=None):
+        check_format(fmt, compression)
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._schema = None
+    
+    def write(self, frame):
+        """Append the rows of a DataFrame"""
+        if self.fmt == 'csv':
+            if self._file is None:
+                self._file = CSV_OPENERS[self.compression](self.path, 'wt', newline='', encoding='utf-8')
+                frame.to_csv(self._file, index=False)
+            else:
+                frame.to_csv(self._file, index=False, header=False)
+        else:
+            table = self._table(frame)
+            if self._writer is None:
+                self._writer = self._open(table.schema)
+            self._writer.write_table(table)
+        self.rows += len(frame)
+    
+    def _table(self, frame):
+        """Arrow table of a chunk in the file's schema"""
+        pa = _arrow()
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._schema is None:
+            self._schema = pa.schema([self._widen(pa, field) for field in table.schema]).remove_metadata()
+        
+        columns = []
+        for field, column in zip(self._schema, table.columns):
+            if column.type != field.type:
+                if pa.types.is_string(field.type):
+                    column = pa.array([None if value is None else str(value) for value in column.to_pylist()], pa.string())
+                else:
+                    column = column.cast(field.type)
+            columns.append(column)
+        return pa.Table.from_arrays(columns, schema=self._schema)
+    
+    @staticmethod
+    def _widen(pa, field):
+        """Column type that later chunks fit too: text for all-null columns and
+        full precision for decimals (inferred from the first chunk's values)"""
+        if pa.types.is_null(field.type):
+            return field.with_type(pa.string())
+        if pa.types.is_decimal(field.type):
+            return field.with_type(pa.decimal128(38, field.type.scale))
+        return field
+    
+    def _open(self, schema):
+        """Arrow writer for the file"""
+        pa = _arrow()
+        if self.fmt == 'parquet':
+            return pa.parquet.ParquetWriter(self.path, schema, compression=self.compression or 'none')
+        # Feather version 2 is the Arrow IPC file format
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(self.path, schema, options=options)
+    
+    def close(self):
+        """Finish the file; an empty result still leaves a (header-less) file behind"""
+        if self._file is not None:
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
+        elif self.fmt == 'csv':
+            CSV_OPENERS[self.compression](self.path, 'wt', encoding='utf-8').close()
+        else:
+            self._open(_arrow().schema([])).close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ExcelSheet:
+    """Appends DataFrame chunks to a worksheet of a write-only workbook
+    
+    openpyxl spools the rows to a temporary file as they are appended, so
+    only the current chunk is held in memory. A sheet that outgrows Excel's
+    row limit continues on a new worksheet with the header repeated.
+    """
+    
+    def __init__(self, workbook, title):
+        self.workbook = workbook
+        self.title = title
+        self.rows = 0
+        self._columns = None
+        self._pages = 0
+        self._sheet = None
+        self._sheet_rows = 0
+        self._next_sheet()
+    
+    def write(self, frame):
+        """Append the rows of a DataFrame (the first call writes the header)"""
+        if self._columns is None:
+            self._columns = [str(column) for column in frame.columns]
+            self._append_header()
+        for row in excel_rows(frame):
+            if self._sheet_rows == EXCEL_MAX_ROWS:
+                self._next_sheet()
+                self._append_header()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+        self.rows += len(frame)
+    
+    def _next_sheet(self):
+        """Start the next worksheet: 'Title', then 'Title (2)', ..."""
+        self._pages += 1
+        suffix = f" ({self._pages})" if self._pages > 1 else ""
+        self._sheet = self.workbook.create_sheet(self.title[:EXCEL_MAX_TITLE - len(suffix)] + suffix)
+        self._sheet_rows = 0
+    
+    def _append_header(self):
+        """Bold column names, as DataFrame.to_excel writes them"""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        
+        header = []
+        for name in self._columns:
+            cell = WriteOnlyCell(self._sheet, value=name)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        self._sheet.append(header)
+        self._sheet_rows += 1
+    
+    def close(self):
+        """Nothing to do; the workbook is saved as a whole"""
+
+
+class SheetWriter:
+    """A report's sheets as one Excel workbook, or as one file per sheet in a
+    folder for the columnar formats
+    
+    Sheets are streamed: add() writes a whole DataFrame a chunk at a time and
+    write() appends one chunk, e.g. straight from db.fetch_chunks(). Sheets
+    appear in the order they are first written or opened with sheet().
+    progress, when given, is called with a short status line after every
+    chunk.
+    
+    Usage:
+        with SheetWriter('reports/Movie_Report_<timestamp>', 'parquet') as writer:
+            writer.add(df, 'Movies')
+        print(writer.path)
+    """
+    
+    def __init__(self, base, fmt='xlsx', compression=None, progress=None):
+        check_format(fmt, compression)
+        self.fmt = fmt
+        self.compression = compression
+        self.progress = progress
+        self._workbook = None
+        self._sheets = {}
+        if fmt == 'xlsx':
+            from openpyxl import Workbook
+            
+            self.path = f"{base}.xlsx"
+            self._workbook = Workbook(write_only=True)
+        else:
+            self.path = base
+            os.makedirs(base, exist_ok=True)
+    
+    def sheet(self, sheet_name):
+        """The sheet called sheet_name, created on first use"""
+        sheet = self._sheets.get(sheet_name)
+        if sheet is None:
+            if self._workbook is not None:
+                sheet = ExcelSheet(self._workbook, sheet_name)
+            else:
+                path = file_name(os.path.join(self.path, sheet_name), self.fmt, self.compression)
+                sheet = ChunkWriter(path, self.fmt, self.compression)
+            self._sheets[sheet_name] = sheet
+        return sheet
+    
+    def write(self, frame, sheet_name):
+        """Append the rows of a DataFrame to a sheet; returns the sheet's row count"""
+        sheet = self.sheet(sheet_name)
+        sheet.write(frame)
+        if self.progress is not None:
+            self.progress(f"{sheet_name}: {sheet.rows:,} rows written")
+        return sheet.rows
+    
+    def add(self, frame, sheet_name, index=False, chunk_size=CHUNK_SIZE):
+        """Write one sheet (index=True keeps the DataFrame index as columns)"""
+        if index:
+            frame = frame.reset_index()
+        self.write(frame.iloc[:chunk_size], sheet_name)
+        for start in range(chunk_size, len(frame), chunk_size):
+            self.write(frame.iloc[start:start + chunk_size], sheet_name)
+    
+    def close(self):
+        """Finish every sheet and save the workbook"""
+        for sheet in self._sheets.values():
+            sheet.close()
+        if self._workbook is not None:
+            self._workbook.save(self.path)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_query(db, query, path, fmt, params=None, compression=None, chunk_size=CHUNK_SIZE):
+    """Stream a SELECT into a file, one chunk at a time; returns the rows written
+    
+    Only one chunk is held in memory, so the full rental history exports in
+    bounded memory. Reads go to the read replica when one is configured.
+    """
+    with ChunkWriter(path, fmt, compression) as writer:
+        return stream_query(db, query, writer.write, params, chunk_size)
+
+
+def stream_query(db, query, write, params=None, chunk_size=CHUNK_SIZE):
+    """Call write(frame) for every chunk of a SELECT; returns the rows read"""
+    rows = 0
+    for chunk in db.fetch_chunks(query, params, size=chunk_size, row_format='namedtuple', replica=True):
+        write(pd.DataFrame(chunk))
+        rows += len(chunk)
+    return rows
+
+
+def export_frame(frame, path, fmt, compression=None):
+    """Write a DataFrame (e.g. a report sheet) to a file"""
+    with ChunkWriter(path, fmt, compression) as writer:
+        writer.write(frame)
+    return path
+
+
+def export_rental_history(db, fmt, compression=None, directory='reports', progress=None):
+    """Dump every rental into reports/Rental_History_<timestamp>.<ext>; returns (path, rows)"""
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = os.path.join(directory, f"Rental_History_{timestamp}")
+    if fmt == 'xlsx':
+        with SheetWriter(base, fmt, progress=progress) as writer:
+            rows = stream_query(db, HISTORY_QUERY, lambda frame: writer.write(frame, 'Rental History'))
+        return writer.path, rows
+    path = file_name(base, fmt, compression)
+    return path, export_query(db, HISTORY_QUERY, path, fmt, compression=compression)
+
+
+if __name__ == "__main__":
+    from db_config import DatabaseConfig
+    
+    fmt = sys.argv[1] if len(sys.argv) > 1 else 'parquet'
+    if fmt not in COMPRESSIONS and fmt != 'xlsx':
+        print("Usage: python report_export.py [xlsx|csv|parquet|feather] [compression|none]")
+        sys.exit(1)
+    compression = parse_compression(fmt, sys.argv[2] if len(sys.argv) > 2 else None)
+    check_format(fmt, compression)
+    
+    db = DatabaseConfig()
+    started = time.perf_counter()
+    path, rows = export_rental_history(db, fmt, compression, progress=lambda line: print(f"\r{line}", end='', flush=True))
+    print()
+    print(f"Wrote {rows} rentals to {path} in {time.perf_counter() - started:.1f} s")
+    db.close()
@@ -3,17 +3,29 @@ Reports Module
 Generate Excel reports and data visualizations
 """
 
+import itertools
 import os
-from datetime import datetime
+from datetime import date, datetime
+from functools import partial
 from tkinter import messagebox
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
+import fees
+import pricing
+import report_export
+import snapshots
 
 class ReportGenerator:
     """Generate various reports and visualizations"""
     
+    # Output of the Generate Report buttons: 'xlsx', or 'csv', 'parquet' or 'feather'
+    # for a folder with one file per sheet (optionally compressed, see report_export)
+    output_format = os.environ.get('MOVIERENTAL_REPORT_FORMAT', 'xlsx')
+    output_compression = os.environ.get('MOVIERENTAL_REPORT_COMPRESSION')
+    
     @staticmethod
     def ensure_reports_directory():
         """Ensure reports directory exists"""
@@ -21,263 +33,397 @@ class ReportGenerator:
             os.makedirs('reports')
     
     @staticmethod
-    def generate_movie_report(db):
+    def sheet_writer(name, progress=None):
+        """SheetWriter for reports/<name>_<timestamp> in the configured output format"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        fmt = ReportGenerator.output_format
+        compression = None
+        if fmt != 'xlsx':
+            compression = report_export.parse_compression(fmt, ReportGenerator.output_compression)
+        return report_export.SheetWriter(f"reports/{name}_{timestamp}", fmt, compression, progress)
+    
+    @staticmethod
+    def fetch_frame(db, query, params=None, chunk_size=5000):
+        """Build a DataFrame chunk by chunk from a streaming cursor
+        
+        Report reads go to the read replica when one is configured.
+        """
+        frames = [
+            pd.DataFrame(chunk)
+            for chunk in db.fetch_chunks(query, params, size=chunk_size, row_format='namedtuple', replica=True)
+        ]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+    
+    @staticmethod
+    def run_report(db, build, present, runner=None):
+        """Run build(db) and pass its result to present()
+        
+        With an AsyncDatabase runner the queries and the Excel file are built
+        on a worker thread, progress is shown in the runner's status bar and
+        present() runs back on the Tk main loop.
+        """
+        status_bar = runner.status_bar if runner is not None else None
+        
+        def failed(e):
+            if status_bar is not None:
+                status_bar.set_message("Report failed")
+            messagebox.showerror("Error", f"Failed to generate report:\n{str(e)}")
+        
+        def deliver(result):
+            if status_bar is not None:
+                status_bar.set_message("Report finished")
+            try:
+                present(result)
+            except Exception as e:
+                failed(e)
+        
+        if runner is not None:
+            progress = status_bar.set_message if status_bar is not None else None
+            runner.submit('report', build, db, callback=deliver, error_callback=failed, on_progress=progress)
+            return
+        
+        try:
+            result = build(db)
+        except Exception as e:
+            failed(e)
+            return
+        deliver(result)
+    
+    @staticmethod
+    def generate_movie_report(db, runner=None):
         """Generate movie statistics report"""
+        ReportGenerator.run_report(
+            db,
+            ReportGenerator.build_movie_report,
+            ReportGenerator.present_movie_report,
+            runner
+        )
+    
+    @staticmethod
+    def build_movie_report(db, progress=None):
+        """Query movie data and write the Excel file; None when there is no data"""
         ReportGenerator.ensure_reports_directory()
         
-        try:
-            # Fetch movie data
-            query = """
-                SELECT 
-                    m.MovieID,
-                    m.Title,
-                    m.ReleaseYear,
-                    m.Genre,
-                    m.RentalPrice,
-                    p.Name as Producer,
-                    COUNT(i.IssueID) as TotalRentals,
-                    SUM(CASE WHEN i.ReturnDate IS NULL THEN 1 ELSE 0 END) as CurrentlyRented
-                FROM movies m
-                LEFT JOIN producers p ON m.ProducerID = p.ProducerID
-                LEFT JOIN issuetran i ON m.MovieID = i.MovieID
-                GROUP BY m.MovieID
-                ORDER BY TotalRentals DESC
-            """
-            movies = db.fetch_data(query)
-            
-            if not movies:
-                messagebox.showwarning("Warning", "No movie data available")
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(movies)
-            
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"reports/Movie_Report_{timestamp}.xlsx"
-            
-            # Create Excel writer
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                # Movies sheet
-                df.to_excel(writer, sheet_name='Movies', index=False)
-                
-                # Genre statistics
-                genre_stats = df.groupby('Genre').agg({
-                    'MovieID': 'count',
-                    'TotalRentals': 'sum',
-                    'RentalPrice': 'mean'
-                }).rename(columns={
-                    'MovieID': 'Total Movies',
-                    'TotalRentals': 'Total Rentals',
-                    'RentalPrice': 'Avg Price'
-                })
-                genre_stats.to_excel(writer, sheet_name='Genre Statistics')
-                
-                # Top 10 most rented
-                top_movies = df.nlargest(10, 'TotalRentals')[['Title', 'Genre', 'TotalRentals']]
-                top_movies.to_excel(writer, sheet_name='Top 10 Movies', index=False)
-            
-            messagebox.showinfo(
-                "Success",
-                f"Movie report generated successfully!\n\nSaved to: {filename}"
-            )
+        # Fetch movie data; rental counts come from the rollup table (see rollups.py)
+        query = """
+            SELECT 
+                m.MovieID,
+                m.Title,
+                m.ReleaseYear,
+                m.Genre,
+                m.RentalPrice,
+                p.Name as Producer,
+                COALESCE(r.TotalRentals, 0) as TotalRentals,
+                COALESCE(r.ActiveRentals, 0) as CurrentlyRented
+            FROM movies m
+            LEFT JOIN producers p ON m.ProducerID = p.ProducerID
+            LEFT JOIN rollup_movie r ON m.MovieID = r.MovieID
+            ORDER BY TotalRentals DESC
+        """
+        df = ReportGenerator.fetch_frame(db, query)
+        
+        if df.empty:
+            return None
+        
+        # Create report writer (file name with timestamp)
+        with ReportGenerator.sheet_writer("Movie_Report", progress) as writer:
+            # Movies sheet
+            writer.add(df, 'Movies')
             
-            # Show visualization
-            ReportGenerator.show_movie_visualization(df)
+            # Genre statistics
+            genre_stats = df.groupby('Genre').agg({
+                'MovieID': 'count',
+                'TotalRentals': 'sum',
+                'RentalPrice': 'mean'
+            }).rename(columns={
+                'MovieID': 'Total Movies',
+                'TotalRentals': 'Total Rentals',
+                'RentalPrice': 'Avg Price'
+            })
+            writer.add(genre_stats, 'Genre Statistics', index=True)
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report:\n{str(e)}")
+            # Top 10 most rented
+            top_movies = df.nlargest(10, 'TotalRentals')[['Title', 'Genre', 'TotalRentals']]
+            writer.add(top_movies, 'Top 10 Movies')
+        
+        return writer.path, df
+    
+    @staticmethod
+    def present_movie_report(result):
+        """Show the outcome of build_movie_report on the main thread"""
+        if result is None:
+            messagebox.showwarning("Warning", "No movie data available")
+            return
+        
+        filename, df = result
+        
+        messagebox.showinfo(
+            "Success",
+            f"Movie report generated successfully!\n\nSaved to: {filename}"
+        )
+        
+        # Show visualization
+        ReportGenerator.show_movie_visualization(df)
     
     @staticmethod
-    def generate_customer_report(db):
+    def generate_customer_report(db, runner=None):
         """Generate customer statistics report"""
+        ReportGenerator.run_report(
+            db,
+            ReportGenerator.build_customer_report,
+            ReportGenerator.present_customer_report,
+            runner
+        )
+    
+    @staticmethod
+    def build_customer_report(db, progress=None):
+        """Query customer data and stream it into the Excel file; None when there is no data
+        
+        The Customers sheet is written chunk by chunk as rows arrive, so
+        memory stays flat however many customers there are; the top ten are
+        kept as a running nlargest across chunks.
+        """
         ReportGenerator.ensure_reports_directory()
         
-        try:
-            # Fetch customer data
-            query = """
-                SELECT 
-                    c.CustomerID,
-                    c.Title,
-                    CONCAT(c.FirstName, ' ', c.LastName) as FullName,
-                    c.Phone,
-                    c.Email,
-                    COUNT(i.IssueID) as TotalRentals,
-                    SUM(CASE WHEN i.ReturnDate IS NULL THEN 1 ELSE 0 END) as ActiveRentals,
-                    SUM(CASE 
-                        WHEN i.ReturnDate IS NULL AND i.dueDate < CURDATE() 
-                        THEN DATEDIFF(CURDATE(), i.dueDate) * 2.0 
-                        ELSE 0 
-                    END) as PendingLateFees
-                FROM customer c
-                LEFT JOIN issuetran i ON c.CustomerID = i.CustomerID
-                GROUP BY c.CustomerID
-                ORDER BY TotalRentals DESC
-            """
-            customers = db.fetch_data(query)
-            
-            if not customers:
-                messagebox.showwarning("Warning", "No customer data available")
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(customers)
-            
-            # Generate filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"reports/Customer_Report_{timestamp}.xlsx"
+        # Fetch customer data; rental counts come from the rollup table and
+        # late fees (which grow daily) from the open rentals only
+        query = f"""
+            SELECT 
+                c.CustomerID,
+                c.Title,
+                CONCAT(c.FirstName, ' ', c.LastName) as FullName,
+                c.Phone,
+                c.Email,
+                c.CategoryID,
+                COALESCE(r.TotalRentals, 0) as TotalRentals,
+                COALESCE(r.ActiveRentals, 0) as ActiveRentals,
+                COALESCE(f.PendingLateFees, 0) as PendingLateFees
+            FROM customer c
+            LEFT JOIN rollup_customer r ON c.CustomerID = r.CustomerID
+            LEFT JOIN (
+                SELECT i.CustomerID, SUM({fees.sql_late_fee()}) as PendingLateFees
+                FROM issuetran i
+                WHERE i.ReturnDate IS NULL
+                GROUP BY i.CustomerID
+            ) f ON c.CustomerID = f.CustomerID
+            ORDER BY TotalRentals DESC
+        """
+        chunks = db.fetch_chunks(query, size=5000, row_format='namedtuple', replica=True)
+        first = next(chunks, None)
+        if first is None:
+            return None
+        
+        # Create report writer (file name with timestamp); sheets in display order
+        top_customers = None
+        with ReportGenerator.sheet_writer("Customer_Report", progress) as writer:
+            for sheet_name in ('Customers', 'Top 10 Customers', 'Pending Late Fees'):
+                writer.sheet(sheet_name)
             
-            # Create Excel writer
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+            for chunk in itertools.chain([first], chunks):
+                df = pd.DataFrame(chunk)
+                
+                # Member discounts, applied to the whole column at once
+                df['PendingLateFees'] = pricing.discount_amounts(db, df['PendingLateFees'], df['CategoryID'])
+                
                 # Customers sheet
-                df.to_excel(writer, sheet_name='Customers', index=False)
+                writer.write(df, 'Customers')
                 
-                # Top customers
-                top_customers = df.nlargest(10, 'TotalRentals')[['FullName', 'TotalRentals', 'ActiveRentals']]
-                top_customers.to_excel(writer, sheet_name='Top 10 Customers', index=False)
+                # Top customers so far
+                top = df.nlargest(10, 'TotalRentals')[['FullName', 'TotalRentals', 'ActiveRentals']]
+                if top_customers is not None:
+                    top = pd.concat([top_customers, top], ignore_index=True).nlargest(10, 'TotalRentals')
+                top_customers = top
                 
                 # Customers with late fees
                 late_fees = df[df['PendingLateFees'] > 0][['FullName', 'Phone', 'PendingLateFees']]
-                late_fees.to_excel(writer, sheet_name='Pending Late Fees', index=False)
+                writer.write(late_fees, 'Pending Late Fees')
             
-            messagebox.showinfo(
-                "Success",
-                f"Customer report generated successfully!\n\nSaved to: {filename}"
-            )
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report:\n{str(e)}")
+            writer.add(top_customers, 'Top 10 Customers')
+        
+        return writer.path
     
     @staticmethod
-    def generate_rental_report(db):
+    def present_customer_report(filename):
+        """Show the outcome of build_customer_report on the main thread"""
+        if filename is None:
+            messagebox.showwarning("Warning", "No customer data available")
+            return
+        
+        messagebox.showinfo(
+            "Success",
+            f"Customer report generated successfully!\n\nSaved to: {filename}"
+        )
+    
+    @staticmethod
+    def generate_rental_report(db, runner=None):
         """Generate rental statistics report with overdue tracking"""
+        ReportGenerator.run_report(
+            db,
+            ReportGenerator.build_rental_report,
+            ReportGenerator.present_rental_report,
+            runner
+        )
+    
+    @staticmethod
+    def split_open_rentals(db, open_rentals, today=None):
+        """Currently rented and overdue frames from one read of the open rentals
+        
+        Days overdue and late fees (after member discounts) are worked out
+        in memory with fees.assess; the overdue frame is the rows past due,
+        most overdue first.
+        """
+        if open_rentals.empty:
+            return open_rentals, open_rentals
+        
+        today = np.datetime64(today or date.today(), 'D')
+        due = fees.as_days(open_rentals['dueDate'])
+        _, late_days, late_fees = fees.assess(due, np.full(len(due), np.datetime64('NaT'), 'datetime64[D]'), today)
+        
+        rentals = open_rentals.assign(
+            DaysOverdue=pd.Series(today - due).dt.days,
+            LateFee=pricing.discount_amounts(db, late_fees, open_rentals['CategoryID'])
+        )
+        # CategoryID was only read for the discount; the sheets keep their columns
+        currently_rented = rentals.drop(columns=['Email', 'CategoryID'])
+        
+        # Already in due date order, which is most overdue first
+        overdue = rentals.loc[late_days > 0, [
+            'IssueID', 'CustomerName', 'Phone', 'Email', 'MovieTitle', 'IssueDate', 'dueDate', 'LateFee'
+        ]]
+        overdue.insert(7, 'DaysOverdue', late_days[late_days > 0])
+        return currently_rented, overdue.reset_index(drop=True)
+    
+    @staticmethod
+    def fetch_rental_frames(db):
+        """Data of the rental report: currently rented, overdue, genre, producer and daily frames
+        
+        The four queries run at the same time, each on its own connection,
+        all reading the same snapshot (see snapshots.run_parallel).
+        """
+        # Open rentals, read once; the overdue rentals are picked out of them in memory
+        query1 = """
+            SELECT 
+                i.IssueID,
+                CONCAT(c.FirstName, ' ', c.LastName) as CustomerName,
+                c.Phone,
+                c.Email,
+                c.CategoryID,
+                m.Title as MovieTitle,
+                m.Genre,
+                i.IssueDate,
+                i.dueDate
+            FROM issuetran i
+            JOIN customer c ON i.CustomerID = c.CustomerID
+            JOIN movies m ON i.MovieID = m.MovieID
+            WHERE i.ReturnDate IS NULL
+            ORDER BY i.dueDate
+        """
+        
+        def open_rentals(db):
+            return ReportGenerator.split_open_rentals(db, ReportGenerator.fetch_frame(db, query1))
+        
+        # Rental statistics by genre (rollup table, one row per genre)
+        query3 = """
+            SELECT 
+                g.Genre,
+                g.TotalRentals,
+                g.ActiveRentals,
+                g.TotalRentals - g.ActiveRentals as CompletedRentals,
+                1.0 * g.RentalValue / NULLIF(g.TotalRentals, 0) as AvgRentalPrice
+            FROM rollup_genre g
+            ORDER BY g.TotalRentals DESC
+        """
+        
+        # Rental statistics by producer (rollup table, one row per producer)
+        query4 = """
+            SELECT 
+                p.Name as Producer,
+                r.TotalRentals,
+                r.RentalValue as TotalRevenue
+            FROM rollup_producer r
+            JOIN producers p ON p.ProducerID = r.ProducerID
+            ORDER BY r.TotalRentals DESC
+            LIMIT 20
+        """
+        
+        # Rentals and returns per day (rollup table, one row per day)
+        query5 = """
+            SELECT RentalDay as Day, Issued as Rented, Returned
+            FROM rollup_day
+            ORDER BY RentalDay DESC
+        """
+        
+        (df1, df2), df3, df4, df5 = snapshots.run_parallel(db, [
+            open_rentals,
+            partial(ReportGenerator.fetch_frame, query=query3),
+            partial(ReportGenerator.fetch_frame, query=query4),
+            partial(ReportGenerator.fetch_frame, query=query5)
+        ])
+        return df1, df2, df3, df4, df5
+    
+    @staticmethod
+    def build_rental_report(db, progress=None):
+        """Query rental data and write the Excel file"""
         ReportGenerator.ensure_reports_directory()
+        df1, df2, df3, df4, df5 = ReportGenerator.fetch_rental_frames(db)
         
-        try:
-            # Currently rented movies
-            query1 = """
-                SELECT 
-                    i.IssueID,
-                    CONCAT(c.FirstName, ' ', c.LastName) as CustomerName,
-                    c.Phone,
-                    m.Title as MovieTitle,
-                    m.Genre,
-                    i.IssueDate,
-                    i.dueDate,
-                    DATEDIFF(CURDATE(), i.dueDate) as DaysOverdue,
-                    CASE 
-                        WHEN DATEDIFF(CURDATE(), i.dueDate) > 0 
-                        THEN DATEDIFF(CURDATE(), i.dueDate) * 2.0 
-                        ELSE 0 
-                    END as LateFee
-                FROM issuetran i
-                JOIN customer c ON i.CustomerID = c.CustomerID
-                JOIN movies m ON i.MovieID = m.MovieID
-                WHERE i.ReturnDate IS NULL
-                ORDER BY i.dueDate
-            """
-            currently_rented = db.fetch_data(query1)
-            
-            # Overdue rentals
-            query2 = """
-                SELECT 
-                    i.IssueID,
-                    CONCAT(c.FirstName, ' ', c.LastName) as CustomerName,
-                    c.Phone,
-                    c.Email,
-                    m.Title as MovieTitle,
-                    i.IssueDate,
-                    i.dueDate,
-                    DATEDIFF(CURDATE(), i.dueDate) as DaysOverdue,
-                    DATEDIFF(CURDATE(), i.dueDate) * 2.0 as LateFee
-                FROM issuetran i
-                JOIN customer c ON i.CustomerID = c.CustomerID
-                JOIN movies m ON i.MovieID = m.MovieID
-                WHERE i.ReturnDate IS NULL AND i.dueDate < CURDATE()
-                ORDER BY DaysOverdue DESC
-            """
-            overdue_rentals = db.fetch_data(query2)
-            
-            # Rental statistics by genre
-            query3 = """
-                SELECT 
-                    m.Genre,
-                    COUNT(i.IssueID) as TotalRentals,
-                    SUM(CASE WHEN i.ReturnDate IS NULL THEN 1 ELSE 0 END) as ActiveRentals,
-                    SUM(CASE WHEN i.ReturnDate IS NOT NULL THEN 1 ELSE 0 END) as CompletedRentals,
-                    AVG(m.RentalPrice) as AvgRentalPrice
-                FROM movies m
-                LEFT JOIN issuetran i ON m.MovieID = i.MovieID
-                GROUP BY m.Genre
-                ORDER BY TotalRentals DESC
-            """
-            genre_stats = db.fetch_data(query3)
-            
-            # Rental statistics by producer
-            query4 = """
-                SELECT 
-                    p.Name as Producer,
-                    COUNT(i.IssueID) as TotalRentals,
-                    SUM(m.RentalPrice) as TotalRevenue
-                FROM producers p
-                JOIN movies m ON p.ProducerID = m.ProducerID
-                LEFT JOIN issuetran i ON m.MovieID = i.MovieID
-                GROUP BY p.ProducerID
-                ORDER BY TotalRentals DESC
-                LIMIT 20
-            """
-            producer_stats = db.fetch_data(query4)
-            
-            # Generate filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"reports/Rental_Report_{timestamp}.xlsx"
+        # Create report writer (file name with timestamp)
+        with ReportGenerator.sheet_writer("Rental_Report", progress) as writer:
+            # Dates as text for Excel; the columnar formats keep real dates
+            excel = writer.fmt == 'xlsx'
             
-            # Create Excel writer
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                # Currently rented
-                if currently_rented:
-                    df1 = pd.DataFrame(currently_rented)
-                    # Ensure date columns are included and properly formatted
-                    if 'IssueDate' in df1.columns:
-                        df1['IssueDate'] = pd.to_datetime(df1['IssueDate']).dt.strftime('%Y-%m-%d')
-                    if 'dueDate' in df1.columns:
-                        df1['dueDate'] = pd.to_datetime(df1['dueDate']).dt.strftime('%Y-%m-%d')
-                    df1.to_excel(writer, sheet_name='Currently Rented', index=False)
-                
-                # Overdue rentals
-                if overdue_rentals:
-                    df2 = pd.DataFrame(overdue_rentals)
-                    # Ensure date columns are included and properly formatted
-                    if 'IssueDate' in df2.columns:
-                        df2['IssueDate'] = pd.to_datetime(df2['IssueDate']).dt.strftime('%Y-%m-%d')
-                    if 'dueDate' in df2.columns:
-                        df2['dueDate'] = pd.to_datetime(df2['dueDate']).dt.strftime('%Y-%m-%d')
-                    df2.to_excel(writer, sheet_name='Overdue Rentals', index=False)
-                
-                # Genre statistics
-                if genre_stats:
-                    df3 = pd.DataFrame(genre_stats)
-                    df3.to_excel(writer, sheet_name='Statistics by Genre', index=False)
-                
-                # Producer statistics
-                if producer_stats:
-                    df4 = pd.DataFrame(producer_stats)
-                    df4.to_excel(writer, sheet_name='Top Producers', index=False)
+            # Currently rented
+            if not df1.empty:
+                # Ensure date columns are included and properly formatted
+                if excel and 'IssueDate' in df1.columns:
+                    df1['IssueDate'] = pd.to_datetime(df1['IssueDate']).dt.strftime('%Y-%m-%d')
+                if excel and 'dueDate' in df1.columns:
+                    df1['dueDate'] = pd.to_datetime(df1['dueDate']).dt.strftime('%Y-%m-%d')
+                writer.add(df1, 'Currently Rented')
             
-            # Show summary
-            summary = f"Rental Report Generated!\n\n"
-            summary += f"Currently Rented: {len(currently_rented)}\n"
-            summary += f"Overdue Rentals: {len(overdue_rentals)}\n"
-            summary += f"\nSaved to: {filename}"
+            # Overdue rentals
+            if not df2.empty:
+                # Ensure date columns are included and properly formatted
+                if excel and 'IssueDate' in df2.columns:
+                    df2['IssueDate'] = pd.to_datetime(df2['IssueDate']).dt.strftime('%Y-%m-%d')
+                if excel and 'dueDate' in df2.columns:
+                    df2['dueDate'] = pd.to_datetime(df2['dueDate']).dt.strftime('%Y-%m-%d')
+                writer.add(df2, 'Overdue Rentals')
             
-            messagebox.showinfo("Success", summary)
+            # Genre statistics
+            if not df3.empty:
+                writer.add(df3, 'Statistics by Genre')
             
-            # Show visualization
-            if genre_stats:
-                ReportGenerator.show_rental_visualization(genre_stats)
+            # Producer statistics
+            if not df4.empty:
+                writer.add(df4, 'Top Producers')
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report:\n{str(e)}")
+            # Daily activity
+            if not df5.empty:
+                if excel:
+                    df5['Day'] = pd.to_datetime(df5['Day']).dt.strftime('%Y-%m-%d')
+                writer.add(df5, 'Daily Activity')
+        
+        return writer.path, df1, df2, df3
+    
+    @staticmethod
+    def present_rental_report(result):
+        """Show the outcome of build_rental_report on the main thread"""
+        filename, df1, df2, df3 = result
+        
+        # Show summary
+        summary = f"Rental Report Generated!\n\n"
+        summary += f"Currently Rented: {len(df1)}\n"
+        summary += f"Overdue Rentals: {len(df2)}\n"
+        summary += f"\nSaved to: {filename}"
+        
+        messagebox.showinfo("Success", summary)
+        
+        # Show visualization
+        if not df3.empty:
+            ReportGenerator.show_rental_visualization(df3)
     
     @staticmethod
     def show_movie_visualization(df):
@@ -0,0 +1,222 @@
+"""
+Rollups Module
+Rental counts per movie, customer, genre, producer and day, kept in summary
+tables (migration 7) that renting and returning update in the same
+transaction as issuetran, so reports read one row per group instead of
+aggregating the whole rental history
+
+Run directly to check or rebuild the tables from issuetran:
+    python rollups.py verify
+    python rollups.py rebuild
+"""
+
+import sys
+from collections import namedtuple
+
+# One summary table: key columns, counter columns and the SELECT computing
+# its rows from scratch (same columns and order), used by rebuild() and verify()
+Rollup = namedtuple('Rollup', ['table', 'keys', 'counters', 'select'])
+
+ROLLUPS = [
+    Rollup('rollup_movie', ('MovieID',), ('TotalRentals', 'ActiveRentals'), """
+        SELECT m.MovieID, COUNT(i.IssueID) AS TotalRentals,
+            COUNT(i.IssueID) - COUNT(i.ReturnDate) AS ActiveRentals
+        FROM movies m
+        LEFT JOIN issuetran i ON i.MovieID = m.MovieID
+        GROUP BY m.MovieID
+    """),
+    Rollup('rollup_customer', ('CustomerID',), ('TotalRentals', 'ActiveRentals'), """
+        SELECT c.CustomerID, COUNT(i.IssueID) AS TotalRentals,
+            COUNT(i.IssueID) - COUNT(i.ReturnDate) AS ActiveRentals
+        FROM customer c
+        LEFT JOIN issuetran i ON i.CustomerID = c.CustomerID
+        GROUP BY c.CustomerID
+    """),
+    # RentalValue is the sum of the movies' rental prices over their rentals
+    Rollup('rollup_genre', ('Genre',), ('TotalRentals', 'ActiveRentals', 'RentalValue'), """
+        SELECT COALESCE(m.Genre, '') AS Genre, COUNT(i.IssueID) AS TotalRentals,
+            COUNT(i.IssueID) - COUNT(i.ReturnDate) AS ActiveRentals,
+            COALESCE(SUM(CASE WHEN i.IssueID IS NOT NULL THEN m.RentalPrice ELSE 0 END), 0) AS RentalValue
+        FROM movies m
+        LEFT JOIN issuetran i ON i.MovieID = m.MovieID
+        GROUP BY COALESCE(m.Genre, '')
+    """),
+    Rollup('rollup_producer', ('ProducerID',), ('TotalRentals', 'ActiveRentals', 'RentalValue'), """
+        SELECT m.ProducerID, COUNT(i.IssueID) AS TotalRentals,
+            COUNT(i.IssueID) - COUNT(i.ReturnDate) AS ActiveRentals,
+            COALESCE(SUM(CASE WHEN i.IssueID IS NOT NULL THEN m.RentalPrice ELSE 0 END), 0) AS RentalValue
+        FROM movies m
+        LEFT JOIN issuetran i ON i.MovieID = m.MovieID
+        WHERE m.ProducerID IS NOT NULL
+        GROUP BY m.ProducerID
+    """),
+    Rollup('rollup_day', ('RentalDay',), ('Issued', 'Returned'), """
+        SELECT d.RentalDay, SUM(d.Issued) AS Issued, SUM(d.Returned) AS Returned
+        FROM (
+            SELECT IssueDate AS RentalDay, 1 AS Issued, 0 AS Returned FROM issuetran WHERE IssueDate IS NOT NULL
+            UNION ALL
+            SELECT ReturnDate, 0, 1 FROM issuetran WHERE ReturnDate IS NOT NULL
+        ) d
+        GROUP BY d.RentalDay
+    """)
+]
+
+ROLLUPS_BY_TABLE = {rollup.table: rollup for rollup in ROLLUPS}
+
+MOVIE_QUERY = "SELECT Genre, ProducerID, RentalPrice FROM movies WHERE MovieID = %s"
+
+
+def rebuild_statements():
+    """DELETE and INSERT ... SELECT statements refilling every rollup from issuetran"""
+    statements = []
+    for rollup in ROLLUPS:
+        columns = ', '.join(rollup.keys + rollup.counters)
+        statements.append(f"DELETE FROM {rollup.table}")
+        statements.append(f"INSERT INTO {rollup.table} ({columns}) {rollup.select}")
+    return statements
+
+
+def bump(db, table, key, *deltas):
+    """Add deltas to the counters of one rollup row, creating it when missing"""
+    rollup = ROLLUPS_BY_TABLE[table]
+    query = db.backend.upsert_add(table, rollup.keys, rollup.counters)
+    return db.execute_query(query, (*key, *deltas))
+
+
+def _bump_groups(db, movie, rentals, active, value):
+    """Apply counter changes to the genre and producer rows of a movie"""
+    bump(db, 'rollup_genre', (movie['Genre'] or '',), rentals, active, value)
+    if movie['ProducerID'] is not None:
+        bump(db, 'rollup_producer', (movie['ProducerID'],), rentals, active, value)
+
+
+def record_issue(db, customer_id, movie_id, issue_date):
+    """Count a new rental inside the caller's transaction"""
+    movie = db.fetch_one(MOVIE_QUERY, (movie_id,))
+    if movie is None:
+        return
+    bump(db, 'rollup_movie', (movie_id,), 1, 1)
+    bump(db, 'rollup_customer', (customer_id,), 1, 1)
+    _bump_groups(db, movie, 1, 1, movie['RentalPrice'] or 0)
+    bump(db, 'rollup_day', (issue_date,), 1, 0)
+
+
+def record_return(db, customer_id, movie_id, return_date):
+    """Count a rental as returned inside the caller's transaction"""
+    movie = db.fetch_one(MOVIE_QUERY, (movie_id,))
+    if movie is None:
+        return
+    bump(db, 'rollup_movie', (movie_id,), 0, -1)
+    bump(db, 'rollup_customer', (customer_id,), 0, -1)
+    _bump_groups(db, movie, 0, -1, 0)
+    bump(db, 'rollup_day', (return_date,), 0, 1)
+
+
+def retag_movie(db, movie_id, genre, producer_id, price):
+    """Move a movie's rentals to its new genre, producer or price inside the caller's transaction
+    
+    Call before the UPDATE of the movie, while the old values can still be read.
+    """
+    movie = db.fetch_one(MOVIE_QUERY, (movie_id,))
+    counts = db.fetch_one(
+        "SELECT TotalRentals, ActiveRentals FROM rollup_movie WHERE MovieID = %s",
+        (movie_id,)
+    )
+    if movie is None or not counts or not counts['TotalRentals']:
+        return
+    if (movie['Genre'] or '', movie['ProducerID'], float(movie['RentalPrice'] or 0)) == (genre or '', producer_id, float(price)):
+        return
+    
+    total, active = counts['TotalRentals'], counts['ActiveRentals']
+    _bump_groups(db, movie, -total, -active, -total * float(movie['RentalPrice'] or 0))
+    _bump_groups(db, {'Genre': genre, 'ProducerID': producer_id}, total, active, total * float(price))
+
+
+def forget_movie(db, movie_id):
+    """Take a deleted movie's rentals out of the rollups inside the caller's transaction
+    
+    Call before the DELETE of the movie, while its genre, producer and price
+    can still be read: its genre and producer rows lose its totals (as
+    retag_movie does) and its own row is dropped.
+    """
+    movie = db.fetch_one(MOVIE_QUERY, (movie_id,))
+    counts = db.fetch_one(
+        "SELECT TotalRentals, ActiveRentals FROM rollup_movie WHERE MovieID = %s",
+        (movie_id,)
+    )
+    if movie is not None and counts and counts['TotalRentals']:
+        total, active = counts['TotalRentals'], counts['ActiveRentals']
+        _bump_groups(db, movie, -total, -active, -total * float(movie['RentalPrice'] or 0))
+    return forget(db, 'rollup_movie', (movie_id,))
+
+
+def forget(db, table, key):
+    """Drop the rollup row of a deleted movie or customer inside the caller's transaction"""
+    rollup = ROLLUPS_BY_TABLE[table]
+    condition = ' AND '.join(f"{column} = %s" for column in rollup.keys)
+    return db.execute_query(f"DELETE FROM {table} WHERE {condition}", key)
+
+
+def rebuild(db):
+    """Recompute every rollup from issuetran in one transaction; True when committed"""
+    with db.transaction() as txn:
+        for statement in rebuild_statements():
+            db.execute_query(statement)
+    return txn.committed
+
+
+def _values(row):
+    """Comparable form of a row's values (dates as text, amounts to the cent)"""
+    values = []
+    for value in row:
+        if value is None or isinstance(value, (int, str)):
+            values.append(value)
+        elif isinstance(value, float) or hasattr(value, 'as_tuple'):
+            values.append(round(float(value), 2))
+        else:
+            values.append(str(value))
+    return tuple(values)
+
+
+def verify(db):
+    """Rows where a rollup differs from issuetran: (table, key, expected, stored)
+    
+    A row missing on one side counts as all zeros. RentalValue is
+    recomputed at today's prices, so a price change not made through
+    retag_movie shows up here too.
+    """
+    differences = []
+    for rollup in ROLLUPS:
+        width = len(rollup.keys)
+        columns = ', '.join(rollup.keys + rollup.counters)
+        expected = {}
+        for row in db.fetch_data(rollup.select):
+            values = _values(row[column] for column in rollup.keys + rollup.counters)
+            expected[values[:width]] = values[width:]
+        stored = {}
+        for row in db.fetch_data(f"SELECT {columns} FROM {rollup.table}"):
+            values = _values(row[column] for column in rollup.keys + rollup.counters)
+            stored[values[:width]] = values[width:]
+        
+        zeros = (0,) * len(rollup.counters)
+        for key in sorted(expected.keys() | stored.keys(), key=str):
+            if expected.get(key, zeros) != stored.get(key, zeros):
+                differences.append((rollup.table, key, expected.get(key, zeros), stored.get(key, zeros)))
+    return differences
+
+
+if __name__ == "__main__":
+    from db_config import DatabaseConfig
+    
+    command = sys.argv[1] if len(sys.argv) > 1 else 'verify'
+    db = DatabaseConfig()
+    if command == 'rebuild':
+        print("Rollups rebuilt" if rebuild(db) else "Rebuild failed")
+    elif command == 'verify':
+        differences = verify(db)
+        for table, key, expected, stored in differences:
+            print(f"{table} {key}: expected {expected}, stored {stored}")
+        print(f"{len(differences)} differences" if differences else "Rollups match issuetran")
+    else:
+        print("Usage: python rollups.py [verify|rebuild]")
+    db.close()
@@ -0,0 +1,98 @@
+"""
+Snapshots Module
+Run a report's queries at the same time on separate connections that all
+read the same consistent snapshot, so the sheets agree with each other
+"""
+
+import threading
+
+# Changes with every rental and return: rollup_day is updated in the same
+# transaction as issuetran (see rollups.py), and it is one row per day
+WATERMARK_QUERY = "SELECT COALESCE(SUM(Issued), 0) AS Issued, COALESCE(SUM(Returned), 0) AS Returned FROM rollup_day"
+
+# Tries at lining the snapshots up before falling back to a single connection
+ATTEMPTS = 3
+
+# Seconds a thread waits for the others to open their snapshots
+BARRIER_TIMEOUT = 30
+
+
+def watermark(db):
+    """(rentals issued, rentals returned) as the calling thread's snapshot sees them"""
+    row = db.fetch_one(WATERMARK_QUERY)
+    if row is None:
+        return None
+    return int(row['Issued']), int(row['Returned'])
+
+
+def run_serial(db, tasks, replica=True):
+    """Results of task(db) for every task, one after another in one snapshot"""
+    with db.snapshot(replica):
+        return [task(db) for task in tasks]
+
+
+def run_parallel(db, tasks, replica=True, attempts=ATTEMPTS):
+    """Results of task(db) for every task, run concurrently on one snapshot
+    
+    Each task gets its own thread and pooled connection inside
+    db.snapshot(). A snapshot belongs to one connection, so once they are
+    all open the threads compare watermarks and start over if a rental or
+    return committed in between. If that keeps happening, or there are
+    more tasks than pooled connections, the tasks run one after another in
+    a single snapshot instead.
+    """
+    tasks = list(tasks)
+    if len(tasks) < 2 or len(tasks) > db.pool.pool_size:
+        return run_serial(db, tasks, replica)
+    
+    for _ in range(attempts):
+        results = _run_once(db, tasks, replica)
+        if results is not None:
+            return results
+    return run_serial(db, tasks, replica)
+
+
+def _run_once(db, tasks, replica):
+    """Results of one concurrent attempt, or None when the snapshots didn't line up"""
+    marks = [None] * len(tasks)
+    results = [None] * len(tasks)
+    errors = []
+    agreed = []
+    
+    def compare():
+        # Run by one thread after every thread has opened its snapshot
+        agreed.append(marks[0] is not None and marks.count(marks[0]) == len(marks))
+    
+    barrier = threading.Barrier(len(tasks), action=compare, timeout=BARRIER_TIMEOUT)
+    
+    def work(index, task):
+        with db.snapshot(replica) as snapshot:
+            try:
+                if not snapshot.failed:
+                    marks[index] = watermark(db)
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+            except Exception as e:
+                barrier.abort()
+                errors.append(e)
+                return
+            
+            if agreed[0]:
+                try:
+                    results[index] = task(db)
+                except Exception as e:
+                    errors.append(e)
+    
+    threads = [
+        threading.Thread(target=work, args=(index, task), name=f'report-snapshot-{index}', daemon=True)
+        for index, task in enumerate(tasks)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if errors:
+        raise errors[0]
+    return results if agreed and agreed[0] else None
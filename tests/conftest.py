@@ -0,0 +1,47 @@
+"""
+Shared fixtures: a migrated SQLite copy of the MovieRental dump per test
+"""
+
+import os
+import shutil
+
+import pytest
+
+import migrations
+from db_backends import SQLiteBackend
+from db_config import DatabaseConfig
+
+
+def open_db(path):
+    """DatabaseConfig on a SQLite file, without the slow-query log"""
+    db = DatabaseConfig(backend=SQLiteBackend(str(path)), pool_size=2)
+    db.profiler.slow_log_path = None
+    return db
+
+
+@pytest.fixture(scope='session')
+def migrated_file(tmp_path_factory):
+    """SQLite file loaded from the dump with every migration applied"""
+    path = tmp_path_factory.mktemp('template') / 'movierental.db'
+    db = open_db(path)
+    migrations.migrate(db)
+    db.close()
+    return path
+
+
+@pytest.fixture
+def db_path(migrated_file, tmp_path):
+    """Fresh copy of the migrated database for one test"""
+    path = tmp_path / 'movierental.db'
+    for suffix in ('', '-wal'):
+        if os.path.exists(f"{migrated_file}{suffix}"):
+            shutil.copy(f"{migrated_file}{suffix}", f"{path}{suffix}")
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    """DatabaseConfig on a fresh copy of the migrated database"""
+    db = open_db(db_path)
+    yield db
+    db.close()
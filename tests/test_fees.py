@@ -0,0 +1,82 @@
+"""
+Late fee rules: fees.assess and the SQL expressions built on the same rule
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import fees
+
+TODAY = date(2025, 3, 10)
+
+
+def test_assess_statuses_days_and_fees():
+    due = [date(2025, 3, 12), date(2025, 3, 7), date(2025, 3, 1), date(2025, 3, 1)]
+    returned = [None, None, date(2025, 3, 4), date(2025, 2, 27)]
+    
+    statuses, late_days, late_fees = fees.assess(due, returned, TODAY)
+    
+    assert statuses.tolist() == [fees.ACTIVE, fees.OVERDUE, fees.RETURNED, fees.RETURNED]
+    assert late_days.tolist() == [0, 3, 3, 0]
+    assert late_fees.tolist() == [0.0, 3 * fees.LATE_FEE_PER_DAY, 3 * fees.LATE_FEE_PER_DAY, 0.0]
+
+
+def test_due_today_is_not_late():
+    assert fees.assess_one(TODAY, None, TODAY) == (fees.ACTIVE, 0, 0.0)
+
+
+def test_date_forms_give_the_same_result():
+    expected = fees.assess([date(2025, 3, 1)], [date(2025, 3, 5)], TODAY)
+    forms = [
+        (['2025-03-01'], ['2025-03-05']),
+        ([datetime(2025, 3, 1, 18, 30)], [datetime(2025, 3, 5, 9, 0)]),
+        (np.array(['2025-03-01'], dtype='datetime64[D]'), np.array(['2025-03-05'], dtype='datetime64[D]')),
+        (pd.Series(pd.to_datetime(['2025-03-01'])).values, pd.Series(pd.to_datetime(['2025-03-05'])).values)
+    ]
+    for due, returned in forms:
+        result = fees.assess(due, returned, TODAY)
+        assert [part.tolist() for part in result] == [part.tolist() for part in expected]
+
+
+def test_missing_return_dates_count_as_open():
+    for missing in (None, pd.NaT, float('nan')):
+        status, late_days, _ = fees.assess_one('2025-03-01', missing, TODAY)
+        assert (status, late_days) == (fees.OVERDUE, 9)
+
+
+def test_annotate_adds_the_columns():
+    rows = [{'dueDate': date(2025, 3, 8), 'ReturnDate': None}]
+    assert fees.annotate(rows, TODAY) == [
+        {'dueDate': date(2025, 3, 8), 'ReturnDate': None, 'Status': fees.OVERDUE, 'DaysLate': 2, 'LateFee': 4.0}
+    ]
+    assert fees.annotate([], TODAY) == []
+
+
+def test_sql_expressions_agree_with_assess(db):
+    rows = db.fetch_data(f"""
+        SELECT i.dueDate, i.ReturnDate, {fees.sql_status()} AS Status,
+            {fees.sql_days_late()} AS DaysLate, {fees.sql_late_fee()} AS LateFee
+        FROM issuetran i
+        WHERE i.dueDate IS NOT NULL
+    """)
+    statuses, late_days, late_fees = fees.assess(
+        [row['dueDate'] for row in rows],
+        [row['ReturnDate'] for row in rows]
+    )
+    
+    assert [row['Status'] for row in rows] == statuses.tolist()
+    assert [row['DaysLate'] for row in rows] == late_days.tolist()
+    assert [float(row['LateFee']) for row in rows] == late_fees.tolist()
+
+
+def test_sql_status_conditions_partition_the_rentals(db):
+    rows = db.fetch_data("SELECT i.dueDate, i.ReturnDate FROM issuetran i WHERE i.dueDate IS NOT NULL")
+    statuses, _, _ = fees.assess([row['dueDate'] for row in rows], [row['ReturnDate'] for row in rows])
+    
+    for status in fees.STATUSES.tolist():
+        count = db.fetch_one(
+            f"SELECT COUNT(*) AS n FROM issuetran i WHERE i.dueDate IS NOT NULL AND {fees.sql_status_condition(status)}"
+        )['n']
+        assert count == int((statuses == status).sum())
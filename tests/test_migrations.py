@@ -0,0 +1,51 @@
+"""
+Schema migrations: applied once, in order, each one atomically on SQLite
+"""
+
+import migrations
+import rollups
+from conftest import open_db
+
+
+def counts(db):
+    """Row counts of the tables the migrations create or fill"""
+    tables = ('schema_migrations', 'membercategories', 'rollup_movie', 'rollup_day')
+    return {table: db.fetch_one(f"SELECT COUNT(*) AS n FROM {table}")['n'] for table in tables}
+
+
+def test_fresh_database_gets_every_migration(tmp_path):
+    db = open_db(tmp_path / 'fresh.db')
+    try:
+        assert migrations.schema_version(db) is None
+        applied = migrations.migrate(db)
+        
+        assert applied == sorted(version for version, _, _ in migrations.MIGRATIONS)
+        assert migrations.schema_version(db) == migrations.LATEST_VERSION
+        assert rollups.verify(db) == []
+    finally:
+        db.close()
+
+
+def test_second_run_changes_nothing(db):
+    before = counts(db)
+    open_rentals = db.fetch_one("SELECT SUM(OpenRentals) AS n FROM movies")['n']
+    
+    assert migrations.migrate(db) == []
+    assert migrations.pending_migrations(db) == []
+    assert counts(db) == before
+    assert db.fetch_one("SELECT SUM(OpenRentals) AS n FROM movies")['n'] == open_rentals
+
+
+def test_failed_migration_leaves_nothing_behind(db, monkeypatch):
+    broken = (migrations.LATEST_VERSION + 1, "Broken", {
+        'sqlite': [
+            "CREATE TABLE half_done (ID INTEGER PRIMARY KEY)",
+            "ALTER TABLE no_such_table ADD COLUMN x INTEGER"
+        ]
+    })
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS + [broken])
+    
+    assert migrations.migrate(db) == []
+    assert migrations.schema_version(db) == migrations.LATEST_VERSION
+    assert db.fetch_one("SELECT name FROM sqlite_master WHERE name = 'half_done'") is None
+    assert migrations.pending_migrations(db) == [broken]
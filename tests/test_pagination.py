@@ -0,0 +1,94 @@
+"""
+KeysetPager: paging forward and back gives the rows of one ordered query,
+with tied and NULL sort keys
+"""
+
+import pytest
+
+from pagination import FIRST, NEXT, PREVIOUS, KeysetPager, SortKey
+
+QUERY = "SELECT MovieID, Title, Genre, ReleaseYear FROM movies WHERE 1=1"
+
+ORDERS = {
+    'genre': [SortKey('Genre', 'Genre', False), SortKey('MovieID', 'MovieID', False)],
+    'genre desc': [SortKey('Genre', 'Genre', True), SortKey('MovieID', 'MovieID', False)],
+    'genre, year desc': [
+        SortKey('Genre', 'Genre', False),
+        SortKey('ReleaseYear', 'ReleaseYear', True),
+        SortKey('MovieID', 'MovieID', True)
+    ],
+    'year desc, genre': [
+        SortKey('ReleaseYear', 'ReleaseYear', True),
+        SortKey('Genre', 'Genre', False),
+        SortKey('MovieID', 'MovieID', False)
+    ]
+}
+
+
+@pytest.fixture
+def movies(db):
+    """Movies with many tied genres and years, and some of each NULL"""
+    db.execute_query("UPDATE movies SET Genre = NULL WHERE MovieID % 7 = 0")
+    db.execute_query("UPDATE movies SET ReleaseYear = NULL WHERE MovieID % 5 = 0")
+    db.execute_query("UPDATE movies SET ReleaseYear = 2000 WHERE MovieID % 3 = 0 AND ReleaseYear IS NOT NULL")
+    return db
+
+
+def ids(rows):
+    return [row['MovieID'] for row in rows]
+
+
+def page_forward(pager):
+    """Every page from the first to the last"""
+    pages = [pager.advance(FIRST, None, pager.fetch(None))]
+    while pager.has_next:
+        start = pager.last_key
+        pages.append(pager.advance(NEXT, start, pager.fetch(start)))
+    return pages
+
+
+@pytest.mark.parametrize('order', ORDERS.values(), ids=ORDERS.keys())
+def test_pages_join_up_to_the_full_list(movies, order):
+    pager = KeysetPager(movies, QUERY, [], order, page_size=7)
+    query, params = pager.ordered_query()
+    expected = ids(movies.fetch_data(query, params or None))
+    
+    pages = page_forward(pager)
+    
+    assert sum((ids(page) for page in pages), []) == expected
+    assert all(len(page) == 7 for page in pages[:-1])
+    assert pager.page_number == len(pages)
+
+
+@pytest.mark.parametrize('order', ORDERS.values(), ids=ORDERS.keys())
+def test_previous_returns_the_same_pages(movies, order):
+    pager = KeysetPager(movies, QUERY, [], order, page_size=7)
+    pages = page_forward(pager)
+    
+    while pager.has_previous:
+        start = pager.starts[-2]
+        page = pager.advance(PREVIOUS, start, pager.fetch(start))
+        assert ids(page) == ids(pages[pager.page_number - 1])
+    assert pager.page_number == 1
+
+
+@pytest.mark.parametrize('order', ORDERS.values(), ids=ORDERS.keys())
+def test_precedes_matches_the_database_order(movies, order):
+    pager = KeysetPager(movies, QUERY, [], order)
+    query, params = pager.ordered_query()
+    keys = [pager.key_of(row) for row in movies.fetch_data(query, params or None)]
+    
+    assert any(None in key for key in keys)
+    for a, b in zip(keys, keys[1:]):
+        assert pager.precedes(a, b) and not pager.precedes(b, a)
+
+
+def test_filter_params_come_before_the_seek_params(movies):
+    order = ORDERS['genre desc']
+    pager = KeysetPager(movies, QUERY + " AND ReleaseYear > %s", [1990], order, page_size=5)
+    everything = KeysetPager(movies, QUERY + " AND ReleaseYear > %s", [1990], order, page_size=1000)
+    
+    pages = page_forward(pager)
+    
+    assert sum((ids(page) for page in pages), []) == ids(everything.fetch(None))
+    assert pager.count() == len(everything.fetch(None))
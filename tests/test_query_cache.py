@@ -0,0 +1,73 @@
+"""
+QueryCache: table-aware invalidation, alone and behind DatabaseConfig
+"""
+
+from query_cache import QueryCache, tables_read, tables_written
+
+GENRES = "SELECT Genre, COUNT(*) AS n FROM movies GROUP BY Genre ORDER BY Genre"
+TITLE = "SELECT Title FROM movies WHERE MovieID = %s"
+
+
+def test_table_names_are_parsed():
+    assert tables_read("SELECT * FROM movies m JOIN `issuetran` i ON 1=1") == {'movies', 'issuetran'}
+    assert tables_written("UPDATE Movies SET Title = 'x'") == {'movies'}
+    assert tables_written("INSERT INTO issuetran VALUES (1)") == {'issuetran'}
+    assert tables_written("DELETE FROM customer WHERE 1=0") == {'customer'}
+
+
+def test_invalidate_drops_only_queries_reading_the_table():
+    cache = QueryCache()
+    cache.put("SELECT * FROM movies", None, [{'MovieID': 1}])
+    cache.put("SELECT * FROM customer", None, [{'CustomerID': 1}])
+    
+    cache.invalidate({'MOVIES'})
+    
+    assert cache.get("SELECT * FROM movies") is None
+    assert cache.get("SELECT * FROM customer") == [{'CustomerID': 1}]
+
+
+def test_put_after_an_invalidation_is_ignored():
+    cache = QueryCache()
+    generation = cache.generation
+    cache.invalidate({'movies'})
+    cache.put("SELECT * FROM movies", None, [{'MovieID': 1}], generation)
+    assert cache.get("SELECT * FROM movies") is None
+
+
+def test_cached_read_is_invalidated_by_a_write(db):
+    db.fetch_data(TITLE, (1,), cached=True)
+    assert db.fetch_data(TITLE, (1,), cached=True)[0]['Title'] != 'Renamed'
+    hits = db.cache.stats()['hits']
+    
+    db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Renamed', 1))
+    
+    assert db.fetch_data(TITLE, (1,), cached=True)[0]['Title'] == 'Renamed'
+    assert db.cache.stats()['hits'] == hits
+
+
+def test_write_to_another_table_keeps_the_entry(db):
+    db.fetch_data(GENRES, cached=True)
+    db.execute_query("UPDATE customer SET FirstName = %s WHERE CustomerID = %s", ('Changed', 1))
+    hits = db.cache.stats()['hits']
+    db.fetch_data(GENRES, cached=True)
+    assert db.cache.stats()['hits'] == hits + 1
+
+
+def test_committed_transaction_invalidates_and_failed_one_does_not(db):
+    db.fetch_data(TITLE, (1,), cached=True)
+    with db.transaction() as txn:
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Rolled back', 1))
+        txn.failed = True
+    assert db.cache.stats()['invalidations'] == 0
+    
+    with db.transaction():
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Committed', 1))
+    assert db.cache.stats()['invalidations'] == 1
+    assert db.fetch_data(TITLE, (1,), cached=True)[0]['Title'] == 'Committed'
+
+
+def test_reads_inside_a_transaction_bypass_the_cache(db):
+    db.fetch_data(TITLE, (1,), cached=True)
+    with db.transaction():
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('In transaction', 1))
+        assert db.fetch_data(TITLE, (1,), cached=True)[0]['Title'] == 'In transaction'
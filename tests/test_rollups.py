@@ -0,0 +1,123 @@
+"""
+Rollup tables stay equal to a recount from issuetran (rollups.verify) after
+renting, returning, retagging and deleting movies the way the screens do
+"""
+
+from datetime import date
+
+import inventory
+import rollups
+
+CUSTOMER_ID = 4
+
+
+def movie_in_stock(db):
+    """A movie with a copy in stock, a genre and a producer"""
+    return db.fetch_one("""
+        SELECT MovieID, Genre, ProducerID, RentalPrice FROM movies
+        WHERE Copies > OpenRentals AND Genre IS NOT NULL AND ProducerID IS NOT NULL
+        ORDER BY MovieID LIMIT 1
+    """)
+
+
+def issue(db, movie_id, issue_date=date(2025, 3, 1)):
+    """Rent a movie as the rental screen does; returns the IssueID"""
+    with db.transaction() as txn:
+        assert inventory.claim_copy(db, movie_id)
+        issue_id = db.execute_insert(
+            "INSERT INTO issuetran (CustomerID, MovieID, IssueDate, dueDate, ReturnDate) VALUES (%s, %s, %s, %s, NULL)",
+            (CUSTOMER_ID, movie_id, issue_date, date(2025, 3, 8))
+        )
+        rollups.record_issue(db, CUSTOMER_ID, movie_id, issue_date)
+    assert txn.committed
+    return issue_id
+
+
+def return_rental(db, issue_id, movie_id, return_date=date(2025, 3, 5)):
+    """Return a rental as the rental screen does"""
+    with db.transaction() as txn:
+        assert db.execute_update(
+            "UPDATE issuetran SET ReturnDate = %s WHERE IssueID = %s AND ReturnDate IS NULL",
+            (return_date, issue_id)
+        )
+        inventory.release_copy(db, movie_id)
+        rollups.record_return(db, CUSTOMER_ID, movie_id, return_date)
+    assert txn.committed
+
+
+def retag(db, movie_id, genre, producer_id, price):
+    """Change a movie's genre, producer and price as the movie screen does"""
+    with db.transaction() as txn:
+        rollups.retag_movie(db, movie_id, genre, producer_id, price)
+        db.execute_query(
+            "UPDATE movies SET Genre = %s, ProducerID = %s, RentalPrice = %s WHERE MovieID = %s",
+            (genre, producer_id, price, movie_id)
+        )
+    assert txn.committed
+
+
+def delete_movie(db, movie_id):
+    """Delete a movie as the movie screen does"""
+    with db.transaction() as txn:
+        db.execute_query("DELETE FROM stockadjustment WHERE MovieID = %s", (movie_id,))
+        rollups.forget_movie(db, movie_id)
+        db.execute_query("DELETE FROM movies WHERE MovieID = %s", (movie_id,))
+    return txn.committed
+
+
+def test_migrated_rollups_match(db):
+    assert rollups.verify(db) == []
+
+
+def test_issue_and_return(db):
+    movie = movie_in_stock(db)
+    issue_id = issue(db, movie['MovieID'])
+    assert rollups.verify(db) == []
+    
+    return_rental(db, issue_id, movie['MovieID'])
+    assert rollups.verify(db) == []
+
+
+def test_retag_moves_the_counts(db):
+    movie = movie_in_stock(db)
+    issue(db, movie['MovieID'])
+    other_producer = db.fetch_one(
+        "SELECT ProducerID FROM producers WHERE ProducerID <> %s ORDER BY ProducerID LIMIT 1",
+        (movie['ProducerID'],)
+    )['ProducerID']
+    
+    retag(db, movie['MovieID'], 'Retagged', other_producer, 9.99)
+    assert rollups.verify(db) == []
+    
+    retag(db, movie['MovieID'], None, None, 0)
+    assert rollups.verify(db) == []
+
+
+def test_failed_transaction_leaves_rollups_alone(db):
+    movie = movie_in_stock(db)
+    with db.transaction() as txn:
+        rollups.record_issue(db, CUSTOMER_ID, movie['MovieID'], date(2025, 3, 1))
+        txn.failed = True
+    assert rollups.verify(db) == []
+
+
+def test_delete_movie_without_rentals(db):
+    movie_id = db.execute_insert(
+        "INSERT INTO movies (Title, ReleaseYear, Genre, RentalPrice, ProducerID) VALUES (%s, %s, %s, %s, %s)",
+        ('Never Rented', 2024, 'Drama', 4.5, None)
+    )
+    assert delete_movie(db, movie_id)
+    assert rollups.verify(db) == []
+
+
+def test_delete_movie_takes_its_rentals_out_of_genre_and_producer(db):
+    movie = movie_in_stock(db)
+    issue_id = issue(db, movie['MovieID'])
+    return_rental(db, issue_id, movie['MovieID'])
+    
+    # issuetran keeps a movie with history, so purge its rentals the way an operator would
+    db.execute_query("DELETE FROM issuetran WHERE MovieID = %s", (movie['MovieID'],))
+    assert delete_movie(db, movie['MovieID'])
+    
+    stale = {table for table, _, _, _ in rollups.verify(db)}
+    assert not stale & {'rollup_movie', 'rollup_genre', 'rollup_producer'}
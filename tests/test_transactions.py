@@ -0,0 +1,67 @@
+"""
+transaction(): commit, rollback and exception propagation
+"""
+
+import pytest
+
+TITLE = "SELECT Title FROM movies WHERE MovieID = %s"
+
+
+def title(db, movie_id=1):
+    return db.fetch_one(TITLE, (movie_id,))['Title']
+
+
+def test_commit_applies_every_statement(db):
+    with db.transaction() as txn:
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('First', 1))
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Second', 2))
+    
+    assert txn.committed and not txn.failed
+    assert (title(db, 1), title(db, 2)) == ('First', 'Second')
+
+
+def test_failed_statement_rolls_back_the_whole_transaction(db):
+    before = title(db)
+    with db.transaction() as txn:
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Changed', 1))
+        assert db.execute_query("UPDATE no_such_table SET x = 1") is False
+        # Later statements are skipped once the transaction has failed
+        assert db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Later', 2)) is False
+    
+    assert txn.failed and not txn.committed
+    assert title(db) == before
+
+
+def test_exception_in_block_rolls_back_and_propagates(db):
+    before = title(db)
+    with pytest.raises(ZeroDivisionError):
+        with db.transaction() as txn:
+            db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Changed', 1))
+            1 / 0
+    
+    assert txn.failed and not txn.committed
+    assert title(db) == before
+    assert db.current_transaction() is None
+
+
+def test_nested_transaction_joins_the_outer_one(db):
+    before = title(db)
+    with db.transaction() as outer:
+        with db.transaction() as inner:
+            assert inner is outer
+            db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('Changed', 1))
+        outer.failed = True
+    
+    assert not outer.committed
+    assert title(db) == before
+
+
+def test_connection_goes_back_to_the_pool(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            raise RuntimeError("boom")
+    with db.transaction() as txn:
+        db.execute_query("UPDATE movies SET Title = %s WHERE MovieID = %s", ('After', 1))
+    
+    assert txn.committed
+    assert db.pool_stats()['in_use'] == 0
@@ -0,0 +1,309 @@
+"""
+Typeahead Module
+In-memory prefix and trigram index over customer and movie names for the
+autocomplete pickers on the rental screen
+"""
+
+import re
+import threading
+import tkinter as tk
+import weakref
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+# What to index for each picker: key column, load query, searchable fields and display label
+TypeaheadSource = namedtuple('TypeaheadSource', ['key', 'query', 'fields', 'label'])
+
+SOURCES = {
+    'customer': TypeaheadSource(
+        'CustomerID',
+        "SELECT CustomerID, FirstName, LastName, Phone FROM customer",
+        lambda row: [row['FirstName'], row['LastName'], row['Phone']],
+        lambda row: f"{row['CustomerID']} - {row['FirstName']} {row['LastName']}"
+    ),
+    'movies': TypeaheadSource(
+        'MovieID',
+        "SELECT MovieID, Title, RentalPrice FROM movies",
+        lambda row: [row['Title']],
+        lambda row: f"{row['MovieID']} - {row['Title']} (${row['RentalPrice']:.2f})"
+    )
+}
+
+# Built indexes per DatabaseConfig, shared by every screen using that connection
+_indexes = weakref.WeakKeyDictionary()
+_build_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Lower-case words of a string"""
+    return re.findall(r'\w+', str(text or '').lower())
+
+
+def trigrams(token):
+    """Set of 3-character substrings of a token"""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class TypeaheadIndex:
+    """Prefix (sorted token list) and substring (trigram) index over short labels"""
+    
+    def __init__(self):
+        self._labels = {}
+        self._tokens = {}
+        self._sorted = []
+        self._trigrams = {}
+        self.high_water = 0
+    
+    def __len__(self):
+        return len(self._labels)
+    
+    def add(self, key, label, fields):
+        """Index (or re-index) one entry"""
+        if key in self._labels:
+            self.remove(key)
+        for token in self._store(key, label, fields):
+            insort(self._sorted, (token, key))
+    
+    def load(self, entries):
+        """Index many (key, label, fields) entries, sorting the token list once"""
+        for key, label, fields in entries:
+            if key in self._labels:
+                self.remove(key)
+            self._sorted.extend((token, key) for token in self._store(key, label, fields))
+        self._sorted.sort()
+    
+    def _store(self, key, label, fields):
+        """Record an entry's label, words and trigrams; returns its words"""
+        tokens = tuple(sorted({token for field in fields for token in tokenize(field)}))
+        self._labels[key] = label
+        self._tokens[key] = tokens
+        for token in tokens:
+            for trigram in trigrams(token):
+                self._trigrams.setdefault(trigram, set()).add(key)
+        if isinstance(key, int):
+            self.high_water = max(self.high_water, key)
+        return tokens
+    
+    def remove(self, key):
+        """Drop an entry from the index"""
+        if key not in self._labels:
+            return
+        del self._labels[key]
+        for token in self._tokens.pop(key):
+            position = bisect_left(self._sorted, (token, key))
+            if position < len(self._sorted) and self._sorted[position] == (token, key):
+                del self._sorted[position]
+            for trigram in trigrams(token):
+                keys = self._trigrams.get(trigram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._trigrams[trigram]
+    
+    def search(self, text, limit=10, accept=None):
+        """Top `limit` (key, label) pairs whose words start with (or contain) every typed word
+        
+        Prefix matches come first in alphabetical order of the matched word,
+        then substring matches found through the trigram index. `accept` is
+        an optional key filter (e.g. only available movies).
+        """
+        terms = tokenize(text)
+        if not terms:
+            return []
+        
+        results = []
+        seen = set()
+        
+        # Prefix matches: walk the narrowest term's range of the sorted token list
+        ranges = [self._prefix_range(term) for term in terms]
+        start, end = min(ranges, key=lambda bounds: bounds[1] - bounds[0])
+        for position in range(start, end):
+            key = self._sorted[position][1]
+            if key in seen:
+                continue
+            seen.add(key)
+            if accept is not None and not accept(key):
+                continue
+            if self._matches(key, terms, prefix=True):
+                results.append(key)
+                if len(results) >= limit:
+                    return self._labelled(results)
+        
+        # Substring matches (e.g. digits in the middle of a phone number)
+        longest = max(terms, key=len)
+        if len(longest) >= 3:
+            extra = []
+            for key in self._trigram_candidates(longest):
+                if key in seen or (accept is not None and not accept(key)):
+                    continue
+                if self._matches(key, terms, prefix=False):
+                    extra.append(key)
+                    if len(results) + len(extra) >= limit:
+                        break
+            results.extend(sorted(extra, key=self._labels.get))
+        return self._labelled(results)
+    
+    def _prefix_range(self, term):
+        """Slice of the sorted token list whose tokens start with term"""
+        return bisect_left(self._sorted, (term,)), bisect_left(self._sorted, (term + '\uffff',))
+    
+    def _trigram_candidates(self, term):
+        """Keys with every trigram of term (a superset of the substring matches)"""
+        sets = sorted((self._trigrams.get(trigram, set()) for trigram in trigrams(term)), key=len)
+        if not sets or not sets[0]:
+            return set()
+        return sets[0].intersection(*sets[1:])
+    
+    def _matches(self, key, terms, prefix):
+        """True when every term starts (prefix) or occurs in one of the entry's words"""
+        tokens = self._tokens[key]
+        if prefix:
+            return all(any(token.startswith(term) for token in tokens) for term in terms)
+        return all(any(term in token for token in tokens) for term in terms)
+    
+    def _labelled(self, keys):
+        """(key, label) pairs"""
+        return [(key, self._labels[key]) for key in keys]
+
+
+def get_index(db, name):
+    """Index `name` ('customer' or 'movies') for db, loading it on first use
+    
+    Loading streams the whole table, so call this from a worker thread.
+    """
+    with _build_lock:
+        indexes = _indexes.setdefault(db, {})
+        if name not in indexes:
+            source = SOURCES[name]
+            index = TypeaheadIndex()
+            index.load(
+                (row[source.key], source.label(row), source.fields(row))
+                for row in db.fetch_iter(source.query)
+            )
+            indexes[name] = index
+        return indexes[name]
+
+
+def cached_index(db, name):
+    """Index `name` if it has been loaded already, else None"""
+    return _indexes.get(db, {}).get(name)
+
+
+def record_write(db, name, key, row=None):
+    """Apply an insert/update (row given) or delete (row None) to a loaded index"""
+    index = cached_index(db, name)
+    if index is None:
+        return
+    if row is None:
+        index.remove(key)
+    else:
+        source = SOURCES[name]
+        index.add(key, source.label(row), source.fields(row))
+
+
+def fetch_new_rows(db, name):
+    """Rows added since the index was loaded (e.g. by another counter)"""
+    index = cached_index(db, name)
+    if index is None:
+        return []
+    source = SOURCES[name]
+    return db.fetch_data(f"{source.query} WHERE {source.key} > %s", (index.high_water,))
+
+
+def apply_rows(db, name, rows):
+    """Add rows returned by fetch_new_rows to the loaded index"""
+    source = SOURCES[name]
+    for row in rows:
+        record_write(db, name, row[source.key], row)
+
+
+class AutocompletePicker(tk.Frame):
+    """Entry with a suggestion list driven by a TypeaheadIndex
+    
+    command, if given, is called with the key of each picked suggestion.
+    """
+    
+    def __init__(self, parent, width=40, font=('Arial', 11), limit=10, command=None, **kwargs):
+        super().__init__(parent, bg='white', **kwargs)
+        self.limit = limit
+        self.command = command
+        self.index = None
+        self.accept = None
+        self.selected_id = None
+        self._matches = []
+        
+        self.entry = tk.Entry(self, font=font, width=width, state='disabled')
+        self.entry.pack(fill=tk.X)
+        self.listbox = tk.Listbox(self, font=font, height=0, activestyle='dotbox')
+        
+        self.entry.bind('<KeyRelease>', self.on_key)
+        self.entry.bind('<Down>', self.focus_list)
+        self.entry.bind('<Return>', self.choose_first)
+        self.entry.bind('<Escape>', lambda event: self.hide_list())
+        self.listbox.bind('<<ListboxSelect>>', self.on_pick)
+        self.listbox.bind('<Return>', self.on_pick)
+    
+    def set_index(self, index, accept=None):
+        """Attach a loaded index and enable typing"""
+        self.index = index
+        self.accept = accept
+        self.entry.config(state='normal')
+    
+    def get(self):
+        """Text currently in the entry"""
+        return self.entry.get()
+    
+    def set(self, text):
+        """Replace the entry text and clear the selection"""
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, text)
+        self.selected_id = None
+        self.hide_list()
+    
+    def on_key(self, event):
+        """Refresh suggestions as the clerk types"""
+        if event.keysym in ('Down', 'Up', 'Return', 'Escape', 'Tab'):
+            return
+        self.selected_id = None
+        if self.index is None:
+            return
+        self._matches = self.index.search(self.entry.get(), self.limit, self.accept)
+        self.listbox.delete(0, tk.END)
+        for _, label in self._matches:
+            self.listbox.insert(tk.END, label)
+        if self._matches:
+            self.listbox.config(height=len(self._matches))
+            self.listbox.pack(fill=tk.X)
+        else:
+            self.hide_list()
+    
+    def focus_list(self, event):
+        """Move keyboard focus into the suggestion list"""
+        if self._matches:
+            self.listbox.focus_set()
+            self.listbox.selection_set(0)
+    
+    def choose_first(self, event):
+        """Pick the best suggestion with Enter"""
+        if self._matches:
+            self.pick(0)
+    
+    def on_pick(self, event):
+        """Pick the clicked/highlighted suggestion"""
+        selection = self.listbox.curselection()
+        if selection:
+            self.pick(selection[0])
+    
+    def pick(self, position):
+        """Select a suggestion by its position in the list"""
+        key, label = self._matches[position]
+        self.set(label)
+        self.selected_id = key
+        self.entry.focus_set()
+        if self.command:
+            self.command(key)
+    
+    def hide_list(self):
+        """Hide the suggestion list"""
+        self._matches = []
+        self.listbox.pack_forget()
@@ -0,0 +1,606 @@
+"""
+Virtual Tree Module
+Treeview that shows a window of rows from a row source, loading large
+results lazily as the user scrolls
+"""
+
+import time
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+from pagination import FIRST
+
+BLOCK_SIZE = 200
+MAX_BLOCKS = 10
+
+# Milliseconds between background refreshes of the page on screen
+REFRESH_INTERVAL = 60000
+
+# Heading height in pixels, used to work out how many rows fit
+HEADING_HEIGHT = 25
+
+# Shown in place of a row whose block is still loading
+PLACEHOLDER = ("…",)
+
+_UNKNOWN = object()
+
+
+class ListRowSource:
+    """Rows already in memory (one page of a paged list)"""
+    
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def row(self, index):
+        """Row at index"""
+        return self.rows[index]
+    
+    def request(self, first, last, on_loaded):
+        """Everything is loaded already"""
+    
+    def extend(self, rows):
+        """Append rows (Load More)"""
+        self.rows.extend(rows)
+    
+    def find(self, column, key):
+        """Index of the row whose `column` equals key, or None"""
+        for index, row in enumerate(self.rows):
+            if row[column] == key:
+                return index
+        return None
+    
+    def insert(self, index, row):
+        """Insert a row at index"""
+        self.rows.insert(index, row)
+    
+    def replace(self, index, row):
+        """Replace the row at index"""
+        self.rows[index] = row
+    
+    def remove(self, index):
+        """Remove the row at index"""
+        del self.rows[index]
+    
+    def reconcile(self, rows, column):
+        """Replace the rows with a fresh read; returns how many were added, changed or removed"""
+        old = {row[column]: row for row in self.rows}
+        fresh = {row[column] for row in rows}
+        changes = sum(1 for row in rows if old.get(row[column]) != row)
+        changes += sum(1 for key in old if key not in fresh)
+        self.rows = list(rows)
+        return changes
+
+
+class LazyRowStore:
+    """Rows of a KeysetPager query, fetched in blocks as they scroll into view
+    
+    At most max_blocks blocks are kept (least recently used go first), so
+    memory stays flat however long the result is. Each block is fetched by
+    seeking past the last row of the block before it; jumping ahead to a
+    block whose start is not known yet looks that start up with one OFFSET
+    query from the nearest known block.
+    """
+    
+    def __init__(self, pager, runner, channel, block_size=BLOCK_SIZE, max_blocks=MAX_BLOCKS):
+        self.pager = pager
+        self.runner = runner
+        self.channel = channel
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        
+        self.count = 0
+        self._generation = 0
+        self._blocks = OrderedDict()
+        # Seek key of each block: sort key values of the row just before it
+        self._starts = {0: None}
+        self._loading = set()
+        self._wanted = range(0)
+        # False after a refresh: blocks are read past the query cache until the next reset
+        self.cached = None
+    
+    def __len__(self):
+        return self.count
+    
+    def open(self, on_ready):
+        """Count the rows and load the first block, then call on_ready()"""
+        def work():
+            return self.pager.count(), self._fetch_block(0)
+        
+        def ready(result):
+            self.count, loaded = result
+            self._store(*loaded)
+            on_ready()
+        
+        self._wanted = range(1)
+        return self.runner.submit(self.channel, work, callback=ready)
+    
+    def row(self, index):
+        """Row at index, or None while its block is not loaded"""
+        rows = self._blocks.get(index // self.block_size)
+        if rows is None:
+            return None
+        offset = index % self.block_size
+        return rows[offset] if offset < len(rows) else None
+    
+    def request(self, first, last, on_loaded):
+        """Make sure rows first..last-1 get loaded; on_loaded() runs as blocks arrive"""
+        blocks = range(first // self.block_size, max(first, last - 1) // self.block_size + 1)
+        self._wanted = blocks
+        for block in blocks:
+            if block in self._blocks:
+                self._blocks.move_to_end(block)
+                continue
+            if block in self._loading:
+                continue
+            self._loading.add(block)
+            
+            def loaded(result, generation=self._generation):
+                if generation != self._generation:
+                    # Fetched before a reset
+                    return
+                self._store(*result)
+                on_loaded()
+            
+            def failed(error, block=block):
+                self._loading.discard(block)
+                print(f"Error loading rows: {error}")
+            
+            # One channel per block so neighbouring blocks load side by side
+            self.runner.submit(
+                f"{self.channel}-block-{block}", self._fetch_block, block,
+                callback=loaded, error_callback=failed
+            )
+    
+    def find(self, column, key):
+        """Index of a loaded row whose `column` equals key, or None"""
+        for block, rows in self._blocks.items():
+            for offset, row in enumerate(rows):
+                if row[column] == key:
+                    return block * self.block_size + offset
+        return None
+    
+    def replace(self, index, row):
+        """Replace a loaded row"""
+        self._blocks[index // self.block_size][index % self.block_size] = row
+    
+    def reset(self, on_ready, cached=None):
+        """Recount and forget the loaded rows (after rows were added or removed)
+        
+        cached=False re-reads everything from the database, not the query cache.
+        """
+        self.cached = cached
+        
+        def ready(count):
+            self.count = count
+            self._generation += 1
+            self._blocks.clear()
+            self._starts = {0: None}
+            self._loading.clear()
+            on_ready()
+        
+        return self.runner.submit(f"{self.channel}-count", self.pager.count, cached, callback=ready)
+    
+    def _fetch_block(self, block):
+        """(block, seek key, rows) for a block; runs on a worker thread"""
+        if block not in self._wanted:
+            # Scrolled past before the worker got to it
+            return block, _UNKNOWN, None
+        start = self._starts.get(block, _UNKNOWN)
+        if start is _UNKNOWN:
+            known = max(b for b in list(self._starts) if b < block)
+            start = self.pager.key_at(self._starts[known], (block - known) * self.block_size - 1)
+            if start is None:
+                return block, _UNKNOWN, []
+        return block, start, self.pager.fetch(start, limit=self.block_size, cached=self.cached)
+    
+    def _store(self, block, start, rows):
+        """Keep a fetched block, evicting the least recently used beyond max_blocks"""
+        self._loading.discard(block)
+        if rows is None:
+            return
+        if start is not _UNKNOWN:
+            self._starts[block] = start
+        if len(rows) == self.block_size:
+            self._starts[block + 1] = self.pager.key_of(rows[-1])
+        self._blocks[block] = rows
+        self._blocks.move_to_end(block)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+
+class VirtualTreeview(ttk.Treeview):
+    """Treeview holding only as many items as fit on screen
+    
+    Scrolling re-fills those items from the row source instead of moving
+    through inserted items, so a list of any length costs the same to
+    show. The yscrollcommand scrollbar tracks the position in the source.
+    Handlers bound to <<TreeviewSelect>> only hear about selections the
+    user makes, not the re-selection done while scrolling.
+    """
+    
+    def __init__(self, parent, yscrollcommand=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self._yscrollcommand = yscrollcommand
+        self.source = ListRowSource()
+        self.row_values = tuple
+        self.first = 0
+        self.visible = int(kwargs.get('height', 10))
+        self._selected = None
+        self._select_handler = None
+        
+        super().bind('<<TreeviewSelect>>', self._on_select)
+        super().bind('<Configure>', self._on_resize)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            super().bind(sequence, self._on_wheel)
+        for sequence in ('<Up>', '<Down>', '<Prior>', '<Next>'):
+            super().bind(sequence, self._on_key)
+    
+    def bind(self, sequence=None, func=None, add=None):
+        """Bind as usual; <<TreeviewSelect>> handlers go through the selection tracking"""
+        if sequence == '<<TreeviewSelect>>':
+            self._select_handler = func
+            return None
+        return super().bind(sequence, func, add)
+    
+    def set_source(self, source, row_values):
+        """Show rows from a source (ListRowSource or LazyRowStore) from the top"""
+        self.source = source
+        self.row_values = row_values
+        self.first = 0
+        self._selected = None
+        self.render()
+    
+    def set_rows(self, rows, row_values, append=False):
+        """Show an in-memory list of rows, or append them to the current list"""
+        if append and isinstance(self.source, ListRowSource):
+            self.source.extend(rows)
+            self.render()
+        else:
+            self.set_source(ListRowSource(rows), row_values)
+    
+    def selected_index(self):
+        """Source index of the selected row, or None"""
+        return self._selected
+    
+    def select_row(self, index):
+        """Move the selection to a source index (None to clear) without notifying handlers"""
+        self._selected = index
+        self.render()
+    
+    def row_changed(self, index):
+        """Redraw one row whose data changed"""
+        items = self.get_children()
+        if self.first <= index < self.first + len(items):
+            self.item(items[index - self.first], values=self.row_values(self.source.row(index)))
+    
+    def row_inserted(self, index):
+        """Account for a row inserted into the source at index"""
+        if self._selected is not None and self._selected >= index:
+            self._selected += 1
+        self.render()
+    
+    def row_removed(self, index):
+        """Account for the row removed from the source at index"""
+        if self._selected == index:
+            self._selected = None
+        elif self._selected is not None and self._selected > index:
+            self._selected -= 1
+        self.render()
+    
+    def yview(self, *args):
+        """Scrollbar protocol: report the position or move to/by a position"""
+        total = len(self.source)
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * total))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.scroll_to(self.first + int(args[1]) * step)
+        return None
+    
+    def scroll_to(self, first):
+        """Make row `first` the top visible row"""
+        self.first = first
+        self.render()
+    
+    def render(self):
+        """Fill the visible items from the source"""
+        if not self.winfo_exists():
+            return
+        total = len(self.source)
+        self.first = max(0, min(self.first, total - self.visible))
+        last = min(total, self.first + self.visible)
+        
+        # Load a screen ahead so scrolling down rarely shows placeholders
+        source = self.source
+        self.source.request(self.first, min(total, last + self.visible),
+                            lambda: self.render() if self.source is source else None)
+        
+        items = self.get_children()
+        needed = last - self.first
+        if len(items) > needed:
+            self.delete(*items[needed:])
+        for _ in range(len(items), needed):
+            self.insert('', tk.END)
+        items = self.get_children()
+        
+        for position, item in enumerate(items):
+            row = self.source.row(self.first + position)
+            self.item(item, values=self.row_values(row) if row is not None else PLACEHOLDER)
+        
+        # Keep the highlight on the selected row, not on the item position
+        wanted = ()
+        if self._selected is not None and self.first <= self._selected < last:
+            wanted = (items[self._selected - self.first],)
+        if tuple(self.selection()) != wanted:
+            self.selection_set(wanted)
+        
+        if self._yscrollcommand:
+            self._yscrollcommand(*self._fractions())
+    
+    def _fractions(self):
+        """(top, bottom) of the visible window as fractions of the source"""
+        total = len(self.source)
+        if total == 0:
+            return 0.0, 1.0
+        return self.first / total, min(1.0, (self.first + self.visible) / total)
+    
+    def _on_select(self, event):
+        """Track the selected row and pass user selections on to the handler"""
+        selection = self.selection()
+        if selection:
+            index = self.first + self.index(selection[0])
+            if self.source.row(index) is None:
+                # Placeholder of a row still loading
+                return
+        else:
+            index = None
+            if self._selected is not None and not (
+                    self.first <= self._selected < self.first + len(self.get_children())):
+                # The selected row scrolled out of view; it is still selected
+                return
+        if index == self._selected:
+            return
+        self._selected = index
+        if self._select_handler:
+            self._select_handler(event)
+    
+    def _on_resize(self, event):
+        """Show as many rows as fit in the new height"""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        visible = max(1, (event.height - HEADING_HEIGHT) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+    
+    def _on_wheel(self, event):
+        """Scroll three rows per wheel notch"""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+        return 'break'
+    
+    def _on_key(self, event):
+        """Scroll when the keyboard focus would move off the visible rows"""
+        items = self.get_children()
+        if not items:
+            return None
+        if event.keysym in ('Prior', 'Next'):
+            self.scroll_to(self.first + (self.visible if event.keysym == 'Next' else -self.visible))
+            return 'break'
+        
+        focus = self.focus()
+        if event.keysym == 'Up' and focus == items[0] and self.first > 0:
+            self.scroll_to(self.first - 1)
+        elif event.keysym == 'Down' and focus == items[-1] and self.first + len(items) < len(self.source):
+            self.scroll_to(self.first + 1)
+        else:
+            return None
+        # The edge item now shows the next row; select it like a normal move
+        self.selection_set(focus)
+        return 'break'
+
+
+class PagedList:
+    """Shows a KeysetPager in a VirtualTreeview, page by page or all at once
+    
+    With the pager bar's "Show all" ticked (paging off) the whole result
+    goes into the tree through a LazyRowStore; otherwise one page at a time.
+    Writes patch single rows through upsert() and remove(); refresh() (F5,
+    and every REFRESH_INTERVAL for a page) re-reads the rows on screen and
+    reconciles them by primary key.
+    """
+    
+    def __init__(self, tree, pager_bar, runner, channel, noun, key, row_values, status_bar):
+        self.tree = tree
+        self.pager_bar = pager_bar
+        self.runner = runner
+        self.channel = channel
+        self.noun = noun
+        self.key = key
+        self.row_values = row_values
+        self.status_bar = status_bar
+        self.pager = None
+        self.store = None
+        self.filtered = False
+        # Seek key of the top row of the current page (None = start of the list)
+        self.view_start = None
+        
+        tree.bind('<F5>', lambda event: self.refresh())
+        self._schedule_refresh()
+    
+    def show(self, pager, filtered=False):
+        """Show the first page (or everything) of a pager's query
+        
+        filtered=True marks search results: the status line reports how
+        many were found and how long it took, and rows added later are not
+        inserted since they may not match the search.
+        """
+        self.pager = pager
+        self.store = None
+        self.filtered = filtered
+        started = time.perf_counter()
+        
+        def shown():
+            self.update_status()
+            if filtered:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.status_bar.set_message(f"{self.found()} ({elapsed:.0f} ms)")
+        
+        if self.pager_bar.paging_off():
+            store = LazyRowStore(pager, self.runner, self.channel)
+            
+            def ready():
+                self.store = store
+                self.tree.set_source(store, self.row_values)
+                shown()
+            
+            store.open(ready)
+        else:
+            def first_page(rows, append):
+                self.show_page(rows, append)
+                shown()
+            
+            pager.load(self.runner, self.channel, FIRST, first_page)
+    
+    def reload(self):
+        """Show the current query again (e.g. after paging was switched on or off)"""
+        if self.pager is not None:
+            self.show(self.pager, filtered=self.filtered)
+    
+    def page(self, direction):
+        """Move to the NEXT/PREVIOUS page or append the next one (MORE)"""
+        if self.pager is not None and self.store is None:
+            self.pager.load(self.runner, self.channel, direction, self.show_page)
+    
+    def show_page(self, rows, append):
+        """Put a fetched page in the tree"""
+        if not append:
+            self.view_start = self.pager.starts[-1]
+        self.tree.set_rows(rows, self.row_values, append)
+        self.update_status()
+    
+    def upsert(self, row):
+        """Show an added or edited row (as the list query returns it) without reloading"""
+        if row is None or self.pager is None:
+            return
+        source = self.tree.source
+        index = source.find(self.key, row[self.key])
+        if index is not None:
+            source.replace(index, row)
+            self.tree.row_changed(index)
+        elif self.filtered:
+            return
+        elif self.store is not None:
+            # Positions after the new row shift; recount and reload the visible blocks
+            self.refresh()
+        else:
+            index = self.insert_position(row)
+            if index is not None:
+                source.insert(index, row)
+                self.pager.rows_shown += 1
+                self.tree.row_inserted(index)
+                self.update_status()
+    
+    def remove(self, key):
+        """Drop a deleted row from the list without reloading"""
+        if self.pager is None:
+            return
+        if self.store is not None:
+            self.refresh()
+            return
+        source = self.tree.source
+        index = source.find(self.key, key)
+        if index is not None:
+            source.remove(index)
+            self.pager.rows_shown -= 1
+            self.tree.row_removed(index)
+            self.update_status()
+    
+    def insert_position(self, row):
+        """Where a new row goes in the page on screen, or None if it belongs to another page"""
+        key = self.pager.key_of(row)
+        rows = self.tree.source.rows
+        position = len(rows)
+        for index, other in enumerate(rows):
+            if self.pager.precedes(key, self.pager.key_of(other)):
+                position = index
+                break
+        if position == len(rows) and self.pager.has_next:
+            return None
+        if position == 0 and self.view_start is not None:
+            return None
+        return position
+    
+    def refresh(self):
+        """Re-read the rows on screen and patch whatever changed
+        
+        Always reads the database, not the query cache, so writes made at
+        other counters show up.
+        """
+        pager = self.pager
+        if pager is None:
+            return
+        if self.store is not None:
+            store = self.store
+            
+            def reloaded():
+                if self.store is store:
+                    self.tree.render()
+                    self.update_status()
+            
+            store.reset(reloaded, cached=False)
+            return
+        
+        source = self.tree.source
+        
+        def reconcile(rows):
+            if self.pager is not pager or self.tree.source is not source:
+                # The list was replaced while refreshing
+                return
+            selected = self.tree.selected_index()
+            selected_key = None
+            if selected is not None and selected < len(source):
+                selected_key = source.rows[selected][self.key]
+            changes = source.reconcile(rows, self.key)
+            if changes:
+                index = source.find(self.key, selected_key) if selected_key is not None else None
+                self.tree.select_row(index)
+                self.status_bar.set_message(f"{self.pager.summary(self.noun)} - {changes} updated")
+        
+        self.runner.submit(
+            f"{self.channel}-refresh", pager.fetch, self.view_start, max(len(source), 1),
+            callback=reconcile, cached=False
+        )
+    
+    def update_status(self):
+        """Refresh the pager buttons and the status line"""
+        self.pager_bar.update_state(self.pager)
+        if self.store is not None:
+            self.status_bar.set_message(f"{len(self.store)} {self.noun}")
+        else:
+            self.status_bar.set_message(self.pager.summary(self.noun))
+    
+    def found(self):
+        """Search result message"""
+        if self.store is not None:
+            return f"Found {len(self.store)} {self.noun}"
+        return self.pager.found(self.noun)
+    
+    def _schedule_refresh(self):
+        """Refresh the page on screen every REFRESH_INTERVAL"""
+        def tick():
+            if not self.tree.winfo_exists():
+                # Tree destroyed with its screen
+                return
+            # A page is cheap to re-read; the full list refreshes on F5 only
+            if self.store is None:
+                self.refresh()
+            self._schedule_refresh()
+        
+        self.tree.after(REFRESH_INTERVAL, tick)